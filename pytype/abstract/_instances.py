@@ -500,7 +500,7 @@ class List(  # pytype: disable=signature-mismatch
     unresolved = False
     if self.is_concrete:
       for start_val, end_val in cfg_utils.variable_product(
-          [start_var, end_var]
+          [start_var, end_var], unique_data=True
       ):
         try:
           start = self._get_index(
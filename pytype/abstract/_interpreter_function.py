@@ -6,8 +6,9 @@ import contextlib
 import hashlib
 import itertools
 import logging
-from typing import TYPE_CHECKING
+from typing import Any, TYPE_CHECKING
 
+from pytype import metrics
 from pytype.abstract import _classes
 from pytype.abstract import _function_base
 from pytype.abstract import _instance_base
@@ -36,6 +37,23 @@ else:
 
 log: logging.Logger = logging.getLogger(__name__)
 
+_call_cache_hits = metrics.MapCounter("call_cache_hits")
+_call_cache_misses = metrics.MapCounter("call_cache_misses")
+
+# Opcodes that let a function observe the identity or attributes of its
+# arguments, or capture them in a value that outlives the call. Functions
+# containing any of these never use abstract call keys.
+_IDENTITY_OPCODES = frozenset({
+    "DELETE_ATTR",
+    "IS_OP",
+    "LOAD_ATTR",
+    "LOAD_CLOSURE",
+    "LOAD_METHOD",
+    "LOAD_SUPER_ATTR",
+    "MAKE_FUNCTION",
+    "STORE_ATTR",
+})
+
 
 def _matches_generator_helper(
     type_obj: "_base.BaseValue", allowed_types: tuple[str, ...]
@@ -66,15 +84,51 @@ def _matches_async_generator(type_obj: "_base.BaseValue") -> bool:
   return _matches_generator_helper(type_obj, allowed_types)
 
 
+def _hash_components(*components) -> bytes:
+  return hashlib.md5(
+      b"".join(str(hash(c)).encode("utf-8") for c in components)
+  ).digest()
+
+
 def _hash_all_dicts(*hash_args) -> bytes:
   """Convenience method for hashing a sequence of dicts."""
-  components = (
+  return _hash_components(*(
       abstract_utils.get_dict_fullhash_component(d, names=n)
       for d, n in hash_args
+  ))
+
+
+def _get_abstract_value_key(value: "_base.BaseValue") -> Any:
+  """Key for a value that ignores the identity of plain instances.
+
+  Two instances of the same class, with the same type parameters and the same
+  types of attributes, get the same key. Any other value is keyed on its full
+  hash, like in get_dict_fullhash_component.
+
+  Args:
+    value: An abstract value.
+
+  Returns:
+    A hashable key.
+  """
+  if type(value) is not _instance_base.Instance:  # pylint: disable=unidiomatic-typecheck
+    return value.get_fullhash()
+  members = frozenset(
+      (name, frozenset(v.get_type_key() for v in var.data))
+      for name, var in value.members.items()
+  )
+  return (value.get_type_key(), members)
+
+
+def _get_abstract_args_component(
+    callargs: dict[str, "cfg.Variable"],
+) -> tuple[Any, ...]:
+  return tuple(
+      sorted(
+          (name, frozenset(_get_abstract_value_key(v) for v in var.data))
+          for name, var in callargs.items()
+      )
   )
-  return hashlib.md5(
-      b"".join(str(hash(c)).encode("utf-8") for c in components)
-  ).digest()
 
 
 def _check_classes(
@@ -229,6 +283,8 @@ class InterpreterFunction(_function_base.SignedFunction):
     self.closure = closure
     self._call_cache = {}
     self._call_records = []
+    # Calls with single-valued arguments, for --function-summaries.
+    self.summary_records = []
     # TODO(b/78034005): Combine this and PyTDFunction.signatures into a single
     # way to handle multiple signatures that SignedFunction can also use.
     self._all_overloads = overloads
@@ -262,6 +318,7 @@ class InterpreterFunction(_function_base.SignedFunction):
     self.is_class_builder = False  # Will be set by BuildClass.
     # Whether to cache the return value irrespective of call args
     self.cache_return = False
+    self._identity_free: bool | None = None
 
   @contextlib.contextmanager
   def record_calls(self):
@@ -532,7 +589,22 @@ class InterpreterFunction(_function_base.SignedFunction):
     )
     return function.Args(posargs=(args.posargs[0], arg1, arg2, arg3))
 
-  def _hash_call(self, callargs, frame):
+  def _is_identity_free(self) -> bool:
+    """Whether the result of a call can't depend on the arguments' identity."""
+    if self._identity_free is None:
+      self._identity_free = not (
+          self.code.has_generator()
+          or self.code.has_async_generator()
+          or self.code.has_coroutine()
+          or "id" in self.code.names
+          or any(op.name in _IDENTITY_OPCODES for op in self.code.code_iter)
+      )
+    return self._identity_free
+
+  def _use_abstract_call_key(self) -> bool:
+    return self.ctx.options.abstract_call_keys and self._is_identity_free()
+
+  def _hash_call(self, callargs, frame, abstract=False):
     # Note that we ignore caching in __init__ calls, so that attributes are
     # set correctly.
     if self.cache_return:
@@ -550,10 +622,21 @@ class InterpreterFunction(_function_base.SignedFunction):
         local_members = {}
       else:
         local_members = frame.f_locals.members
-      callkey = _hash_all_dicts(
-          (callargs, None),
-          (frame.f_globals.members, set(self.code.names)),
-          (local_members, set(local_members) - set(self.code.varnames)),
+      if abstract:
+        # Instances of the same type are interchangeable, so that calls with
+        # fresh instances from different call sites share a cache entry.
+        args_component = _get_abstract_args_component(callargs)
+      else:
+        args_component = abstract_utils.get_dict_fullhash_component(callargs)
+      callkey = _hash_components(
+          args_component,
+          abstract_utils.get_dict_fullhash_component(
+              frame.f_globals.members, names=set(self.code.names)
+          ),
+          abstract_utils.get_dict_fullhash_component(
+              local_members,
+              names=set(local_members) - set(self.code.varnames),
+          ),
       )
     else:
       # Make the callkey the number of times this function has been called so
@@ -649,13 +732,10 @@ class InterpreterFunction(_function_base.SignedFunction):
         ".__init__"
     ):
       log.info("Maximum depth reached. Not analyzing %r", self.name)
-      self._set_callself_maybe_missing_members()
-      if "return" not in annotations:
-        return node, self.ctx.new_unsolvable(node)
-      ret = self.ctx.vm.init_class(node, annotations["return"])
-      if self.is_unannotated_coroutine():
-        ret = _instances.Coroutine(self.ctx, ret, node).to_variable(node)
-      return node, ret
+      return self._call_without_analysis(node, annotations)
+    if self.ctx.vm.is_over_budget() and not self.name.endswith(".__init__"):
+      log.info("Analysis budget used up. Not analyzing %r", self.name)
+      return self._call_without_analysis(node, annotations)
 
     first_arg = sig.get_first_arg(callargs)
     if first_arg and sig.has_return_annotation:
@@ -740,7 +820,8 @@ class InterpreterFunction(_function_base.SignedFunction):
           "return", self.ctx.convert.unsolvable
       )
       frame.check_return = check_return
-    callkey_pre = self._hash_call(callargs, frame)
+    abstract_key = self._use_abstract_call_key()
+    callkey_pre = self._hash_call(callargs, frame, abstract_key)
     if callkey_pre in self._call_cache:
       old_ret, old_remaining_depth = self._call_cache[callkey_pre]
       # Optimization: This function has already been called, with the same
@@ -761,11 +842,85 @@ class InterpreterFunction(_function_base.SignedFunction):
         )
       else:
         log.info("Skipping call to %r and using cached return", self.name)
+        _call_cache_hits.inc(self.name)
         ret = typeguard_return or old_ret.AssignToNewVariable(node)
         if self._store_call_records:
           # Even if the call is cached, we might not have been recording it.
           self._call_records.append((callargs, ret, node))
+        self._maybe_record_summary(callargs, ret, node)
         return node, ret
+    _call_cache_misses.inc(self.name)
+    with self.ctx.vm.budgeted_call() as cost:
+      node_after_call, ret = self._run_call_frame(
+          node, frame, callargs, annotations
+      )
+    budget = self.ctx.options.function_budget
+    if budget and cost() > budget:
+      if self.ctx.vm.is_first_over_budget(self.code):
+        self.ctx.errorlog.analysis_budget_exceeded(
+            self.ctx.vm.simple_stack(self.def_opcode),
+            self.name,
+            cost(),
+            budget,
+        )
+      node_after_call, ret = self._call_without_analysis(
+          node_after_call, annotations
+      )
+    self._inner_cls_check(frame)
+    if abstract_key and self._returns_argument(callargs, ret):
+      # The return value is tied to these particular arguments, so this
+      # function can't share results between calls with different arguments.
+      self._identity_free = abstract_key = False
+    # Recompute the calllkey so that side effects are taken into account.
+    callkey_post = self._hash_call(callargs, frame, abstract_key)
+    self._call_cache[callkey_post] = ret, self.ctx.vm.remaining_depth()
+    if self._store_call_records:
+      self._call_records.append((callargs, ret, node_after_call))
+    self._maybe_record_summary(callargs, ret, node_after_call)
+    self.last_frame = frame
+    return node_after_call, typeguard_return or ret
+
+  def _maybe_record_summary(self, callargs, ret, node):
+    # While the module body runs, globals may not have their final values yet,
+    # so only calls made during the analysis of the definitions are recorded.
+    if (
+        self.ctx.options.function_summaries
+        and self.ctx.vm.is_analyzing()
+        and all(len(var.bindings) == 1 for var in callargs.values())
+    ):
+      self.summary_records.append((callargs, ret, node))
+
+  def _returns_argument(self, callargs, ret) -> bool:
+    """Whether ret contains, directly or nested, one of the arguments."""
+    arg_ids = {id(v) for var in callargs.values() for v in var.data}
+    seen = set()
+    stack = list(ret.data)
+    while stack:
+      value = stack.pop()
+      if id(value) in arg_ids:
+        return True
+      if id(value) in seen or not isinstance(
+          value, _instance_base.SimpleValue
+      ):
+        continue
+      seen.add(id(value))
+      for d in (value.members, value.instance_type_parameters):
+        for var in d.values():
+          stack.extend(var.data)
+    return False
+
+  def _call_without_analysis(self, node, annotations):
+    """Returns the annotated return type, or Any, without running the code."""
+    self._set_callself_maybe_missing_members()
+    if "return" not in annotations:
+      return node, self.ctx.new_unsolvable(node)
+    ret = self.ctx.vm.init_class(node, annotations["return"])
+    if self.is_unannotated_coroutine():
+      ret = _instances.Coroutine(self.ctx, ret, node).to_variable(node)
+    return node, ret
+
+  def _run_call_frame(self, node, frame, callargs, annotations):
+    """Runs the frame of a call. Returns the node after the call and result."""
     if self.code.has_generator():
       generator = _instances.Generator(frame, self.ctx)
       # Run the generator right now, even though the program didn't call it,
@@ -803,14 +958,7 @@ class InterpreterFunction(_function_base.SignedFunction):
       if self.is_unannotated_coroutine():
         ret = _instances.Coroutine(self.ctx, ret, node2).to_variable(node2)
       node_after_call = node2
-    self._inner_cls_check(frame)
-    # Recompute the calllkey so that side effects are taken into account.
-    callkey_post = self._hash_call(callargs, frame)
-    self._call_cache[callkey_post] = ret, self.ctx.vm.remaining_depth()
-    if self._store_call_records:
-      self._call_records.append((callargs, ret, node_after_call))
-    self.last_frame = frame
-    return node_after_call, typeguard_return or ret
+    return node_after_call, ret
 
   def get_call_combinations(
       self, node: "cfg.CFGNode"
@@ -101,6 +101,27 @@ class _MatchedSignatures:
     return self._data  # pytype: disable=bad-return-type
 
 
+def _return_type_covers(
+    declared: pytd.Signature, recorded: pytd.Signature
+) -> bool:
+  """Whether a declared signature's return type covers a recorded call."""
+  # A type parameter that a parameter binds directly takes the argument type.
+  substs = {}
+  for declared_param, recorded_param in zip(declared.params, recorded.params):
+    if isinstance(declared_param.type, pytd.TypeParameter):
+      substs[declared_param.type] = recorded_param.type
+  return_types = set()
+  for t in pytd_utils.UnpackUnion(declared.return_type):
+    if isinstance(t, pytd.AnythingType):
+      return True
+    if isinstance(t, pytd.TypeParameter):
+      if t not in substs:
+        return False
+      t = substs[t]
+    return_types.add(t)
+  return set(pytd_utils.UnpackUnion(recorded.return_type)) <= return_types
+
+
 class PyTDFunction(_function_base.Function):
   """A PyTD function (name + list of signatures).
 
@@ -168,6 +189,40 @@ class PyTDFunction(_function_base.Function):
       sig.function = self
       sig.name = self.name
     self.decorators: list[str] = [d.type.name for d in decorators]
+    # Maps argument types to return types. See set_summary.
+    self._summary: dict[tuple[pytd.Type, ...], pytd.Type] = {}
+
+  def set_summary(self, summary: pytd.Function) -> None:
+    """Sets the recorded calls of this function, from --function-summaries."""
+    # Argument types are looked up by name, the way to_pytd_type produces them.
+    to_named = visitors.ClassTypeToNamedType()
+    declared = [sig.pytd_sig.Visit(to_named) for sig in self.signatures]
+    self._summary = {}
+    for sig in summary.signatures:
+      named_sig = sig.Visit(to_named)
+      # A recorded return type that the declared one doesn't cover can't be
+      # trusted, so such calls fall back to the declared signature.
+      if not any(_return_type_covers(d, named_sig) for d in declared):
+        log.debug("Ignoring an incompatible summary of %s", self.name)
+        continue
+      self._summary[tuple(p.type for p in named_sig.params)] = sig.return_type
+
+  def _call_with_summary(
+      self, node: cfg.CFGNode, args: function.Args
+  ) -> cfg.Variable | None:
+    """Returns the recorded result of a call with these argument types."""
+    if args.namedargs or args.starargs or args.starstarargs:
+      return None
+    if any(len(arg.bindings) != 1 for arg in args.posargs):
+      return None
+    key = tuple(arg.data[0].to_pytd_type(node) for arg in args.posargs)
+    ret_type = self._summary.get(key)
+    if ret_type is None:
+      return None
+    log.debug("Using the function summary of %s for %r", self.name, key)
+    return self.ctx.convert.constant_to_var(
+        abstract_utils.AsReturnValue(ret_type), {}, node
+    )
 
   def property_get(
       self, callself: cfg.Variable, is_class=False
@@ -246,6 +301,10 @@ class PyTDFunction(_function_base.Function):
       args: function.Args,
       alias_map: datatypes.UnionFind | None = None,
   ) -> tuple[cfg.CFGNode, cfg.Variable]:
+    if self._summary:
+      ret = self._call_with_summary(node, args)
+      if ret is not None:
+        return node, ret
     # TODO(b/159052609): We should be passing function signatures to simplify.
     if len(self.signatures) == 1:
       args = args.simplify(node, self.ctx, self.signatures[0].signature)
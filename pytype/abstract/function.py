@@ -1106,6 +1106,8 @@ def call_function(
     if not result.bindings:
       v = ctx.convert.never if has_never else ctx.convert.unsolvable
       result.AddBinding(v, [], node)
+    elif ctx.widening:
+      result = ctx.widening.widen(ctx.program, node, result)
   elif isinstance(error, error_types.FailedFunctionCall) and all(
       func.name.endswith(".__init__") for func in func_var.data
   ):
@@ -1223,7 +1225,9 @@ def has_visible_namedarg(
   namedargs = {args.namedargs[name] for name in names}
   variables = [v for v in args.get_variables() if v not in namedargs]
   for name in names:
-    for view in cfg_utils.variable_product(variables + [args.namedargs[name]]):
+    for view in cfg_utils.variable_product(
+        variables + [args.namedargs[name]], node=node
+    ):
       if node.HasCombination(list(view)):
         return True
   return False
@@ -20,12 +20,53 @@ MAXIMUM_DEPTH = 3  # during non-quick analysis
 QUICK_CHECK_MAXIMUM_DEPTH = 2  # during quick checking
 QUICK_INFER_MAXIMUM_DEPTH = 1  # during quick inference
 
+# cfg.ProgramCounters fields sampled at each snapshot point.
+_TYPEGRAPH_COUNTERS = (
+    "cfg_node_count",
+    "variable_count",
+    "binding_count",
+    "origin_count",
+    "solver_count",
+    "query_count",
+    "state_cache_hits",
+    "state_cache_misses",
+    "state_cache_size",
+    "path_cache_size",
+)
+
 
 @dataclasses.dataclass
 class Analysis:
   context: context.Context
   ast: pytd.TypeDeclUnit | None
   ast_deps: pytd.TypeDeclUnit | None
+  function_summaries: tuple[pytd.Function, ...] = ()
+
+
+def _take_snapshot(where, program):
+  """Takes a memory snapshot and samples the typegraph's counters.
+
+  Each counter is a metrics.MapCounter named typegraph_<field>, keyed by the
+  snapshot point, so that merged metrics files add up across modules.
+
+  Args:
+    where: The name of the snapshot point.
+    program: The cfg.Program being analyzed.
+  """
+  metrics.get_metric("memory", metrics.Snapshot).take_snapshot(where)
+  if not metrics.is_enabled():
+    return
+  counters = program.calculate_counters()
+  for field in _TYPEGRAPH_COUNTERS:
+    counter = metrics.get_metric(f"typegraph_{field}", metrics.MapCounter)
+    counter.inc(where, getattr(counters, field))
+
+
+def _make_context(src, options, loader, ctx):
+  if ctx:
+    ctx.prepare_for_file(options, src)
+    return ctx
+  return context.Context(options, loader, src=src)
 
 
 def check_types(
@@ -34,19 +75,25 @@ def check_types(
     loader,
     init_maximum_depth=INIT_MAXIMUM_DEPTH,
     maximum_depth=None,
+    ctx=None,
 ):
   """Verify the Python code."""
-  ctx = context.Context(options, loader, src=src)
+  ctx = _make_context(src, options, loader, ctx)
   loc, defs = ctx.vm.run_program(src, options.input, init_maximum_depth)
-  snapshotter = metrics.get_metric("memory", metrics.Snapshot)
-  snapshotter.take_snapshot("analyze:check_types:tracer")
+  _take_snapshot("analyze:check_types:tracer", ctx.program)
   if maximum_depth is None:
     maximum_depth = (
         QUICK_CHECK_MAXIMUM_DEPTH if options.quick else MAXIMUM_DEPTH
     )
-  ctx.vm.analyze(loc, defs, maximum_depth=maximum_depth)
-  snapshotter.take_snapshot("analyze:check_types:post")
+  ctx.vm.analyze(
+      loc,
+      defs,
+      maximum_depth=maximum_depth,
+      num_workers=options.analyze_workers,
+  )
+  _take_snapshot("analyze:check_types:post", ctx.program)
   _maybe_output_debug(options, ctx.program)
+  _maybe_output_solver_profile(options, ctx)
   return Analysis(ctx, None, None)
 
 
@@ -56,6 +103,7 @@ def infer_types(
     loader,
     init_maximum_depth=INIT_MAXIMUM_DEPTH,
     maximum_depth=None,
+    ctx=None,
 ):
   """Given Python source return its types.
 
@@ -65,17 +113,18 @@ def infer_types(
     loader: A load_pytd.Loader instance to load PYI information.
     init_maximum_depth: Depth of analysis during module loading.
     maximum_depth: Depth of the analysis. Default: unlimited.
+    ctx: Optionally, a context.Context that hasn't analyzed anything yet, to
+      reuse instead of creating a new one.
 
   Returns:
     A tuple of (ast: TypeDeclUnit, builtins: TypeDeclUnit)
   Raises:
     AssertionError: In case of a bad parameter combination.
   """
-  ctx = context.Context(options, loader, src=src)
+  ctx = _make_context(src, options, loader, ctx)
   loc, defs = ctx.vm.run_program(src, options.input, init_maximum_depth)
   log.info("===Done running definitions and module-level code===")
-  snapshotter = metrics.get_metric("memory", metrics.Snapshot)
-  snapshotter.take_snapshot("analyze:infer_types:tracer")
+  _take_snapshot("analyze:infer_types:tracer", ctx.program)
   if maximum_depth is None:
     if not options.quick:
       maximum_depth = MAXIMUM_DEPTH
@@ -86,8 +135,12 @@ def infer_types(
     else:
       maximum_depth = QUICK_INFER_MAXIMUM_DEPTH
   ctx.exitpoint = ctx.vm.analyze(loc, defs, maximum_depth)
-  snapshotter.take_snapshot("analyze:infer_types:post")
+  _take_snapshot("analyze:infer_types:post", ctx.program)
   ast = ctx.vm.compute_types(defs)
+  if options.function_summaries:
+    function_summaries = ctx.vm.pytd_functions_for_summaries(defs)
+  else:
+    function_summaries = ()
   ast = ctx.loader.resolve_ast(ast)
   if ctx.vm.has_unknown_wildcard_imports or any(
       a in defs for a in abstract_utils.DYNAMIC_ATTRIBUTE_MARKERS
@@ -115,7 +168,15 @@ def infer_types(
     # Remove "~list" etc.:
     ast = convert_structural.extract_local(ast)
   _maybe_output_debug(options, ctx.program)
-  return Analysis(ctx, ast, deps_pytd)
+  _maybe_output_solver_profile(options, ctx)
+  return Analysis(ctx, ast, deps_pytd, function_summaries)
+
+
+def _maybe_output_solver_profile(options, ctx):
+  """Maybe write the per-line solver profile."""
+  if options.solver_profile:
+    with options.open_function(options.solver_profile, "w") as fi:
+      fi.write(ctx.vm.solver_profiler.report())
 
 
 def _maybe_output_debug(options, program):
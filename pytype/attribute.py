@@ -1,9 +1,11 @@
 """Abstract attribute handling."""
 
+import dataclasses
 import logging
 from typing import Optional
 
 from pytype import datatypes
+from pytype import metrics
 from pytype import utils
 from pytype.abstract import abstract
 from pytype.abstract import abstract_utils
@@ -18,10 +20,57 @@ log = logging.getLogger(__name__)
 
 _NodeAndMaybeVarType = tuple[cfg.CFGNode, Optional[cfg.Variable]]
 
+_mro_lookup_cache_hits = metrics.MapCounter("mro_lookup_cache_hits")
+_mro_lookup_cache_misses = metrics.MapCounter("mro_lookup_cache_misses")
+
+
+def _get_names_changestamp(cls):
+  """Changes whenever a name may be added to the members of cls."""
+  # MonitorDict doesn't support deleting members, so a class can only gain a
+  # name by growing its members or its annotations.
+  annotations_dict = abstract_utils.get_annotations_dict(cls.members)
+  num_annotations = (
+      len(annotations_dict.annotated_locals) if annotations_dict else 0
+  )
+  return (len(cls.members), num_annotations)
+
+
+def _may_define(base, name):
+  """Whether _lookup_from_mro_flat may find name on base."""
+  if not isinstance(base, abstract.Class) or isinstance(base, mixin.HasSlots):
+    # Special attributes and unknown classes may have any name.
+    return True
+  if name in base or name in base.members:
+    return True
+  annotations_dict = abstract_utils.get_annotations_dict(base.members)
+  return bool(annotations_dict) and name in annotations_dict.annotated_locals
+
+
+@dataclasses.dataclass
+class _MroLookup:
+  """Where in a class's MRO the lookup of a name starts.
+
+  Attributes:
+    cls: The class, kept alive so that its id isn't reused.
+    class_mro: The MRO the lookup was computed from.
+    start: The index of the first class in the MRO that may define the name.
+    changestamps: The names changestamps of the classes before `start`.
+  """
+
+  cls: abstract.Class
+  class_mro: tuple[abstract.BaseValue, ...]
+  start: int
+  changestamps: list[tuple[int, int]]
+
 
 class AbstractAttributeHandler(utils.ContextWeakrefMixin):
   """Handler for abstract attributes."""
 
+  def __init__(self, ctx):
+    super().__init__(ctx)
+    # Map from (id(cls), name) to an _MroLookup.
+    self._mro_lookup_cache = {}
+
   def get_attribute(self, node, obj, name, valself=None):
     """Get the named attribute from the given object.
 
@@ -549,7 +598,9 @@ class AbstractAttributeHandler(utils.ContextWeakrefMixin):
       return self.ctx.new_unsolvable(node)
     ret = self.ctx.program.NewVariable()
     add_origins = [valself] if valself else []
-    for base in cls.mro:
+    mro = cls.mro
+    start = self._get_mro_lookup_start(cls, name)
+    for base in mro[start:] if start else mro:
       var = self._lookup_from_mro_flat(node, base, name, valself, skip)
       if var is None:
         continue
@@ -588,6 +639,43 @@ class AbstractAttributeHandler(utils.ContextWeakrefMixin):
       break  # we found a class which has this attribute
     return ret
 
+  def _get_mro_lookup_start(self, cls, name):
+    """Gets the index of the first class in cls.mro that may define name.
+
+    The classes before it don't define name at any node, so
+    _lookup_from_mro can skip them. The index is cached per class and name and
+    recomputed when one of the skipped classes gains new members.
+
+    Args:
+      cls: The class.
+      name: The name of the attribute.
+
+    Returns:
+      An index into cls.mro.
+    """
+    if name.startswith("__") and name.endswith("__"):
+      # Many special attributes don't show up in the members of a class.
+      return 0
+    key = (id(cls), name)
+    entry = self._mro_lookup_cache.get(key)
+    if (
+        entry is not None
+        and entry.class_mro is cls.mro
+        and entry.changestamps
+        == [_get_names_changestamp(c) for c in cls.mro[: entry.start]]
+    ):
+      _mro_lookup_cache_hits.inc(name)
+      return entry.start
+    _mro_lookup_cache_misses.inc(name)
+    mro = cls.mro
+    start = 0
+    while start < len(mro) and not _may_define(mro[start], name):
+      start += 1
+    self._mro_lookup_cache[key] = _MroLookup(
+        cls, mro, start, [_get_names_changestamp(c) for c in mro[:start]]
+    )
+    return start
+
   def _get_attribute_flat(self, node, cls, name, valself):
     """Flat attribute retrieval (no mro lookup)."""
     if isinstance(cls, abstract.ParameterizedClass):
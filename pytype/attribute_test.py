@@ -1,5 +1,6 @@
 """Tests for attribute.py."""
 
+from pytype import attribute
 from pytype import config
 from pytype.abstract import abstract
 from pytype.abstract import abstract_utils
@@ -202,5 +203,76 @@ class AttributeTest(test_base.UnitTest):
     self.assertEqual(error.name, "not-writable")
 
 
+class MroLookupCacheTest(test_base.UnitTest, test_utils.MetricsTestMixin):
+  """Test the MRO lookup cache of AbstractAttributeHandler."""
+
+  def setUp(self):
+    super().setUp()
+    options = config.Options.create(python_version=self.python_version)
+    self._ctx = test_utils.make_context(options)
+    self._node = self._ctx.root_node
+    # pylint: disable=protected-access
+    self._hits = attribute._mro_lookup_cache_hits
+    self._misses = attribute._mro_lookup_cache_misses
+    # pylint: enable=protected-access
+    self.enable_metrics(self._hits, self._misses)
+
+  def _counts(self, name):
+    return self.get_count(self._hits, name), self.get_count(self._misses, name)
+
+  def _make_class(self, name, bases, members):
+    return abstract.InterpreterClass(
+        name,
+        [b.to_variable(self._node) for b in bases],
+        {k: v.to_variable(self._node) for k, v in members.items()},
+        None,
+        None,
+        (),
+        self._ctx,
+    )
+
+  def _get_attribute(self, cls, name):
+    _, var = self._ctx.attribute_handler.get_attribute(self._node, cls, name)
+    return var.data if var else None
+
+  def test_inherited_attribute(self):
+    int_instance = self._ctx.convert.primitive_instances[int]
+    base = self._make_class("Base", [], {"x": int_instance})
+    child = self._make_class("Child", [base], {})
+    for _ in range(2):
+      self.assertEqual(self._get_attribute(child, "x"), [int_instance])
+    self.assertEqual(self._counts("x"), (1, 1))
+
+  def test_missing_attribute(self):
+    cls = self._make_class("Foo", [], {})
+    for _ in range(2):
+      self.assertIsNone(self._get_attribute(cls, "rumpelstiltskin"))
+    self.assertEqual(self._counts("rumpelstiltskin"), (1, 1))
+
+  def test_new_member(self):
+    int_instance = self._ctx.convert.primitive_instances[int]
+    str_instance = self._ctx.convert.primitive_instances[str]
+    base = self._make_class("Base", [], {"x": int_instance})
+    child = self._make_class("Child", [base], {})
+    self.assertEqual(self._get_attribute(child, "x"), [int_instance])
+    child.members["x"] = str_instance.to_variable(self._node)
+    self.assertEqual(self._get_attribute(child, "x"), [str_instance])
+    self.assertEqual(self._counts("x"), (0, 2))
+
+  def test_pytd_class_attribute(self):
+    # bool inherits bit_length from int.
+    bool_type = self._ctx.convert.bool_type
+    for _ in range(2):
+      (bit_length,) = self._get_attribute(bool_type, "bit_length")
+      self.assertIsInstance(bit_length, abstract.PyTDFunction)
+    self.assertEqual(self._counts("bit_length"), (1, 1))
+
+  def test_special_attribute(self):
+    list_type = self._ctx.convert.list_type
+    for _ in range(2):
+      self.assertIsNotNone(self._get_attribute(list_type, "__len__"))
+    self.assertEqual(self._counts("__len__"), (0, 0))
+
+
 if __name__ == "__main__":
   unittest.main()
@@ -304,6 +304,19 @@ FEATURE_FLAGS = [
 
 
 EXPERIMENTAL_FLAGS = [
+    _flag(
+        "--abstract-call-keys",
+        False,
+        "Reuse the results of calls whose arguments are instances of the same "
+        "types, for functions that can't tell such arguments apart.",
+    ),
+    _flag(
+        "--function-summaries",
+        False,
+        "Save the argument and return types of calls to module-level "
+        "functions in pickled output, and use them when calling the functions "
+        "from other modules.",
+    ),
     _flag(
         "--precise-return",
         False,
@@ -334,6 +347,50 @@ EXPERIMENTAL_FLAGS = [
         False,
         "Check that variables are defined in all possible code paths.",
     ),
+    _Arg(
+        "--analyze-workers",
+        type=int,
+        action="store",
+        dest="analyze_workers",
+        default=None,
+        help=(
+            "When checking, analyze top-level functions and classes in this "
+            "many forked processes."
+        ),
+    ),
+    _Arg(
+        "--function-budget",
+        type=int,
+        action="store",
+        dest="function_budget",
+        default=None,
+        help=(
+            "Stop analyzing function calls that run more than this many "
+            "opcodes, including nested calls, and treat them as returning Any."
+        ),
+    ),
+    _Arg(
+        "--widen-variables",
+        type=int,
+        action="store",
+        dest="widen_variables",
+        default=None,
+        help=(
+            "Merge the bindings of instances with the same type and attribute "
+            "types in joined variables with more than this many bindings."
+        ),
+    ),
+    _Arg(
+        "--optimize-budget",
+        type=float,
+        action="store",
+        dest="optimize_budget",
+        default=None,
+        help=(
+            "Spend at most this many seconds of CPU time simplifying the "
+            "inferred pyi. Simplifications are cut short once it is used up."
+        ),
+    ),
     _Arg(
         "-R",
         "--use-rewrite",
@@ -593,6 +650,17 @@ DEBUG_OPTIONS = [
         default=None,
         help="Profile pytype and output the stats to the specified file.",
     ),
+    _Arg(
+        "--solver-profile",
+        type=str,
+        action="store",
+        dest="solver_profile",
+        default=None,
+        help=(
+            "Write a report of solver cost per source line to the specified "
+            "file."
+        ),
+    ),
     _Arg(
         "-v",
         "--verbosity",
@@ -24,6 +24,27 @@ from pytype.typegraph import cfg_utils
 log = logging.getLogger(__name__)
 
 
+def _widening_key(data, seen=None):
+  """Key under which cfg_utils.WideningPolicy merges data."""
+  # Only instances are merged by type. Values like functions and classes all
+  # share a default type key, so merging them would lose too much.
+  if not isinstance(data, abstract.Instance):
+    return data
+  if seen is None:
+    seen = set()
+  elif data in seen:
+    return data  # a cycle: don't merge
+  # Only one of the merged instances is kept, so instances whose attributes
+  # have different values must have different keys.
+  seen.add(data)
+  members = frozenset(
+      (name, frozenset(_widening_key(v, seen) for v in var.data))
+      for name, var in data.members.items()
+  )
+  seen.discard(data)
+  return data.get_type_key(), members
+
+
 class Context:
   """An abstract context."""
 
@@ -57,6 +78,11 @@ class Context:
     self.program.default_data = self.convert.unsolvable
 
     # Other context
+    self.widening: cfg_utils.WideningPolicy | None = (
+        cfg_utils.WideningPolicy(options.widen_variables, _widening_key)
+        if options.widen_variables
+        else None
+    )
     self.callself_stack: list[cfg.Variable] = []
     # Map from builtin names to canonical objects.
     self.special_builtins: dict[str, abstract.BaseValue] = {
@@ -106,6 +132,26 @@ class Context:
     # There isn't a more appropriate place to put it while ensuring that the
     # cache doesn't persist between runs.
     self.function_cache = {}
+    # Cache used by AbstractMatcher.match_from_mro.
+    self.mro_match_cache = {}
+    self.protocol_index = matcher.ProtocolIndex()
+
+  def prepare_for_file(self, options: config.Options, src: str):
+    """Points a context that hasn't analyzed anything yet at another file.
+
+    This is used by fork_server, which builds a single context up front and
+    analyzes each file in a forked copy of it.
+
+    Args:
+      options: The options of the file. They may only differ from the options
+        this context was created with in settings that are specific to a file,
+        like the input and output paths and whether to check or infer.
+      src: The source code of the file.
+    """
+    self.options = options
+    self.generate_unknowns = not options.check and options.protocols
+    self.loader.options = options
+    self.errorlog = errors.VmErrorLog(pretty_printer.PrettyPrinter(self), src)
 
   def matcher(self, node):
     return matcher.AbstractMatcher(node, self)
@@ -143,7 +189,9 @@ class Context:
     return node.ConnectNew(new_node_name, condition)
 
   def join_variables(self, node, variables):
-    return cfg_utils.merge_variables(self.program, node, variables)
+    return cfg_utils.merge_variables(
+        self.program, node, variables, self.widening
+    )
 
   def join_bindings(self, node, bindings):
     return cfg_utils.merge_bindings(self.program, node, bindings)
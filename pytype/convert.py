@@ -1050,6 +1050,10 @@ class Converter(utils.ContextWeakrefMixin):
     elif isinstance(pyval, pytd.Function):
       f = self.convert_pytd_function(pyval)
       f.is_abstract = pyval.is_abstract
+      if self.ctx.options.function_summaries:
+        summary = self.ctx.loader.get_function_summary(pyval.name)
+        if summary:
+          f.set_summary(summary)
       return f
     elif isinstance(pyval, pytd.ClassType):
       if pyval.cls:
@@ -388,6 +388,99 @@ class AliasingMonitorDict(AliasingDict[_K, _V], MonitorDict[_K, _V]):
   """The dictionary that supports aliasing, lazy dict and monitor."""
 
 
+class PersistentStack:
+  """An immutable stack that shares structure with the stacks it came from.
+
+  Each stack is a node holding its top value and the stack below it, so
+  pushing or popping k values costs O(k) regardless of the depth of the stack,
+  where slicing a tuple would copy all of it. Reads mimic a tuple ordered
+  bottom-to-top: len(), s[-1], iteration and equality with tuples all work.
+  """
+
+  __slots__ = ("_top", "_below", "_size")
+
+  def __init__(self, values=()):
+    """Creates a stack holding values, ordered bottom-to-top."""
+    self._top = None
+    self._below = None
+    self._size = 0
+    if values:
+      s = self.push(*values)
+      self._top, self._below, self._size = s._top, s._below, s._size
+
+  @classmethod
+  def _make(cls, top, below, size):
+    s = object.__new__(cls)
+    s._top = top
+    s._below = below
+    s._size = size
+    return s
+
+  def push(self, *values):
+    s = self
+    for value in values:
+      s = self._make(value, s, s._size + 1)
+    return s
+
+  def top(self):
+    if not self._size:
+      raise IndexError("Trying to read the top of an empty stack")
+    return self._top
+
+  def pop(self):
+    """Returns (stack without the top value, top value)."""
+    if not self._size:
+      raise IndexError("Trying to pop from an empty stack")
+    return self._below, self._top
+
+  def popn(self, n):
+    """Returns (stack without the top n values, values oldest-to-newest)."""
+    if n > self._size:
+      raise IndexError(
+          "Trying to pop %d values from stack of size %d" % (n, self._size)
+      )
+    values = [None] * n
+    s = self
+    for i in range(n - 1, -1, -1):
+      values[i] = s._top
+      s = s._below
+    return s, tuple(values)
+
+  def _node(self, index):
+    """Returns the stack whose top is self[index]."""
+    depth = -index - 1 if index < 0 else self._size - index - 1
+    if not 0 <= depth < self._size:
+      raise IndexError("stack index out of range")
+    s = self
+    for _ in range(depth):
+      s = s._below
+    return s
+
+  def __getitem__(self, index):
+    if isinstance(index, slice):
+      return tuple(self)[index]
+    return self._node(index)._top
+
+  def __len__(self):
+    return self._size
+
+  def __iter__(self):
+    return iter(self.popn(self._size)[1])
+
+  def __eq__(self, other):
+    if self is other:
+      return True
+    if isinstance(other, (PersistentStack, tuple)):
+      return len(self) == len(other) and tuple(self) == tuple(other)
+    return NotImplemented
+
+  def __hash__(self):
+    return hash(tuple(self))
+
+  def __repr__(self):
+    return f"{self.__class__.__name__}({tuple(self)!r})"
+
+
 class Box:
   """A mutable shared value."""
 
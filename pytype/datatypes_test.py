@@ -326,6 +326,51 @@ class DatatypesTest(unittest.TestCase):
       d1.merge_from(d3, merge_value)
 
 
+class PersistentStackTest(unittest.TestCase):
+  """Test PersistentStack."""
+
+  def test_push_pop(self):
+    s0 = datatypes.PersistentStack()
+    s1 = s0.push(1, 2, 3)
+    self.assertEqual(s1, (1, 2, 3))
+    self.assertEqual(len(s1), 3)
+    s2, value = s1.pop()
+    self.assertEqual(value, 3)
+    self.assertEqual(s2, (1, 2))
+    s3, values = s1.popn(2)
+    self.assertEqual(values, (2, 3))
+    self.assertEqual(s3, (1,))
+    # Stacks are immutable.
+    self.assertEqual(s0, ())
+    self.assertEqual(s1, (1, 2, 3))
+    self.assertRaises(IndexError, s0.pop)
+    self.assertRaises(IndexError, s1.popn, 4)
+    self.assertRaises(IndexError, s0.top)
+
+  def test_sharing(self):
+    base = datatypes.PersistentStack(range(1000))
+    s1 = base.push("a")
+    s2 = base.push("b")
+    self.assertIs(s1.pop()[0], base)
+    self.assertIs(s2.pop()[0], base)
+    self.assertEqual(s1[-1], "a")
+    self.assertEqual(s2[-2], 999)
+
+  def test_tuple_like(self):
+    s = datatypes.PersistentStack((1, 2, 3))
+    self.assertEqual(list(s), [1, 2, 3])
+    self.assertEqual(s[0], 1)
+    self.assertEqual(s[-1], 3)
+    self.assertEqual(s[-2:], (2, 3))
+    self.assertRaises(IndexError, lambda: s[3])
+    self.assertRaises(IndexError, lambda: s[-4])
+    self.assertTrue(s)
+    self.assertFalse(datatypes.PersistentStack())
+    self.assertEqual(s, datatypes.PersistentStack([1, 2, 3]))
+    self.assertNotEqual(s, (1, 2))
+    self.assertEqual(hash(s), hash((1, 2, 3)))
+
+
 class ParserWrapperTest(unittest.TestCase):
   """Test parser wrapper."""
 
@@ -247,6 +247,13 @@ class Error:
     self._bad_call = bad_call
     self._opcode_name = opcode_name
 
+  def __getstate__(self):
+    # bad_call holds abstract values, which can't be pickled. It's only used to
+    # generate the details, so pickled errors do without it.
+    state = self.__dict__.copy()
+    state["_bad_call"] = None
+    return state
+
   @classmethod
   def with_stack(cls, stack, severity, message, **kwargs):
     """Return an error using a stack for position information.
@@ -508,6 +515,10 @@ class ErrorLog:
   def __getitem__(self, index):
     return self._errors[index]
 
+  def extend(self, errors):
+    """Adds errors that have already been through this log's error filter."""
+    self._errors.extend(errors)
+
   def copy_from(self, errors, stack):
     for e in errors:
       with _CURRENT_ERROR_NAME.bind(e.name):
@@ -1169,6 +1180,24 @@ class VmErrorLog(ErrorLog):
         )
     )
 
+  @_error_name("analysis-budget-exceeded")
+  def analysis_budget_exceeded(self, stack, name, cost, budget):
+    details = (
+        f"Analyzing a call of {name} ran {cost} opcodes, more than the budget "
+        f"of {budget} set by --function-budget. The call is treated as "
+        "returning its annotated return type, or Any if there is none."
+    )
+    self._add(
+        Error.with_stack(
+            stack,
+            SEVERITY_WARNING,
+            f"Analysis of {name} stopped: budget exceeded",
+            details=details,
+            keyword=name,
+            src=self._src,
+        )
+    )
+
   @_error_name("recursion-error")
   def recursion_error(self, stack, name):
     self.error(stack, f"Detected recursion in {name}", keyword=name)
@@ -0,0 +1,128 @@
+"""Analyze many files from one fully initialized context.
+
+Usage: python -m pytype.fork_server [flags]
+
+Creating a context.Context loads builtins and typing, converts them to abstract
+values and sets up the VM, matcher and attribute handlers, all before the first
+opcode of a file runs. A ForkServer does this once, then analyzes each file in
+a forked child process, which gets a copy-on-write copy of the initialized
+context instead of rebuilding it.
+
+When run as a script, the flags are the ones shared by all files (e.g.,
+--pythonpath, --imports_info, --python_version), and each line read from stdin
+holds the command line of one pytype-single invocation. The exit status of each
+file is written to stdout, one per line.
+"""
+
+import shlex
+import sys
+from typing import Any
+
+from pytype import config
+from pytype import context
+from pytype import fork_utils
+from pytype import io
+from pytype import load_pytd
+from pytype import utils
+
+# Options that may differ between the files analyzed by one server.
+_PER_FILE_OPTIONS = frozenset({
+    "analyze_annotated",
+    "check",
+    "input",
+    "module_name",
+    "output",
+    "touch",
+    "unused_imports_info_files",
+    "verify_pickle",
+})
+
+# Builtins that most files use, converted before forking so that children find
+# them in the converter's cache.
+_PRECONVERTED_BUILTINS = (
+    "BaseException",
+    "Exception",
+    "KeyError",
+    "TypeError",
+    "ValueError",
+    "enumerate",
+    "getattr",
+    "len",
+    "map",
+    "print",
+    "range",
+    "sorted",
+    "zip",
+)
+
+
+def _options_key(options: config.Options) -> dict[str, Any]:
+  return {
+      k: v for k, v in vars(options).items() if k not in _PER_FILE_OPTIONS
+  }
+
+
+class ForkServer:
+  """Analyzes files in forked copies of a single initialized context."""
+
+  def __init__(self, options: config.Options):
+    if options.use_rewrite:
+      raise utils.UsageError("The fork server does not support --use-rewrite")
+    self._options = options
+    self._options_key = _options_key(options)
+    self._ctx = context.Context(
+        options, load_pytd.create_loader(options), src=""
+    )
+    for name in _PRECONVERTED_BUILTINS:
+      self._ctx.convert.lookup_value("builtins", name)
+    self._ctx.vm.import_module("typing", "typing", 0)
+
+  def process(self, options: config.Options) -> int:
+    """Checks a file or generates a .pyi for it, in a forked child.
+
+    Args:
+      options: The options of the file. They may only differ from the options
+        the server was created with in settings specific to a file, like the
+        input and output paths.
+
+    Returns:
+      An error code (0 means no error). A child that crashed counts as an
+      error.
+
+    Raises:
+      UsageError: If the options are incompatible with the server's.
+    """
+    if _options_key(options) != self._options_key:
+      raise utils.UsageError(
+          f"Options for {options.input} differ from the fork server's in more "
+          "than the input and output files and whether to check or infer"
+      )
+    if not fork_utils.can_fork():
+      # Without fork, there is no way to share the context between files.
+      return io.process_one_file(options)
+    (ret,) = fork_utils.fork_map(io.process_one_file, [(options, self._ctx)])
+    return 1 if ret is None else ret
+
+
+def main():
+  try:
+    options = config.Options(sys.argv[1:] + ["-"], command_line=True)
+    server = ForkServer(options)
+  except utils.UsageError as e:
+    print(str(e), file=sys.stderr)
+    sys.exit(1)
+  for line in sys.stdin:
+    if not line.strip():
+      continue
+    try:
+      ret = server.process(
+          config.Options(shlex.split(line), command_line=True)
+      )
+    except utils.UsageError as e:
+      print(str(e), file=sys.stderr)
+      ret = 1
+    print(ret, flush=True)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,62 @@
+"""Tests for fork_server.py."""
+
+import sys
+import textwrap
+
+from pytype import config
+from pytype import fork_server
+from pytype import fork_utils
+from pytype import utils
+from pytype.platform_utils import path_utils
+from pytype.tests import test_utils
+
+import unittest
+
+
+@unittest.skipUnless(fork_utils.can_fork(), "requires os.fork")
+class ForkServerTest(unittest.TestCase):
+
+  @classmethod
+  def setUpClass(cls):
+    super().setUpClass()
+    cls.server = fork_server.ForkServer(
+        config.Options.create(python_version=sys.version_info[:2])
+    )
+
+  def _options(self, d, src, **kwargs):
+    path = d.create_file("foo.py", textwrap.dedent(src))
+    return config.Options.create(
+        path, python_version=sys.version_info[:2], **kwargs
+    )
+
+  def test_infer(self):
+    with test_utils.Tempdir() as d:
+      pyi = path_utils.join(d.path, "foo.pyi")
+      options = self._options(d, "x = len([])", output=pyi, check=False)
+      self.assertEqual(self.server.process(options), 0)
+      with open(pyi) as f:
+        self.assertEqual(f.read(), "x: int\n")
+
+  def test_check(self):
+    with test_utils.Tempdir() as d:
+      options = self._options(d, "x = undefined_var", check=True)
+      self.assertEqual(self.server.process(options), 1)
+
+  def test_files_are_independent(self):
+    with test_utils.Tempdir() as d:
+      pyi = path_utils.join(d.path, "foo.pyi")
+      options = self._options(d, "x = 0", output=pyi, check=False)
+      self.assertEqual(self.server.process(options), 0)
+      # The second file doesn't see the definitions of the first.
+      options = self._options(d, "y = x", check=True)
+      self.assertEqual(self.server.process(options), 1)
+
+  def test_incompatible_options(self):
+    with test_utils.Tempdir() as d:
+      options = self._options(d, "x = 0", check=True, strict_import=True)
+      with self.assertRaises(utils.UsageError):
+        self.server.process(options)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,65 @@
+"""Utilities for running work in forked child processes.
+
+Forked children start with a copy-on-write copy of the parent's memory, so they
+can pick up the analysis state of the parent without having to serialize it.
+Only the results travel back to the parent, pickled.
+"""
+
+import logging
+import os
+import pickle
+from typing import Any, Callable, Sequence
+
+log = logging.getLogger(__name__)
+
+
+def can_fork() -> bool:
+  return hasattr(os, "fork")
+
+
+def fork_map(
+    fn: Callable[..., Any], args_list: Sequence[tuple[Any, ...]]
+) -> list[Any]:
+  """Calls fn(*args) for every args in args_list, each in a forked child.
+
+  The children run concurrently. Results are returned in the order of
+  args_list. The result of a child that raised an exception, or whose result
+  could not be pickled, is None.
+
+  Args:
+    fn: The function to call.
+    args_list: The arguments of each call.
+
+  Returns:
+    The list of results.
+  """
+  children = []
+  for args in args_list:
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if not pid:
+      os.close(read_fd)
+      status = 1
+      try:
+        data = pickle.dumps(fn(*args), protocol=pickle.HIGHEST_PROTOCOL)
+        with os.fdopen(write_fd, "wb") as f:
+          f.write(data)
+        status = 0
+      except BaseException:  # pylint: disable=broad-except
+        log.exception("Forked child %d failed", os.getpid())
+      finally:
+        # Skip the parent's cleanup handlers, which aren't ours to run.
+        os._exit(status)  # pylint: disable=protected-access
+    os.close(write_fd)
+    children.append((pid, read_fd))
+  results = []
+  for pid, read_fd in children:
+    with os.fdopen(read_fd, "rb") as f:
+      data = f.read()
+    _, status = os.waitpid(pid, 0)
+    if status or not data:
+      log.error("Forked child %d exited with status %d", pid, status)
+      results.append(None)
+    else:
+      results.append(pickle.loads(data))
+  return results
@@ -0,0 +1,40 @@
+"""Tests for fork_utils.py."""
+
+import os
+
+from pytype import fork_utils
+
+import unittest
+
+
+def _square(x):
+  return x * x
+
+
+def _fail(x):
+  raise ValueError(x)
+
+
+@unittest.skipUnless(fork_utils.can_fork(), "requires os.fork")
+class ForkMapTest(unittest.TestCase):
+
+  def test_results_in_order(self):
+    self.assertEqual(
+        fork_utils.fork_map(_square, [(i,) for i in range(5)]), [0, 1, 4, 9, 16]
+    )
+
+  def test_runs_in_child(self):
+    (pid,) = fork_utils.fork_map(os.getpid, [()])
+    self.assertNotEqual(pid, os.getpid())
+
+  def test_failure(self):
+    self.assertEqual(fork_utils.fork_map(_fail, [(1,)]), [None])
+    # Unpicklable results count as failures.
+    self.assertEqual(fork_utils.fork_map(lambda: lambda: 0, [()]), [None])
+
+  def test_empty(self):
+    self.assertEqual(fork_utils.fork_map(_square, []), [])
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -149,9 +149,12 @@ def Save(
 
 
 def Serialize(
-    ast: pytd.TypeDeclUnit, src_path: str | None = None, metadata=None
+    ast: pytd.TypeDeclUnit,
+    src_path: str | None = None,
+    metadata=None,
+    function_summaries: pytd.TypeDeclUnit | None = None,
 ) -> bytes:
-  out = serialize_ast.SerializeAst(ast, src_path, metadata)
+  out = serialize_ast.SerializeAst(ast, src_path, metadata, function_summaries)
   return Encode(out)
 
 
@@ -163,8 +166,9 @@ def SerializeAndSave(
     open_function=open,
     src_path: str | None = None,
     metadata=None,
+    function_summaries: pytd.TypeDeclUnit | None = None,
 ) -> None:
-  out = serialize_ast.SerializeAst(ast, src_path, metadata)
+  out = serialize_ast.SerializeAst(ast, src_path, metadata, function_summaries)
   Save(out, filename, compress, open_function)
 
 
@@ -42,6 +42,7 @@ class AnalysisResult:
   context: context.Context
   ast: pytd.TypeDeclUnit | None
   pyi: str | None
+  function_summaries: tuple[pytd.Function, ...] = ()
 
 
 def read_source_file(input_filename, open_function=open):
@@ -77,13 +78,15 @@ def _set_verbosity_from(posarg):
 
 
 @_set_verbosity_from(posarg=2)
-def _call(analyze_types, src, options, loader):
+def _call(analyze_types, src, options, loader, ctx=None):
   """Helper function to call analyze.check/infer_types."""
+  if ctx:
+    return analyze_types(src=src, options=options, loader=ctx.loader, ctx=ctx)
   loader = loader or load_pytd.create_loader(options)
   return analyze_types(src=src, options=options, loader=loader)
 
 
-def check_py(src, options=None, loader=None):
+def check_py(src, options=None, loader=None, ctx=None):
   """Check the types of a string of source code."""
   options = options or config.Options.create()
   if options.use_rewrite:
@@ -91,13 +94,14 @@ def check_py(src, options=None, loader=None):
   else:
     check_types = analyze.check_types
   with config.verbosity_from(options):
-    return _call(check_types, src, options, loader)
+    return _call(check_types, src, options, loader, ctx)
 
 
 def generate_pyi_ast(
     src: str,
     options: config.Options | None = None,
     loader: load_pytd.Loader | None = None,
+    ctx: context.Context | None = None,
 ) -> analyze.Analysis:
   """Run the inferencer on a string of source code, producing output.
 
@@ -105,6 +109,8 @@ def generate_pyi_ast(
     src: The source code.
     options: config.Options object.
     loader: A load_pytd.Loader instance.
+    ctx: Optionally, a context.Context that hasn't analyzed anything yet, to
+      reuse instead of creating a new one. Overrides loader.
 
   Returns:
     An analyze.Analysis object containing the inferencer results.
@@ -119,7 +125,7 @@ def generate_pyi_ast(
   else:
     infer_types = analyze.infer_types
   with config.verbosity_from(options):
-    ret = _call(infer_types, src, options, loader)
+    ret = _call(infer_types, src, options, loader, ctx)
     mod = ret.ast
     mod.Visit(visitors.VerifyVisitor())
     mod = optimize.Optimize(
@@ -129,6 +135,7 @@ def generate_pyi_ast(
         use_abcs=False,
         max_union=7,
         remove_mutable=False,
+        budget=options.optimize_budget,
     )
     mod = pytd_utils.CanonicalOrdering(mod)
   ret.ast = mod
@@ -161,13 +168,14 @@ def _output_ast(
   return result
 
 
-def generate_pyi(src, options=None, loader=None):
+def generate_pyi(src, options=None, loader=None, ctx=None):
   """Run the inferencer on a string of source code, producing output.
 
   Args:
     src: The source code.
     options: config.Options object.
     loader: A load_pytd.Loader instance.
+    ctx: Optionally, a context.Context to reuse. See generate_pyi_ast.
 
   Returns:
     A tuple, (analyze.Analysis, pyi ast as string).
@@ -177,33 +185,38 @@ def generate_pyi(src, options=None, loader=None):
     UsageError: If the input filepath is invalid.
   """
   options = options or config.Options.create()
-  ret = generate_pyi_ast(src, options, loader)
+  ret = generate_pyi_ast(src, options, loader, ctx)
   return ret, _output_ast(ret.ast, options)
 
 
 @_set_verbosity_from(posarg=0)
-def check_or_generate_pyi(options) -> AnalysisResult:
+def check_or_generate_pyi(options, ctx=None) -> AnalysisResult:
   """Returns results from running pytype.
 
   Args:
     options: config.Options object.
+    ctx: Optionally, a context.Context to reuse. See generate_pyi_ast.
 
   Returns:
     An AnalysisResult.
   """
-  loader = load_pytd.create_loader(options)
+  loader = ctx.loader if ctx else load_pytd.create_loader(options)
   compiler_error = None
   other_error_info = ""
   src = ""
+  function_summaries = ()
   try:
     src = read_source_file(options.input, options.open_function)
     if options.check:
-      ctx = check_py(src=src, options=options, loader=loader).context
+      ctx = check_py(src=src, options=options, loader=loader, ctx=ctx).context
       ast, result = None, None
     else:
-      ret, result = generate_pyi(src=src, options=options, loader=loader)
+      ret, result = generate_pyi(
+          src=src, options=options, loader=loader, ctx=ctx
+      )
       ctx = ret.context
       ast = ret.ast
+      function_summaries = ret.function_summaries
   except utils.UsageError:
     raise
   except pyc.CompileError as e:
@@ -235,7 +248,7 @@ def check_or_generate_pyi(options) -> AnalysisResult:
       e.args = (f"{prefix}\nFile: {options.input}",) + e.args[1:]
       raise
   else:
-    return AnalysisResult(ctx, ast, result)
+    return AnalysisResult(ctx, ast, result, function_summaries)
 
   # check_py/generate_pyi has raised an exception.
   ctx = context.Context(options, loader, src=src)
@@ -259,11 +272,12 @@ def _write_pyi_output(options, contents, filename):
 
 
 @_set_verbosity_from(posarg=0)
-def process_one_file(options):
+def process_one_file(options, ctx=None):
   """Check a .py file or generate a .pyi for it, according to options.
 
   Args:
     options: config.Options object.
+    ctx: Optionally, a context.Context to reuse. See generate_pyi_ast.
 
   Returns:
     An error code (0 means no error).
@@ -271,7 +285,7 @@ def process_one_file(options):
 
   log.info("Process %s => %s", options.input, options.output)
   try:
-    ret = check_or_generate_pyi(options)
+    ret = check_or_generate_pyi(options, ctx)
   except utils.UsageError:
     logging.exception("")
     return 1
@@ -287,7 +301,9 @@ def process_one_file(options):
     # Write out the pickle file.
     if options.pickle_output:
       log.info("write pickle %r => %r", options.input, options.output)
-      write_pickle(ret.ast, options, ret.context.loader)
+      write_pickle(
+          ret.ast, options, ret.context.loader, ret.function_summaries
+      )
 
   if options.unused_imports_info_files:
     if options.use_rewrite:
@@ -319,16 +335,23 @@ def process_one_file(options):
 
 
 @_set_verbosity_from(posarg=1)
-def write_pickle(ast, options, loader=None):
+def write_pickle(ast, options, loader=None, function_summaries=()):
   """Dump a pickle of the ast to a file."""
   loader = loader or load_pytd.create_loader(options)
   try:
+    if function_summaries:
+      function_summaries = serialize_ast.PrepareSummariesForExport(
+          options.module_name, ast, function_summaries, loader
+      )
+    else:
+      function_summaries = None
     ast = serialize_ast.PrepareForExport(options.module_name, ast, loader)
   except parser.ParseError as e:
     if options.nofail:
       ast = serialize_ast.PrepareForExport(
           options.module_name, loader.get_default_ast(), loader
       )
+      function_summaries = None
       log.warning("***Caught exception: %s", str(e), exc_info=True)
     else:
       raise
@@ -344,6 +367,7 @@ def write_pickle(ast, options, loader=None):
       filename=options.output,
       src_path=options.input,
       metadata=options.pickle_metadata,
+      function_summaries=function_summaries,
       open_function=options.open_function,
   )
 
@@ -9,6 +9,7 @@ import traceback
 from pytype import config
 from pytype import file_utils
 from pytype import io
+from pytype import metrics
 from pytype.platform_utils import path_utils
 from pytype.platform_utils import tempfile as compatible_tempfile
 from pytype.pytd import pytd
@@ -85,6 +86,14 @@ class IOTest(unittest.TestCase):
         _, pyi_string = io.generate_pyi(src, options)
     self.assertEqual(pyi_string, f"import {pyi_name}\n\ny: int\n")
 
+  def test_generate_pyi_with_optimize_budget(self):
+    metrics._prepare_for_test()
+    self.addCleanup(metrics._prepare_for_test, enabled=False)
+    options = config.Options.create(optimize_budget=0)
+    _, pyi_string = io.generate_pyi("x = 42", options)
+    self.assertEqual(pyi_string, "x: int\n")
+    self.assertIn("optimize_skipped_passes:", metrics.get_report())
+
   def test_generate_pyi__overload_order(self):
     _, pyi_string = io.generate_pyi(textwrap.dedent("""
       from typing import Any, overload
@@ -121,6 +130,13 @@ class IOTest(unittest.TestCase):
     self.assertIsNotNone(ret.pyi)
     self.assertIsNotNone(ret.ast)
 
+  def test_check_or_generate_pyi__rewrite(self):
+    with self._tmpfile("x = 0") as f:
+      options = config.Options.create(f.name, check=False, use_rewrite=True)
+      ret = io.check_or_generate_pyi(options)
+    self.assertEqual(ret.pyi, "x: int\n")
+    self.assertEqual(ret.function_summaries, ())
+
   def test_check_or_generate_pyi__open_function(self):
     def mock_open(filename, *args, **kwargs):
       if filename == "my_amazing_file.py":
@@ -90,6 +90,8 @@ class Module:
       ast will be None.
     has_unresolved_pointers: Whether all ClassType pointers have been filled in
     metadata: The metadata extracted from the picked file.
+    function_summaries: The function summaries from the pickled file, if any.
+      See serialize_ast.SerializableAst.
   """
 
   # pylint: disable=redefined-outer-name
@@ -101,6 +103,7 @@ class Module:
       metadata=None,
       pickle=None,
       has_unresolved_pointers=True,
+      function_summaries=None,
   ):
     self.module_name = module_name
     self.filename = filename
@@ -108,6 +111,7 @@ class Module:
     self.pickle = pickle
     self.has_unresolved_pointers = has_unresolved_pointers
     self.metadata = metadata or []
+    self.function_summaries = function_summaries
 
   # pylint: enable=redefined-outer-name
 
@@ -424,6 +428,7 @@ class Loader:
     self._resolver = _Resolver(self.builtins)
     self._late_type_loader = _LateTypeLoader(self)
     self._import_name_cache = {}  # performance cache
+    self._resolved_summaries = {}  # module name -> resolved function summaries
     self._aliases = collections.defaultdict(dict)
     self._prefixes = set()
     # Paranoid verification that pytype.main properly checked the flags:
@@ -847,6 +852,31 @@ class Loader:
   def load_late_type(self, late_type: pytd.LateType):
     return self._late_type_loader.load_late_type(late_type)
 
+  def get_function_summary(self, name: str) -> pytd.Function | None:
+    """Gets the summary of a module-level function, if its module has one.
+
+    Summaries are written to pickled files by --function-summaries. See
+    serialize_ast.SerializableAst.
+
+    Args:
+      name: The full name of the function.
+
+    Returns:
+      A pytd.Function with a signature for each recorded combination of
+      argument types, or None.
+    """
+    module_name = name.rpartition(".")[0]
+    if module_name not in self._resolved_summaries:
+      module = self._modules.get(module_name)
+      if module and module.ast and module.function_summaries:
+        summaries = module.function_summaries
+        self._resolve_classtype_pointers(summaries, lookup_ast=module.ast)
+      else:
+        summaries = None
+      self._resolved_summaries[module_name] = summaries
+    summaries = self._resolved_summaries[module_name]
+    return summaries and summaries.Get(name)
+
   def get_unused_imports_map_paths(self) -> set[str]:
     return self._module_loader.get_unused_imports_map_paths()
 
@@ -894,6 +924,7 @@ class PickledPyiLoader(Loader):
         mod_info.filename,
         loaded_ast.ast,
         metadata=loaded_ast.metadata,
+        function_summaries=loaded_ast.function_summaries,
     )
     self._load_ast_dependencies(
         dependencies, lookup_ast=mod_ast, lookup_ast_name=module_name
@@ -8,6 +8,7 @@ import logging
 from typing import Any, cast
 
 from pytype import datatypes
+from pytype import metrics
 from pytype import utils
 from pytype.abstract import abstract
 from pytype.abstract import abstract_utils
@@ -26,6 +27,9 @@ from pytype.types import types
 
 log = logging.getLogger(__name__)
 
+_mro_match_cache_hits = metrics.MapCounter("mro_match_cache_hits")
+_mro_match_cache_misses = metrics.MapCounter("mro_match_cache_misses")
+
 _SubstType = datatypes.AliasingDict[str, cfg.Variable]
 _ViewType = datatypes.AccessTrackingDict[cfg.Variable, cfg.Binding]
 
@@ -187,6 +191,116 @@ class _TypeParams:
     return bool(self._mutually_exclusive[name].intersection(subst))
 
 
+def _get_attributes_changestamp(cls):
+  """Changes whenever the result of cls.get_own_attributes() may change."""
+  if isinstance(cls, abstract.ParameterizedClass):
+    cls = cls.base_cls
+  if isinstance(cls, abstract.InterpreterClass):
+    annotations_dict = abstract_utils.get_annotations_dict(cls.members)
+    num_annotations = (
+        len(annotations_dict.annotated_locals) if annotations_dict else 0
+    )
+    return (cls.members.changestamp, num_annotations)
+  return object()  # never equal to an earlier changestamp
+
+
+def _has_fixed_attributes(cls):
+  if isinstance(cls, abstract.ParameterizedClass):
+    cls = cls.base_cls
+  return isinstance(cls, abstract.PyTDClass)
+
+
+@dataclasses.dataclass
+class _ClassMask:
+  cls: abstract.Class
+  mutable_mro: list[abstract.Class]
+  changestamps: list[Any]
+  mask: int
+
+
+class ProtocolIndex:
+  """Bitsets of attribute names, for quickly finding missing protocol members.
+
+  Every attribute name gets a bit. A protocol is represented by the bits of its
+  protocol attributes, and a class by the bits of the attributes defined
+  anywhere in its MRO, so the protocol attributes that a class is missing are
+  a single bit operation away. A class's bits are recomputed when the members
+  of a class in its MRO change.
+  """
+
+  def __init__(self):
+    self._bits: dict[str, int] = {}
+    self._names: list[str] = []
+    # Keyed by id. The values hold on to the keys, so the ids aren't reused.
+    self._protocol_masks: dict[int, tuple[abstract.Class, int]] = {}
+    self._class_masks: dict[int, _ClassMask] = {}
+
+  def _get_bit(self, name: str) -> int:
+    bit = self._bits.get(name)
+    if bit is None:
+      bit = self._bits[name] = 1 << len(self._names)
+      self._names.append(name)
+    return bit
+
+  def _get_names(self, mask: int) -> set[str]:
+    names = set()
+    while mask:
+      bit = mask & -mask
+      names.add(self._names[bit.bit_length() - 1])
+      mask ^= bit
+    return names
+
+  def _get_protocol_mask(self, protocol: abstract.Class) -> int:
+    key = id(protocol)
+    if key not in self._protocol_masks:
+      mask = 0
+      for name in protocol.protocol_attributes:
+        mask |= self._get_bit(name)
+      self._protocol_masks[key] = (protocol, mask)
+    return self._protocol_masks[key][-1]
+
+  def _get_class_mask(self, cls: abstract.Class) -> int:
+    entry = self._class_masks.get(id(cls))
+    if entry and entry.changestamps == [
+        _get_attributes_changestamp(c) for c in entry.mutable_mro
+    ]:
+      return entry.mask
+    mro = [c for c in cls.mro if isinstance(c, abstract.Class)]
+    mutable_mro = [c for c in mro if not _has_fixed_attributes(c)]
+    mask = 0
+    for c in mro:
+      for name in c.get_own_attributes():
+        mask |= self._get_bit(name)
+    # See AbstractMatcher._get_attribute_names.
+    if mask & self._get_bit("__getitem__"):
+      mask |= self._get_bit("__iter__")
+    self._class_masks[id(cls)] = _ClassMask(
+        cls=cls,
+        mutable_mro=mutable_mro,
+        changestamps=[_get_attributes_changestamp(c) for c in mutable_mro],
+        mask=mask,
+    )
+    return mask
+
+  def get_missing_attributes(
+      self, cls: abstract.Class, protocol: abstract.Class
+  ) -> set[str]:
+    """Gets the protocol attributes that no class in cls's MRO defines.
+
+    Unlike AbstractMatcher._get_attribute_names, this doesn't account for
+    instance attributes.
+
+    Args:
+      cls: A class.
+      protocol: A protocol.
+
+    Returns:
+      The names of the missing attributes.
+    """
+    missing = self._get_protocol_mask(protocol) & ~self._get_class_mask(cls)
+    return self._get_names(missing) if missing else set()
+
+
 class AbstractMatcher(utils.ContextWeakrefMixin):
   """Matcher for abstract values."""
 
@@ -398,6 +512,29 @@ class AbstractMatcher(utils.ContextWeakrefMixin):
     Returns:
       The match, if any, None otherwise.
     """
+    if not isinstance(left, abstract.Class) or not isinstance(
+        other_type, abstract.Class
+    ):
+      return self._match_from_mro(left, other_type, allow_compat_builtins)
+    # A class's MRO and names are fixed when it is created, so the match only
+    # depends on the identities of the two classes.
+    key = (id(left), id(other_type), allow_compat_builtins)
+    cache = self.ctx.mro_match_cache
+    if key in cache:
+      _mro_match_cache_hits.inc(other_type.full_name)
+      return cache[key][-1]
+    _mro_match_cache_misses.inc(other_type.full_name)
+    base = self._match_from_mro(left, other_type, allow_compat_builtins)
+    # An unresolved base class will match differently once it is resolved.
+    if not any(
+        isinstance(b, abstract.LateAnnotation) and not b.resolved
+        for b in left.mro
+    ):
+      # Keep the classes alive, so that their ids aren't reused.
+      cache[key] = (left, other_type, base)
+    return base
+
+  def _match_from_mro(self, left, other_type, allow_compat_builtins):
     for base in left.mro:
       if isinstance(base, abstract.ParameterizedClass):
         base_cls = base.base_cls
@@ -1693,6 +1830,22 @@ class AbstractMatcher(utils.ContextWeakrefMixin):
       left_attributes.add("__iter__")
     return left_attributes
 
+  def _get_missing_protocol_attributes(self, left, other_type):
+    """Same as other_type.protocol_attributes - _get_attribute_names(left)."""
+    if isinstance(left, abstract.Module):
+      # Module members are loaded lazily, so there's nothing to index.
+      return other_type.protocol_attributes - self._get_attribute_names(left)
+    missing = self.ctx.protocol_index.get_missing_attributes(
+        left.cls, other_type
+    )
+    if not missing:
+      return missing
+    if isinstance(left, abstract.SimpleValue):
+      missing.difference_update(left.members)
+      if "__getitem__" in left.members:
+        missing.discard("__iter__")
+    return missing
+
   def _match_against_protocol(self, left, other_type, subst, view):
     """Checks whether a type is compatible with a protocol.
 
@@ -1716,8 +1869,7 @@ class AbstractMatcher(utils.ContextWeakrefMixin):
       # that dict[int | slice, str] satisfies the Sequence[str] protocol:
       # https://docs.python.org/3/c-api/sequence.html#c.PySequence_Check
       return None
-    left_attributes = self._get_attribute_names(left)
-    missing = other_type.protocol_attributes - left_attributes
+    missing = self._get_missing_protocol_attributes(left, other_type)
     if missing:  # not all protocol attributes are implemented by 'left'
       self._protocol_error = error_types.ProtocolMissingAttributesError(
           left.cls, other_type, missing
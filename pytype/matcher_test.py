@@ -3,6 +3,7 @@
 import textwrap
 
 from pytype import config
+from pytype import matcher
 from pytype.abstract import abstract
 from pytype.abstract import abstract_utils
 from pytype.errors import error_types
@@ -454,6 +455,29 @@ class MatcherTest(MatcherTestBase):
     self.assertMatch(left2, right)
     self.assertNoMatch(left3, right)
 
+  def test_protocol_missing_attributes(self):
+    left = self._convert_type("int", as_instance=True)
+    right = self._convert_type("Sequence")
+    self.assertNoMatch(left, right)
+    error = self.matcher._protocol_error  # pylint: disable=protected-access
+    self.assertIsInstance(error, error_types.ProtocolMissingAttributesError)
+    self.assertEqual(error.missing, {"__getitem__", "__len__"})
+
+  def test_protocol_class_members_change(self):
+    cls = self._make_class("A")
+    left = abstract.Instance(cls, self.ctx)
+    right = self._convert_type("SupportsLower")
+    self.assertNoMatch(left, right)
+    cls.members["lower"] = self.ctx.new_unsolvable(self.ctx.root_node)
+    self.assertMatch(left, right)
+
+  def test_protocol_instance_members(self):
+    left = abstract.Instance(self._make_class("A"), self.ctx)
+    left.members["__getitem__"] = self.ctx.new_unsolvable(self.ctx.root_node)
+    left.members["__len__"] = self.ctx.new_unsolvable(self.ctx.root_node)
+    for match in self._match_var(left, self._convert_type("Sequence")):
+      self.assertIsNotNone(match)
+
   @unittest.skip("Needs to be fixed, tries to match protocol against A")
   def test_parameterized_protocol(self):
     left1 = self._convert(
@@ -515,6 +539,49 @@ class MatcherTest(MatcherTestBase):
     self.assertNoMatch(left, right)
 
 
+class MroMatchCacheTest(MatcherTestBase, test_utils.MetricsTestMixin):
+  """Test the cache of AbstractMatcher.match_from_mro."""
+
+  def setUp(self):
+    super().setUp()
+    # pylint: disable=protected-access
+    self._hits = matcher._mro_match_cache_hits
+    self._misses = matcher._mro_match_cache_misses
+    # pylint: enable=protected-access
+    self.enable_metrics(self._hits, self._misses)
+
+  def _counts(self, name):
+    return self.get_count(self._hits, name), self.get_count(self._misses, name)
+
+  def test_shared_between_matchers(self):
+    int_type = self.ctx.convert.int_type
+    bool_type = self.ctx.convert.bool_type
+    self.assertIs(self.matcher.match_from_mro(bool_type, int_type), int_type)
+    self.assertIs(
+        self.ctx.matcher(self.ctx.root_node).match_from_mro(bool_type, int_type),
+        int_type,
+    )
+    self.assertEqual(self._counts("builtins.int"), (1, 1))
+
+  def test_no_match(self):
+    str_type = self.ctx.convert.str_type
+    int_type = self.ctx.convert.int_type
+    for _ in range(2):
+      self.assertIsNone(self.matcher.match_from_mro(str_type, int_type))
+    self.assertEqual(self._counts("builtins.int"), (1, 1))
+
+  def test_compat_builtins(self):
+    int_type = self.ctx.convert.int_type
+    float_type = self.ctx.convert.primitive_classes[float]
+    self.assertIs(self.matcher.match_from_mro(int_type, float_type), int_type)
+    self.assertIsNone(
+        self.matcher.match_from_mro(
+            int_type, float_type, allow_compat_builtins=False
+        )
+    )
+    self.assertEqual(self._counts("builtins.float"), (0, 2))
+
+
 class TypeVarTest(MatcherTestBase):
   """Test matching TypeVar against various types."""
 
@@ -97,6 +97,11 @@ def _validate_metric_name(name):
     raise ValueError(f"Illegal metric name: {name}")
 
 
+def is_enabled():
+  """Whether metrics are being collected."""
+  return _enabled
+
+
 def _prepare_for_test(enabled=True):
   """Setup metrics collection for a test."""
   _registered_metrics.clear()
@@ -20,6 +20,7 @@ from pytype.overlays import special_builtins
 from pytype.overlays import typed_dict
 from pytype.overlays import typing_overlay
 from pytype.pyi import metadata
+from pytype.pytd import escape
 from pytype.pytd import pytd
 from pytype.pytd import pytd_utils
 from pytype.pytd import visitors
@@ -32,6 +33,27 @@ log = logging.getLogger(__name__)
 LARGE_LITERAL_SIZE = 15
 
 
+class _IsConcrete(visitors.Visitor):
+  """Checks that a type contains no Any, unknowns or type parameters."""
+
+  def __init__(self):
+    super().__init__()
+    self.concrete = True
+
+  def EnterAnythingType(self, _):
+    self.concrete = False
+
+  def EnterTypeParameter(self, _):
+    self.concrete = False
+
+  def EnterClassType(self, t):
+    if escape.is_unknown(t.name):
+      self.concrete = False
+
+  def EnterNamedType(self, t):
+    self.EnterClassType(t)
+
+
 class Converter(utils.ContextWeakrefMixin):
   """Functions for converting abstract classes into PyTD."""
 
@@ -715,6 +737,63 @@ class Converter(utils.ContextWeakrefMixin):
         decorators=decorators,
     )
 
+  def function_summary_to_def(self, v, function_name):
+    """Convert the recorded calls of an InterpreterFunction to a summary.
+
+    A summary has one signature per combination of concrete argument types
+    that the function was called with, in the order of the function's
+    parameters. Calls with Any or unknown arguments or results are left out.
+
+    Args:
+      v: An InterpreterFunction.
+      function_name: The name of the function.
+
+    Returns:
+      A pytd.Function, or None if there is nothing to summarize.
+    """
+    if (
+        v.has_overloads
+        or v.has_varargs()
+        or v.has_kwargs()
+        or v.signature.kwonly_params
+    ):
+      return None
+    returns = {}
+    for callargs, ret, node in v.summary_records:
+      params = tuple(
+          pytd.Parameter(
+              name.replace(".", "_"),
+              callargs[name].data[0].to_pytd_type(node),
+              kind,
+              optional,
+              None,
+          )
+          for name, kind, optional in v.get_parameters()
+      )
+      ret_type = pytd_utils.JoinTypes(r.to_pytd_type(node) for r in ret.data)
+      returns.setdefault(params, []).append(ret_type)
+    signatures = []
+    for params, ret_types in returns.items():
+      sig = pytd.Signature(
+          params=params,
+          starargs=None,
+          starstarargs=None,
+          return_type=pytd_utils.JoinTypes(ret_types),
+          exceptions=(),
+          template=(),
+      )
+      checker = _IsConcrete()
+      sig.Visit(checker)
+      if checker.concrete:
+        signatures.append(sig)
+    if not signatures:
+      return None
+    return pytd.Function(
+        name=function_name,
+        signatures=tuple(signatures),
+        kind=pytd.MethodKind.METHOD,
+    )
+
   def _simple_func_to_def(self, node, v, name):
     """Convert a SimpleFunction to a PyTD definition."""
     sig = v.signature
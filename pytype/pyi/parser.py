@@ -1,12 +1,15 @@
 """Parse a pyi file using the ast library."""
 
 import ast as astlib
+from collections.abc import Sequence
+import concurrent.futures
 import dataclasses
 import hashlib
 import io
 import keyword
 import re
 import sys
+import time
 import tokenize
 from typing import Any, cast
 
@@ -934,3 +937,77 @@ def canonical_pyi(pyi, multiline_args=False, options=None):
   ast = ast.Visit(visitors.CanonicalOrderingVisitor())
   ast.Visit(visitors.VerifyVisitor())
   return pytd_utils.Print(ast, multiline_args)
+
+
+@dataclasses.dataclass(frozen=True)
+class CanonicalPyiResult:
+  """The outcome of canonicalizing a single pyi file in a batch.
+
+  Attributes:
+    filename: The input filename.
+    text: The canonical pyi text, or None if the file could not be processed.
+    error: A description of the error, or None on success.
+    elapsed: Wall-clock seconds spent reading, parsing and printing the file.
+  """
+
+  filename: str
+  text: str | None
+  error: str | None
+  elapsed: float
+
+
+def _canonical_pyi_file(
+    filename: str, multiline_args: bool, options: PyiOptions | None
+) -> CanonicalPyiResult:
+  """Canonicalize one file. Module-level so that it can be pickled."""
+  start = time.perf_counter()
+  try:
+    with open(filename) as f:
+      src = f.read()
+    text = canonical_pyi(src, multiline_args, options)
+    error = None
+  except Exception as e:  # pylint: disable=broad-except
+    # One bad file (e.g., one that isn't valid UTF-8) must not abort the batch.
+    text = None
+    error = str(e)
+  return CanonicalPyiResult(
+      filename, text, error, time.perf_counter() - start
+  )
+
+
+def canonical_pyi_files(
+    filenames: Sequence[str],
+    multiline_args: bool = False,
+    options: PyiOptions | None = None,
+    max_workers: int | None = None,
+) -> list[CanonicalPyiResult]:
+  """Rewrite many pyi files in canonical form, in parallel.
+
+  Each file is handled independently in a process pool. Results are returned
+  in the order of `filenames`, regardless of the order in which workers finish,
+  so output is deterministic.
+
+  Args:
+    filenames: The pyi files to canonicalize.
+    multiline_args: Whether to print function arguments one to a line.
+    options: Pyi parsing options, shared by all files.
+    max_workers: The size of the process pool. Defaults to the number of CPUs.
+      If 1, the files are processed in the current process.
+
+  Returns:
+    A list of CanonicalPyiResult, one per input file.
+  """
+  if max_workers == 1 or len(filenames) <= 1:
+    return [
+        _canonical_pyi_file(f, multiline_args, options) for f in filenames
+    ]
+  n = len(filenames)
+  with concurrent.futures.ProcessPoolExecutor(max_workers) as executor:
+    return list(
+        executor.map(
+            _canonical_pyi_file,
+            filenames,
+            [multiline_args] * n,
+            [options] * n,
+        )
+    )
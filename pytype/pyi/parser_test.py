@@ -6,6 +6,7 @@ from pytype.pyi import parser
 from pytype.pyi import parser_test_base
 from pytype.pytd import pytd
 from pytype.tests import test_base
+from pytype.tests import test_utils
 
 import unittest
 
@@ -2837,6 +2838,36 @@ class CanonicalPyiTest(parser_test_base.ParserTestBase):
         parser.canonical_pyi(src, options=self.options), expected
     )
 
+  def test_canonical_files(self):
+    with test_utils.Tempdir() as d:
+      a = d.create_file("a.pyi", "def f(x: int = 0) -> str: ...")
+      b = d.create_file("b.pyi", "def g(x) -> int: ...\nclass A: ...")
+      bad = d.create_file("bad.pyi", "def f(x): str")
+      results = parser.canonical_pyi_files(
+          [b, bad, a], options=self.options, max_workers=2
+      )
+    self.assertEqual([r.filename for r in results], [b, bad, a])
+    self.assertMultiLineEqual(
+        results[0].text, "class A: ...\n\ndef g(x) -> int: ..."
+    )
+    self.assertIsNone(results[1].text)
+    self.assertIsNotNone(results[1].error)
+    self.assertMultiLineEqual(
+        results[2].text, "def f(x: int = ...) -> str: ..."
+    )
+    self.assertTrue(all(r.elapsed >= 0 for r in results))
+
+  def test_canonical_files_decode_error(self):
+    with test_utils.Tempdir() as d:
+      a = d.create_file("a.pyi", "def f(x: int) -> str: ...")
+      bad = d.create_file("bad.pyi", b"x: int  # \xff\xfe")
+      results = parser.canonical_pyi_files(
+          [bad, a], options=self.options, max_workers=2
+      )
+    self.assertIsNone(results[0].text)
+    self.assertIsNotNone(results[0].error)
+    self.assertMultiLineEqual(results[1].text, "def f(x: int) -> str: ...")
+
 
 class TypeMacroTest(parser_test_base.ParserTestBase):
 
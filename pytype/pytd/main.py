@@ -7,13 +7,17 @@ This binary processes pytd files, typically to optimize them.
 
 Usage:
   pytd_tool [flags] <inputfile> <outputfile>
+  pytd_tool --batch [-j N] [--output-dir DIR] [--timing] <inputfile>...
 """
 
 import argparse
+import os
 import sys
 
+from pytype import file_utils
 from pytype import utils
 from pytype.imports import builtin_stubs
+from pytype.platform_utils import path_utils
 from pytype.pyi import parser
 from pytype.pytd import optimize
 from pytype.pytd import pytd_utils
@@ -27,7 +31,7 @@ def make_parser():
   )
 
   # Input and output filenames
-  o.add_argument("input", help="File to process")
+  o.add_argument("input", nargs="?", help="File to process")
   o.add_argument(
       "output",
       nargs="?",
@@ -74,6 +78,14 @@ def make_parser():
       default=False,
       help="Remove mutable parameters.",
   )
+  o.add_argument(
+      "--budget",
+      type=float,
+      action="store",
+      dest="budget",
+      default=None,
+      help="Seconds of CPU time to spend on simplifications.\nUse with -O.",
+  )
   o.add_argument(
       "-V",
       "--python_version",
@@ -90,9 +102,84 @@ def make_parser():
       default=False,
       help="Print function arguments one to a line.",
   )
+
+  # Batch mode
+  o.add_argument(
+      "--batch",
+      nargs="+",
+      metavar="INPUT",
+      dest="batch",
+      default=None,
+      help=(
+          "Canonicalize and print many files in parallel. Outputs are "
+          "written to --output-dir, or checked for errors if it is omitted."
+      ),
+  )
+  o.add_argument(
+      "--output-dir",
+      type=str,
+      action="store",
+      dest="output_dir",
+      default=None,
+      help="Output directory for --batch.",
+  )
+  o.add_argument(
+      "-j",
+      "--jobs",
+      type=int,
+      action="store",
+      dest="jobs",
+      default=None,
+      help="Number of worker processes for --batch. Defaults to the CPU count.",
+  )
+  o.add_argument(
+      "--timing",
+      action="store_true",
+      dest="timing",
+      default=False,
+      help="Report per-file processing time for --batch on stderr.",
+  )
   return o
 
 
+def _run_batch(opts, options):
+  """Canonicalize opts.batch in a process pool, writing results in order."""
+  results = parser.canonical_pyi_files(
+      opts.batch,
+      multiline_args=opts.multiline_args,
+      options=options,
+      max_workers=opts.jobs,
+  )
+  if opts.output_dir:
+    file_utils.makedirs(opts.output_dir)
+    # Outputs keep their paths relative to the inputs' common directory, so
+    # that inputs with the same basename, like a/__init__.pyi and
+    # b/__init__.pyi, don't overwrite each other.
+    input_root = os.path.commonpath(
+        [path_utils.dirname(path_utils.abspath(f)) for f in opts.batch]
+    )
+  failed = False
+  for result in results:
+    if result.error is not None:
+      failed = True
+      sys.stderr.write(f"{result.filename}: {result.error}\n")
+    elif opts.output_dir:
+      outpath = path_utils.join(
+          opts.output_dir,
+          path_utils.relpath(path_utils.abspath(result.filename), input_root),
+      )
+      file_utils.makedirs(path_utils.dirname(outpath))
+      with open(outpath, "w") as out:
+        out.write(result.text)
+    if opts.timing:
+      sys.stderr.write(f"{result.elapsed:.3f}s {result.filename}\n")
+  if opts.timing:
+    total = sum(r.elapsed for r in results)
+    sys.stderr.write(f"{total:.3f}s total for {len(results)} files\n")
+  if failed:
+    sys.exit(1)
+
+
 def main():
   argument_parser = make_parser()
   opts = argument_parser.parse_args()
@@ -108,6 +195,14 @@ def main():
 
   options = parser.PyiOptions(python_version=python_version)
 
+  if opts.batch:
+    if opts.input or opts.optimize:
+      argument_parser.error("--batch cannot be combined with input or -O")
+    _run_batch(opts, options)
+    return
+  if not opts.input:
+    argument_parser.error("missing input file")
+
   with open(opts.input) as fi:
     sourcecode = fi.read()
     try:
@@ -127,6 +222,7 @@ def main():
         max_union=opts.max_union,
         remove_mutable=opts.remove_mutable,
         can_do_lookup=False,
+        budget=opts.budget,
     )
 
   if opts.output is not None:
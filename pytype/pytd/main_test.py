@@ -86,6 +86,55 @@ class TestPytdTool(unittest.TestCase):
       with open(outpath) as f:
         self.assertMultiLineEqual(f.read(), src)
 
+  def test_batch(self):
+    with test_utils.Tempdir() as d:
+      src1 = "def f(x: int) -> str: ..."
+      src2 = "class A: ..."
+      in1 = d.create_file("in/a.pyi", src1)
+      in2 = d.create_file("in/b.pyi", src2)
+      outdir = path_utils.join(d.path, "out")
+      sys.argv = [
+          "main.py",
+          "-j",
+          "1",
+          "--output-dir",
+          outdir,
+          "--batch",
+          in1,
+          in2,
+      ]
+      pytd_tool.main()
+      with open(path_utils.join(outdir, "a.pyi")) as f:
+        self.assertMultiLineEqual(f.read(), src1)
+      with open(path_utils.join(outdir, "b.pyi")) as f:
+        self.assertMultiLineEqual(f.read(), src2)
+
+  def test_batch_same_basename(self):
+    with test_utils.Tempdir() as d:
+      src1 = "def f(x: int) -> str: ..."
+      src2 = "class A: ..."
+      in1 = d.create_file("in/a/__init__.pyi", src1)
+      in2 = d.create_file("in/b/__init__.pyi", src2)
+      outdir = path_utils.join(d.path, "out")
+      sys.argv = ["main.py", "--output-dir", outdir, "--batch", in1, in2]
+      pytd_tool.main()
+      with open(path_utils.join(outdir, "a", "__init__.pyi")) as f:
+        self.assertMultiLineEqual(f.read(), src1)
+      with open(path_utils.join(outdir, "b", "__init__.pyi")) as f:
+        self.assertMultiLineEqual(f.read(), src2)
+
+  def test_batch_parse_error(self):
+    with test_utils.Tempdir() as d:
+      inpath = d.create_file("in.pytd", "def f(x): str")  # malformed pytd
+      sys.argv = ["main.py", "--batch", inpath]
+      with self.assertRaises(SystemExit):
+        pytd_tool.main()
+
+  def test_batch_with_input(self):
+    sys.argv = ["main.py", "in.pytd", "--batch", "a.pytd"]
+    with self.assertRaises(SystemExit):
+      pytd_tool.main()
+
 
 if __name__ == "__main__":
   unittest.main()
@@ -9,6 +9,7 @@ redundancies.
 import collections
 import logging
 
+from pytype import metrics
 from pytype import utils
 from pytype.pytd import abc_hierarchy
 from pytype.pytd import escape
@@ -20,6 +21,23 @@ from pytype.pytd import visitors
 log = logging.getLogger(__name__)
 
 
+class _DeadlineMixin:
+  """Lets an optimization stop partway through a tree.
+
+  Once `deadline` (a CPU clock reading, see metrics.get_cpu_clock) has passed,
+  the visitor leaves the remaining nodes as they are and sets `timed_out`. The
+  result is still correct, just less simplified.
+  """
+
+  deadline = None
+  timed_out = False
+
+  def _TimeIsUp(self):
+    if self.deadline is not None and metrics.get_cpu_clock() >= self.deadline:
+      self.timed_out = True
+    return self.timed_out
+
+
 class RenameUnknowns(visitors.Visitor):
   """Give unknowns that map to the same set of concrete types the same name."""
 
@@ -204,7 +222,7 @@ class CombineReturnsAndExceptions(visitors.Visitor):
     return f.Replace(signatures=tuple(new_signatures))
 
 
-class CombineContainers(visitors.Visitor):
+class CombineContainers(_DeadlineMixin, visitors.Visitor):
   """Change unions of containers to containers of unions.
 
   For example, this transforms
@@ -265,6 +283,8 @@ class CombineContainers(visitors.Visitor):
     Returns:
       A simplified pytd.Union.
     """
+    if self._TimeIsUp():
+      return union
     if not any(isinstance(t, pytd.GenericType) for t in union.type_list):
       # Optimization: If we're not going to change anything, return original.
       return union
@@ -321,26 +341,87 @@ class CombineContainers(visitors.Visitor):
 
 
 class SuperClassHierarchy:
-  """Utility class for optimizations working with superclasses."""
+  """Utility class for optimizations working with superclasses.
+
+  Transitive superclass sets are computed on demand and memoized as bitsets
+  (ints with one bit per class name), so that repeated queries against the same
+  hierarchy, e.g. once per union in a module, cost a lookup and a few integer
+  operations rather than a graph traversal.
+  """
 
   def __init__(self, superclasses):
     self._superclasses = superclasses
     self._subclasses = utils.invert_dict(self._superclasses)
+    # Bit assignment for class names, and the reverse mapping.
+    self._bit: dict[str, int] = {}
+    self._names: list[str] = []
+    # Memoized bitsets of each type's superclasses, including the type itself.
+    self._ancestors: dict[str, int] = {}
+    # Memoized bitsets of each type's direct subclasses.
+    self._direct_subclasses: dict[str, int] = {}
 
   def GetSuperClasses(self):
     return self._superclasses
 
-  def _CollectSuperclasses(self, type_name, collect):
-    """Recursively collect super classes for a type.
-
-    Arguments:
-      type_name: A string, the type's name.
-      collect: A set() of strings, modified to contain all superclasses.
-    """
-    collect.add(type_name)
-    # The superclasses might have superclasses of their own, so recurse.
-    for superclass in self._superclasses.get(type_name, []):
-      self._CollectSuperclasses(superclass, collect)
+  def _Bit(self, type_name):
+    try:
+      return self._bit[type_name]
+    except KeyError:
+      bit = self._bit[type_name] = 1 << len(self._names)
+      self._names.append(type_name)
+      return bit
+
+  def _Names(self, bits):
+    """Decode a bitset into a list of type names, in bit order."""
+    names = []
+    while bits:
+      low = bits & -bits
+      names.append(self._names[low.bit_length() - 1])
+      bits ^= low
+    return names
+
+  def BitSet(self, type_names):
+    """Encode type names as a bitset, for use with SuperClassesInBitSet."""
+    bits = 0
+    for t in type_names:
+      bits |= self._Bit(t)
+    return bits
+
+  def SuperClassesInBitSet(self, t, bits):
+    """Get the names in a bitset that are t or one of its superclasses."""
+    return self._Names(self._AncestorBits(t) & bits)
+
+  def _AncestorBits(self, type_name):
+    """Get the bitset of type_name and all of its (known) superclasses."""
+    if type_name in self._ancestors:
+      return self._ancestors[type_name]
+    # Iterative post-order traversal, so that deep hierarchies don't hit the
+    # recursion limit. A type that is still in progress (which only happens
+    # with cyclic hierarchies) contributes just its own bit.
+    self._ancestors[type_name] = self._Bit(type_name)
+    stack = [(type_name, iter(self._superclasses.get(type_name, ())))]
+    while stack:
+      name, bases = stack[-1]
+      for base in bases:
+        if base not in self._ancestors:
+          self._ancestors[base] = self._Bit(base)
+          stack.append((base, iter(self._superclasses.get(base, ()))))
+          break
+      else:
+        stack.pop()
+        bits = self._Bit(name)
+        for base in self._superclasses.get(name, ()):
+          bits |= self._ancestors[base]
+        self._ancestors[name] = bits
+    return self._ancestors[type_name]
+
+  def _DirectSubClassBits(self, type_name):
+    if type_name not in self._direct_subclasses:
+      bits = 0
+      for sub in self._subclasses.get(type_name, ()):
+        bits |= self._Bit(sub)
+      self._direct_subclasses[type_name] = bits
+    return self._direct_subclasses[type_name]
 
   def ExpandSuperClasses(self, t):
     """Generate a list of all (known) superclasses for a type.
@@ -352,39 +433,32 @@ class SuperClassHierarchy:
       A set of types. This set includes t as well as all its superclasses. For
       example, this will return "bool", "int" and "object" for "bool".
     """
-    superclasses = set()
-    self._CollectSuperclasses(t, superclasses)
-    return superclasses
+    return set(self._Names(self._AncestorBits(t)))
 
-  def ExpandSubClasses(self, t):
-    """Generate a set of all (known) subclasses for a type.
+  def CommonSuperClasses(self, type_names):
+    """Get the most specific superclasses shared by all of type_names.
 
     Arguments:
-      t: A type. E.g. NamedType("int").
+      type_names: A non-empty sequence of type names.
 
     Returns:
-      A set of types. This set includes t as well as all its subclasses. For
-      example, this will return "int" and "bool" for "int".
+      A list of the common superclasses that have no subclass which is also a
+      common superclass. E.g., ["int"] for ["int", "bool"].
     """
-    queue = [t]
-    seen = set()
-    while queue:
-      item = queue.pop()
-      if item not in seen:
-        seen.add(item)
-        queue.extend(self._subclasses[item])
-    return seen
-
-  def HasSubClassInSet(self, cls, known):
-    """Queries whether a subclass of a type is present in a given set."""
-    return any(sub in known for sub in self._subclasses[cls])
-
-  def HasSuperClassInSet(self, cls, known):
-    """Queries whether a superclass of a type is present in a given set."""
-    return any(sub in known for sub in self._superclasses[cls])
+    common = -1
+    for t in type_names:
+      common &= self._AncestorBits(t)
+    # Remove "redundant" superclasses, by removing everything from the tree
+    # that's not a leaf. I.e., we don't need "object" if we have more
+    # specialized types.
+    return [
+        cls
+        for cls in self._Names(common)
+        if not self._DirectSubClassBits(cls) & common
+    ]
 
 
-class SimplifyUnionsWithSuperclasses(visitors.Visitor):
+class SimplifyUnionsWithSuperclasses(_DeadlineMixin, visitors.Visitor):
   """Simplify Unions with superclasses.
 
   E.g., this changes
@@ -402,18 +476,33 @@ class SimplifyUnionsWithSuperclasses(visitors.Visitor):
     self.hierarchy = hierarchy
 
   def VisitUnionType(self, union):
-    c = collections.Counter()
-    for t in set(union.type_list):
-      if isinstance(t, pytd.GENERIC_BASE_TYPE):
-        c += collections.Counter(self.hierarchy.ExpandSubClasses(str(t)))
-    # Below, c[str[t]] can be zero - that's the default for non-existent items
-    # in collections.Counter. It'll happen for types that are not
-    # instances of GENERIC_BASE_TYPE, like container types.
-    new_type_list = [t for t in union.type_list if c[str(t)] <= 1]
+    if self._TimeIsUp():
+      return union
+    # A member of the union is redundant if another member is one of its
+    # superclasses. We look upwards from each member, rather than expanding the
+    # subclasses of each member, since the latter touches the entire hierarchy
+    # for members like "object".
+    counts = collections.Counter(
+        str(t)
+        for t in set(union.type_list)
+        if isinstance(t, pytd.GENERIC_BASE_TYPE)
+    )
+    # counts[str[t]] can be zero, for types that are not instances of
+    # GENERIC_BASE_TYPE, like container types.
+    members = self.hierarchy.BitSet(counts)
+    new_type_list = [
+        t
+        for t in union.type_list
+        if sum(
+            counts[name]
+            for name in self.hierarchy.SuperClassesInBitSet(str(t), members)
+        )
+        <= 1
+    ]
     return pytd_utils.JoinTypes(new_type_list)
 
 
-class FindCommonSuperClasses(visitors.Visitor):
+class FindCommonSuperClasses(_DeadlineMixin, visitors.Visitor):
   """Find common super classes. Optionally also uses abstract base classes.
 
   E.g., this changes
@@ -439,20 +528,13 @@ class FindCommonSuperClasses(visitors.Visitor):
     Returns:
       A simplified type, if available.
     """
-    intersection = self.hierarchy.ExpandSuperClasses(str(union.type_list[0]))
-
-    for t in union.type_list[1:]:
-      intersection.intersection_update(
-          self.hierarchy.ExpandSuperClasses(str(t))
-      )
-
-    # Remove "redundant" superclasses, by removing everything from the tree
-    # that's not a leaf. I.e., we don't need "object" if we have more
-    # specialized types.
+    if self._TimeIsUp():
+      return union
     new_type_list = tuple(
         pytd.NamedType(cls)
-        for cls in intersection
-        if not self.hierarchy.HasSubClassInSet(cls, intersection)
+        for cls in self.hierarchy.CommonSuperClasses(
+            [str(t) for t in union.type_list]
+        )
     )
 
     if not new_type_list:
@@ -762,7 +844,7 @@ class TypeParameterScope(visitors.Visitor):
     self.type_params_stack.pop()
 
 
-class MergeTypeParameters(TypeParameterScope):
+class MergeTypeParameters(_DeadlineMixin, TypeParameterScope):
   """Remove all function type parameters in a union with a class type param.
 
   For example, this will change
@@ -855,6 +937,8 @@ class MergeTypeParameters(TypeParameterScope):
       return [item]
 
   def VisitSignature(self, sig):
+    if self._TimeIsUp():
+      return sig
     new_template = []
     substitutions = {k: k for k in self.type_params_stack[-1]}
     for item in sig.template:
@@ -869,6 +953,46 @@ class MergeTypeParameters(TypeParameterScope):
       )
 
 
+class _PassRunner:
+  """Runs optimization passes within an optional budget.
+
+  If a budget (in seconds of CPU time) is given, optional passes are skipped
+  once it is used up, and the ones that can stop partway through are cut short
+  when it runs out. Both are counted in "optimize_skipped_passes". The time of
+  each pass is recorded by node.Visit, in "visit_<pass>".
+  """
+
+  def __init__(self, budget=None):
+    self._deadline = (
+        None if budget is None else metrics.get_cpu_clock() + budget
+    )
+
+  @property
+  def exhausted(self):
+    return (
+        self._deadline is not None
+        and metrics.get_cpu_clock() >= self._deadline
+    )
+
+  def _CountSkipped(self, visitor):
+    metrics.get_metric("optimize_skipped_passes", metrics.MapCounter).inc(
+        type(visitor).__name__
+    )
+
+  def Run(self, node, visitor, optional=False):
+    if not optional:
+      return node.Visit(visitor)
+    if self.exhausted:
+      self._CountSkipped(visitor)
+      return node
+    if isinstance(visitor, _DeadlineMixin):
+      visitor.deadline = self._deadline
+    node = node.Visit(visitor)
+    if isinstance(visitor, _DeadlineMixin) and visitor.timed_out:
+      self._CountSkipped(visitor)
+    return node
+
+
 def Optimize(
     node,
     deps=None,
@@ -877,6 +1001,7 @@ def Optimize(
     max_union=7,
     remove_mutable=False,
     can_do_lookup=True,
+    budget=None,
 ):
   """Optimize a PYTD tree.
 
@@ -895,34 +1020,48 @@ def Optimize(
     can_do_lookup: True: We're either allowed to try to resolve NamedType
       instances in the AST, or the AST is already resolved. False: Skip any
       optimizations that would require NamedTypes to be resolved.
+    budget: Optional number of seconds (CPU time) to spend on simplifications.
+      In budgeted mode, long unions are collapsed up front so that the later
+      passes work on small unions, and passes that only shrink the output are
+      skipped once the budget runs out, or stopped partway through. Passes that
+      the result depends on are always run: they are linear in the size of the
+      tree. With remove_mutable, that includes AbsorbMutableParameters and
+      AdjustSelf, which remove the mutations from the output.
 
   Returns:
     An optimized node.
   """
-  node = node.Visit(NormalizeGenericSelfTypes())
-  node = node.Visit(RemoveDuplicates())
-  node = node.Visit(SimplifyUnions())
-  node = node.Visit(CombineReturnsAndExceptions())
-  node = node.Visit(CombineContainers())
-  node = node.Visit(SimplifyContainers())
-  if deps:
+  runner = _PassRunner(budget)
+  if budget is not None and max_union:
+    # Cheap approximation first: this bounds the size of every union the
+    # remaining passes have to look at.
+    node = runner.Run(node, CollapseLongUnions(max_union))
+  node = runner.Run(node, NormalizeGenericSelfTypes())
+  node = runner.Run(node, RemoveDuplicates(), optional=True)
+  node = runner.Run(node, SimplifyUnions(), optional=True)
+  node = runner.Run(node, CombineReturnsAndExceptions(), optional=True)
+  node = runner.Run(node, CombineContainers(), optional=True)
+  node = runner.Run(node, SimplifyContainers(), optional=True)
+  if deps and not runner.exhausted:
     superclasses = deps.Visit(visitors.ExtractSuperClassesByName())
     superclasses.update(node.Visit(visitors.ExtractSuperClassesByName()))
     if use_abcs:
       superclasses.update(abc_hierarchy.GetSuperClasses())
     hierarchy = SuperClassHierarchy(superclasses)
-    node = node.Visit(SimplifyUnionsWithSuperclasses(hierarchy))
+    node = runner.Run(
+        node, SimplifyUnionsWithSuperclasses(hierarchy), optional=True
+    )
     if lossy:
-      node = node.Visit(FindCommonSuperClasses(hierarchy))
+      node = runner.Run(node, FindCommonSuperClasses(hierarchy), optional=True)
   if max_union:
-    node = node.Visit(CollapseLongUnions(max_union))
-  node = node.Visit(AdjustReturnAndConstantGenericType())
+    node = runner.Run(node, CollapseLongUnions(max_union))
+  node = runner.Run(node, AdjustReturnAndConstantGenericType())
   if remove_mutable:
-    node = node.Visit(AbsorbMutableParameters())
-    node = node.Visit(CombineContainers())
-    node = node.Visit(MergeTypeParameters())
-    node = node.Visit(visitors.AdjustSelf())
-  node = node.Visit(SimplifyContainers())
+    node = runner.Run(node, AbsorbMutableParameters())
+    node = runner.Run(node, CombineContainers(), optional=True)
+    node = runner.Run(node, MergeTypeParameters(), optional=True)
+    node = runner.Run(node, visitors.AdjustSelf())
+  node = runner.Run(node, SimplifyContainers(), optional=True)
   if deps and can_do_lookup:
     node = visitors.LookupClasses(node, deps, ignore_late_types=True)
   return node
@@ -3,6 +3,7 @@ import textwrap
 
 from pytype import config
 from pytype import load_pytd
+from pytype import metrics
 from pytype.pytd import optimize
 from pytype.pytd import pytd
 from pytype.pytd import pytd_utils
@@ -210,6 +211,63 @@ class TestOptimize(parser_test_base.ParserTest):
     optimized = self.Optimize(ast, lossy=False, max_union=2)
     self.AssertSourceEquals(optimized, new_src)
 
+  def test_budget(self):
+    src = pytd_src("""
+        def f(x: Union[int, float, str, bytes]) -> int: ...
+        def f(x: Union[int, float, str, bytes]) -> int: ...
+    """)
+    ast = self.ParseAndResolve(src)
+    unbudgeted = self.Optimize(ast, max_union=2)
+    self.AssertSourceEquals(
+        self.Optimize(ast, max_union=2, budget=1e6), unbudgeted
+    )
+    # With no time to spare, the unions are still collapsed but the duplicate
+    # signatures are kept.
+    optimized = self.Optimize(ast, max_union=2, budget=0)
+    expected = pytd_src("""
+        def f(x) -> builtins.int: ...
+        def f(x) -> builtins.int: ...
+    """)
+    self.AssertSourceEquals(optimized, expected)
+
+  def test_pass_metrics(self):
+    metrics._prepare_for_test()
+    self.addCleanup(metrics.reset)
+    ast = self.ParseAndResolve("def f(x: int) -> int: ...")
+    self.Optimize(ast, budget=0)
+    report = metrics.get_report()
+    self.assertIn("visit_NormalizeGenericSelfTypes:", report)
+    self.assertIn("optimize_skipped_passes:", report)
+    self.assertNotIn("visit_RemoveDuplicates:", report)
+    self.assertNotIn("optimize_NormalizeGenericSelfTypes:", report)
+
+  def test_deadline(self):
+    src = pytd_src("""
+        from typing import Any
+        def f(x: Union[list[int], list[float]]) -> Any: ...
+    """)
+    visitor = optimize.CombineContainers()
+    visitor.deadline = 0
+    self.AssertSourceEquals(self.ApplyVisitorToString(src, visitor), src)
+    self.assertTrue(visitor.timed_out)
+
+  def test_budget_remove_mutable(self):
+    src = pytd_src("""
+        from typing import Any
+        def f(x: list[int]) -> Any:
+            x = list[float]
+    """)
+    expected = pytd_src("""
+        from typing import Any
+        def f(
+            x: Union[builtins.list[builtins.int], builtins.list[builtins.float]]
+        ) -> Any: ...
+    """)
+    ast = self.ParseAndResolve(src)
+    # The mutation is absorbed, but the containers are not combined.
+    optimized = self.Optimize(ast, remove_mutable=True, budget=0)
+    self.AssertSourceEquals(optimized, expected)
+
   def test_simplify_unions(self):
     src = pytd_src("""
       from typing import Any
@@ -327,6 +385,31 @@ class TestOptimize(parser_test_base.ParserTest):
     ast = ast.Visit(visitor)
     self.AssertSourceEquals(ast, expected)
 
+  def test_superclass_hierarchy_queries(self):
+    hierarchy = optimize.SuperClassHierarchy({
+        "bool": ["int"],
+        "int": ["object"],
+        "float": ["object"],
+        "object": [],
+    })
+    self.assertEqual(hierarchy.GetSuperClasses()["bool"], ["int"])
+    self.assertEqual(
+        hierarchy.ExpandSuperClasses("bool"), {"bool", "int", "object"}
+    )
+    self.assertEqual(hierarchy.ExpandSuperClasses("str"), {"str"})
+    self.assertEqual(hierarchy.CommonSuperClasses(["bool", "int"]), ["int"])
+    self.assertEqual(
+        hierarchy.CommonSuperClasses(["bool", "float"]), ["object"]
+    )
+    self.assertEqual(hierarchy.CommonSuperClasses(["bool", "str"]), [])
+    members = hierarchy.BitSet(["int", "float"])
+    self.assertEqual(hierarchy.SuperClassesInBitSet("bool", members), ["int"])
+    self.assertEqual(hierarchy.SuperClassesInBitSet("object", members), [])
+
+  def test_cyclic_superclass_hierarchy(self):
+    hierarchy = optimize.SuperClassHierarchy({"A": ["B"], "B": ["A"]})
+    self.assertIn("B", hierarchy.ExpandSuperClasses("A"))
+
   @unittest.skip("Needs better handling of GenericType")
   def test_simplify_unions_with_superclasses_generic(self):
     src = pytd_src("""
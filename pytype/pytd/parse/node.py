@@ -37,6 +37,9 @@ class Node(
   # We pretend that `name` is a ClassVar so that msgspec treats it as a struct
   # field only when it is defined in a subclass.
   name: ClassVar[str] = ""
+  # Nodes with a `_name2item` lookup cache list the fields that the cache
+  # indexes, so that visitors can keep the cache when those fields don't change.
+  lookup_cache_fields: ClassVar[frozenset[str]] = frozenset()
 
   def __iter__(self):
     for name in self.__struct_fields__:
@@ -213,7 +216,17 @@ def _VisitNode(node, visitor, *args, **kwargs):
         changed = True
     new_children.append(new_child)
   if changed:
-    new_node = node_class(*new_children)
+    if node_class.lookup_cache_fields and all(
+        new_child is child
+        for (name, child), new_child in zip(node.IterChildren(), new_children)
+        if name in node_class.lookup_cache_fields
+    ):
+      # The items indexed by the lookup cache are unchanged, so the new node
+      # can share the cache instead of rebuilding it.
+      cache = node._name2item  # pytype: disable=attribute-error
+      new_node = node_class(*new_children, cache)
+    else:
+      new_node = node_class(*new_children)
   else:
     new_node = node
 
@@ -13,6 +13,8 @@ from pytype.pytd.parse import parser_constants
 # Aliases for readability:
 _NameType = _AliasType = str
 
+_LITERAL_RE = re.compile(r"Literal\[(?P<content>.*)\]")
+
 
 class _TypingImports:
   """Imports from the `typing` module."""
@@ -20,17 +22,22 @@ class _TypingImports:
   def __init__(self):
     # Typing members that are imported via `from typing import ...`.
     self._members: dict[_AliasType, _NameType] = {}
+    # The reverse of _members, maintained incrementally so that alias lookups
+    # don't have to rebuild it.
+    self._aliases: dict[_NameType, _AliasType] = {}
     # The number of times that each typing member is used.
     self._counts: dict[_NameType, int] = collections.defaultdict(int)
 
   @property
   def members(self):
     # Note that when a typing member has multiple aliases, this keeps only one.
-    return {name: alias for alias, name in self._members.items()}
+    return self._aliases
 
   def add(self, name: str, alias: str):
     self._counts[name] += 1
-    self._members[alias] = name
+    if self._members.get(alias) != name:
+      self._members[alias] = name
+      self._aliases = {n: a for a, n in self._members.items()}
 
   def decrement_count(self, name: str):
     self._counts[name] -= 1
@@ -147,6 +154,8 @@ class PrintVisitor(base_visitor.Visitor):
 
     self._unit = None
     self._local_names = set()
+    # Memoized results of looking up dotted names in self._unit.
+    self._unit_lookups: dict[str, bool] = {}
     self._class_members = set()
     self._paramspec_names = set()
     self._imports = _Imports()
@@ -167,6 +176,7 @@ class PrintVisitor(base_visitor.Visitor):
     # pylint: disable=protected-access
     copy._local_names = set(self._local_names)
     copy._imports._typing._members = dict(self._imports._typing._members)
+    copy._imports._typing._aliases = dict(self._imports._typing._aliases)
     copy._imports._reverse_alias_map = dict(self._imports._reverse_alias_map)
     # pylint: enable=protected-access
     return copy
@@ -274,8 +284,24 @@ class PrintVisitor(base_visitor.Visitor):
         self.VisitNamedType(d.type)
     return utils.unique_list(decorators)
 
+  def _IsDefinedInUnit(self, name):
+    """Whether the (unit-relative) name resolves to something in self._unit."""
+    try:
+      return self._unit_lookups[name]
+    except KeyError:
+      pass
+    try:
+      pytd.LookupItemRecursive(self._unit, name)
+    except KeyError:
+      found = False
+    else:
+      found = True
+    self._unit_lookups[name] = found
+    return found
+
   def EnterTypeDeclUnit(self, unit):
     self._unit = unit
+    self._unit_lookups = {}
     definitions = (
         unit.classes
         + unit.functions
@@ -301,6 +327,7 @@ class PrintVisitor(base_visitor.Visitor):
   def LeaveTypeDeclUnit(self, _):
     self._unit = None
     self._local_names = set()
+    self._unit_lookups = {}
 
   def VisitTypeDeclUnit(self, node):
     """Convert the AST for an entire module back to a string."""
@@ -438,10 +465,10 @@ class PrintVisitor(base_visitor.Visitor):
       bases = ()
     keywords = []
     for k, v in node.keywords:
-      vmatch = re.fullmatch(r"Literal\[(.+)\]", v)
-      if vmatch:
+      vmatch = _LITERAL_RE.fullmatch(v)
+      if vmatch and vmatch.group("content"):
         self._imports.decrement_typing_count("Literal")
-        vprint = vmatch.group(1)
+        vprint = vmatch.group("content")
       else:
         vprint = v
       keywords.append(f"{k}={vprint}")
@@ -458,11 +485,13 @@ class PrintVisitor(base_visitor.Visitor):
       # We have multiple methods, and every method has multiple signatures
       # (i.e., the method string will have multiple lines). Combine this into
       # an array that contains all the lines, then indent the result.
-      class_lines = sum((m.splitlines() for m in node.classes), [])
-      classes = [self.INDENT + m for m in class_lines]
+      classes = [
+          self.INDENT + line for m in node.classes for line in m.splitlines()
+      ]
       constants = [self.INDENT + m for m in node.constants]
-      method_lines = sum((m.splitlines() for m in node.methods), [])
-      methods = [self.INDENT + m for m in method_lines]
+      methods = [
+          self.INDENT + line for m in node.methods for line in m.splitlines()
+      ]
     else:
       header[-1] += " ..."
       constants = []
@@ -607,7 +636,7 @@ class PrintVisitor(base_visitor.Visitor):
       return
     param = name.split("[", 1)[-1]
     for k in self._imports.typing_members:
-      if re.search(r"\b%s\b" % k, param):
+      if k in param and re.search(r"\b%s\b" % k, param):
         self._imports.decrement_typing_count(k)
 
   def VisitParameter(self, node):
@@ -694,9 +723,9 @@ class PrintVisitor(base_visitor.Visitor):
       node_name = node.name
     else:
       if self._unit:
-        try:
-          pytd.LookupItemRecursive(self._unit, self._StripUnitPrefix(node.name))
-        except KeyError:
+        if self._IsDefinedInUnit(self._StripUnitPrefix(node.name)):
+          node_name = node.name
+        else:
           aliased_name = self._UseExistingModuleAlias(node.name)
           if aliased_name:
             node_name = aliased_name
@@ -710,8 +739,6 @@ class PrintVisitor(base_visitor.Visitor):
               node_name = node.name
             else:
               node_name = ".".join(filter(bool, (module_alias, rest, suffix)))
-        else:
-          node_name = node.name
       else:
         node_name = node.name
     if node_name == "NoneType":
@@ -825,7 +852,7 @@ class PrintVisitor(base_visitor.Visitor):
     literals = []
     new_type_list = []
     for t in type_list:
-      match = re.fullmatch(r"Literal\[(?P<content>.*)\]", t)
+      match = _LITERAL_RE.fullmatch(t)
       if match:
         literals.append(match.group("content"))
       else:
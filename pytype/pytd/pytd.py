@@ -53,6 +53,10 @@ class TypeDeclUnit(Node, eq=False):
   # in equality or hash operations.
   _name2item: dict[str, Any] = {}
 
+  lookup_cache_fields = frozenset(
+      {'constants', 'type_params', 'classes', 'functions', 'aliases'}
+  )
+
   def _InitCache(self):
     # TODO(b/159053187): Put constants, functions, classes and aliases into a
     # combined dict.
@@ -97,7 +101,10 @@ class TypeDeclUnit(Node, eq=False):
 
   def Replace(self, **kwargs):
     if '_name2item' not in kwargs:
-      kwargs['_name2item'] = {}
+      if self.lookup_cache_fields.isdisjoint(kwargs):
+        kwargs['_name2item'] = self._name2item
+      else:
+        kwargs['_name2item'] = {}
     return super().Replace(**kwargs)
 
   # The hash/eq/ne values are used for caching and speed things up quite a bit.
@@ -165,6 +172,8 @@ class Class(Node):
   # in equality or hash operations.
   _name2item: dict[str, Any] = {}
 
+  lookup_cache_fields = frozenset({'methods', 'constants', 'classes'})
+
   def _InitCache(self):
     # TODO(b/159053187): Put constants, functions, classes and aliases into a
     # combined dict.
@@ -201,12 +210,19 @@ class Class(Node):
     return bool(self.Get(name))
 
   def __hash__(self):
-    # _name2item is a dict, so it can't be hashed. This worked in the previous
-    # version by pretending that _name2item didn't exist.
-    # We could also delete the cache on self, but making a new instance should
-    # be cheaper than recomputing the cache.
-    nohash = self.Replace(_name2item=None)
-    return super(Class, nohash).__hash__()
+    # _name2item is a dict, so it can't be hashed. Hash the other fields
+    # directly rather than making a copy of self without the cache.
+    return hash((
+        self.name,
+        self.keywords,
+        self.bases,
+        self.methods,
+        self.constants,
+        self.classes,
+        self.decorators,
+        self.slots,
+        self.template,
+    ))
 
   def IterChildren(self) -> Generator[tuple[str, Any | None], None, None]:
     for name, child in super().IterChildren():
@@ -216,7 +232,10 @@ class Class(Node):
 
   def Replace(self, **kwargs):
     if '_name2item' not in kwargs:
-      kwargs['_name2item'] = {}
+      if self.lookup_cache_fields.isdisjoint(kwargs):
+        kwargs['_name2item'] = self._name2item
+      else:
+        kwargs['_name2item'] = {}
     return super().Replace(**kwargs)
 
   @property
@@ -852,12 +871,14 @@ def LookupItemRecursive(module: TypeDeclUnit, name: str) -> Node:
     # we try lookup for both naming conventions.
     found = Lookup(item, lookup_name, part)
     if found:
-      seen = {found}
+      seen = None
       while (
           isinstance(found, Alias)
           and isinstance(found.type, NamedType)
           and found.type.name.startswith(f'{item.name}.')
       ):
+        if seen is None:
+          seen = {found}
         resolved = Lookup(item, found.type.name)
         if resolved and resolved not in seen:
           found = resolved
@@ -3,6 +3,7 @@
 import itertools
 
 from pytype.pytd import pytd
+from pytype.pytd import visitors
 
 import unittest
 
@@ -68,6 +69,50 @@ class TestPytd(unittest.TestCase):
     self.assertTrue(pytd.AnythingType())
     self.assertTrue(pytd.NothingType())
 
+  def _make_unit(self):
+    return pytd.TypeDeclUnit(
+        "foo",
+        constants=(pytd.Constant("foo.x", self.int),),
+        type_params=(),
+        classes=(),
+        functions=(),
+        aliases=(),
+    )
+
+  def test_replace_keeps_lookup_cache(self):
+    unit = self._make_unit()
+    self.assertIsNotNone(unit.Get("foo.x"))
+    renamed = unit.Replace(name="bar")
+    self.assertIs(renamed._name2item, unit._name2item)  # pylint: disable=protected-access
+    self.assertEqual(renamed.Lookup("foo.x").type, self.int)
+
+  def test_replace_resets_lookup_cache(self):
+    unit = self._make_unit()
+    self.assertIsNotNone(unit.Get("foo.x"))
+    changed = unit.Replace(constants=(pytd.Constant("foo.y", self.float),))
+    self.assertIsNone(changed.Get("foo.x"))
+    self.assertEqual(changed.Lookup("foo.y").type, self.float)
+
+  def test_visit_keeps_lookup_cache(self):
+    cls = pytd.Class(
+        name="foo.A",
+        keywords=(),
+        bases=(pytd.NamedType("object"),),
+        methods=(),
+        constants=(pytd.Constant("x", self.int),),
+        classes=(),
+        decorators=(),
+        slots=None,
+        template=(),
+    )
+    self.assertIsNotNone(cls.Get("x"))
+    new_cls = cls.Visit(visitors.ReplaceTypesByName({"object": self.float}))
+    self.assertIsNot(new_cls, cls)
+    self.assertIs(new_cls._name2item, cls._name2item)  # pylint: disable=protected-access
+    new_cls = cls.Visit(visitors.ReplaceTypesByName({"int": self.float}))
+    self.assertIsNot(new_cls._name2item, cls._name2item)  # pylint: disable=protected-access
+    self.assertEqual(new_cls.Lookup("x").type, self.float)
+
 
 if __name__ == "__main__":
   unittest.main()
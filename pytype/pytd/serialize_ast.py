@@ -91,6 +91,11 @@ class SerializableAst(msgspec.Struct):
       set.
     src_path: Optionally, the filepath of the original source file.
     metadata: A list of arbitrary string-encoded metadata.
+    function_summaries: Optionally, a TypeDeclUnit with the same name as ast
+      whose functions have one signature for each combination of argument
+      types that the function was seen to be called with. Its ClassType
+      pointers are not filled in by ProcessAst; see
+      load_pytd.Loader.get_function_summary.
   """
 
   ast: pytd.TypeDeclUnit
@@ -99,6 +104,7 @@ class SerializableAst(msgspec.Struct):
   src_path: str | None
   metadata: list[str]
   class_type_nodes: list[pytd.ClassType] | None = None
+  function_summaries: pytd.TypeDeclUnit | None = None
 
   def __post_init__(self):
     # TODO(tsudol): I do not believe we actually use self.class_type_nodes for
@@ -126,36 +132,55 @@ class SerializableAst(msgspec.Struct):
 ModuleBundle = tuple[tuple[str, msgspec.Raw], ...]
 
 
-def SerializeAst(ast, src_path=None, metadata=None) -> SerializableAst:
+def _PrepareUnitForSerialization(ast):
+  if ast.name.endswith(".__init__"):
+    ast = ast.Visit(
+        visitors.RenameModuleVisitor(
+            ast.name, ast.name.rsplit(".__init__", 1)[0]
+        )
+    )
+  ast = ast.Visit(UndoModuleAliasesVisitor())
+  return ast
+
+
+def _CleanUnitForSerialization(ast):
+  # Clean external references
+  ast.Visit(visitors.ClearClassPointers())
+  ast = ast.Visit(visitors.CanonicalOrderingVisitor())
+
+  # Clear out the Lookup caches.
+  ast.Visit(ClearLookupCache())
+  return ast
+
+
+def SerializeAst(
+    ast, src_path=None, metadata=None, function_summaries=None
+) -> SerializableAst:
   """Prepares an AST for serialization.
 
   Args:
     ast: The pytd.TypeDeclUnit to save to disk.
     src_path: Optionally, the filepath of the original source file.
     metadata: A list of arbitrary string-encoded metadata.
+    function_summaries: Optionally, function summaries for `ast`, as returned
+      by PrepareSummariesForExport.
 
   Returns:
     The SerializableAst derived from `ast`.
   """
-  if ast.name.endswith(".__init__"):
-    ast = ast.Visit(
-        visitors.RenameModuleVisitor(
-            ast.name, ast.name.rsplit(".__init__", 1)[0]
-        )
-    )
-  ast = ast.Visit(UndoModuleAliasesVisitor())
+  ast = _PrepareUnitForSerialization(ast)
   # Collect dependencies
   deps = visitors.CollectDependencies()
   ast.Visit(deps)
+  if function_summaries:
+    function_summaries = _PrepareUnitForSerialization(function_summaries)
+    function_summaries.Visit(deps)
   dependencies = deps.dependencies
   late_dependencies = deps.late_dependencies
 
-  # Clean external references
-  ast.Visit(visitors.ClearClassPointers())
-  ast = ast.Visit(visitors.CanonicalOrderingVisitor())
-
-  # Clear out the Lookup caches.
-  ast.Visit(ClearLookupCache())
+  ast = _CleanUnitForSerialization(ast)
+  if function_summaries:
+    function_summaries = _CleanUnitForSerialization(function_summaries)
 
   metadata = metadata or []
 
@@ -165,6 +190,7 @@ def SerializeAst(ast, src_path=None, metadata=None) -> SerializableAst:
       sorted(late_dependencies.items()),
       src_path=src_path,
       metadata=metadata,
+      function_summaries=function_summaries or None,
   )
 
 
@@ -191,6 +217,12 @@ def EnsureAstName(ast, module_name, fix=False):
             visitors.RenameModuleVisitor(raw_ast.name, module_name)
         )
     )
+    if ast.function_summaries:
+      ast = ast.Replace(
+          function_summaries=ast.function_summaries.Visit(
+              visitors.RenameModuleVisitor(raw_ast.name, module_name)
+          )
+      )
   else:
     assert module_name == raw_ast.name
   return ast
@@ -327,6 +359,32 @@ def PrepareForExport(module_name, ast, loader):
   return SourceToExportableAst(module_name, src, loader)
 
 
+def PrepareSummariesForExport(module_name, ast, functions, loader):
+  """Prepare function summaries for export alongside the ast they describe.
+
+  Args:
+    module_name: The module_name as a string for the returned ast.
+    ast: The pytd.TypeDeclUnit of the module, used to resolve local names.
+    functions: A sequence of pytd.Function summaries of functions in ast.
+    loader: A load_pytd.Loader instance.
+
+  Returns:
+    A pytd.TypeDeclUnit named module_name that contains only the summaries.
+  """
+  # Swap the summaries in for the functions they describe, so that they are
+  # prepared in the context of the rest of the module.
+  summaries = {f.name: f for f in functions}
+  ast = ast.Replace(
+      functions=tuple(summaries.get(f.name, f) for f in ast.functions)
+  )
+  prepared = PrepareForExport(module_name, ast, loader)
+  names = {f"{module_name}.{name}" for name in summaries}
+  return pytd_utils.CreateModule(
+      module_name,
+      functions=tuple(f for f in prepared.functions if f.name in names),
+  )
+
+
 def SourceToExportableAst(module_name, src, loader):
   """Parse the source code into a pickle-able ast."""
   ast = parser.parse_string(
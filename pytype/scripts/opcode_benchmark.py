@@ -0,0 +1,96 @@
+"""Benchmark for the VM's opcode dispatch.
+
+Usage: python -m pytype.scripts.opcode_benchmark [--calls N] [--repeat N]
+
+Runs a module that calls a function many times with different arguments, which
+is where the VM's per-instruction bookkeeping adds up. The module is run twice
+with the real VM:
+  * as is, with each code object's instructions decoded once (handler lookup
+    and per-opcode flags) and the decoded plan reused on every later run; and
+  * with every instruction decoded again each time it is executed, the way the
+    VM used to run instructions.
+It reports the time of both runs, how many instructions they executed, and the
+difference per executed instruction.
+"""
+
+import argparse
+import sys
+import textwrap
+import time
+
+from pytype import config
+from pytype import context
+from pytype import load_pytd
+from pytype import metrics
+from pytype import tracer_vm
+from pytype import vm
+
+_SRC = textwrap.dedent("""
+    def f(x, y):
+      z = x
+      for i in range(3):
+        if i:
+          z = z + y
+        else:
+          z = y
+      return [z, x, y]
+""")
+
+
+class _DecodeEachTimeVM(tracer_vm.CallTracer):
+  """A VM that decodes every instruction it runs, instead of using plans."""
+
+  def run_instruction(self, op, state, insn=None):
+    del insn  # run_instruction decodes op when it isn't given a decoding
+    return super().run_instruction(op, state)
+
+
+def _make_src(calls):
+  return _SRC + "".join(f"f({i}, {float(i)})\n" for i in range(calls))
+
+
+def _run(src, vm_class):
+  """Runs src with a fresh VM, and returns how long run_program took."""
+  options = config.Options.create(
+      python_version=sys.version_info[:2], skip_repeat_calls=False
+  )
+  ctx = context.Context(
+      options=options, loader=load_pytd.create_loader(options), src=src
+  )
+  ctx.vm = vm_class(ctx)
+  start = time.perf_counter()
+  ctx.vm.run_program(src, "", maximum_depth=10)
+  return time.perf_counter() - start
+
+
+def main():
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--calls", type=int, default=1000)
+  parser.add_argument("--repeat", type=int, default=5)
+  args = parser.parse_args()
+  src = _make_src(args.calls)
+
+  # Count the instructions run by one execution of the module.
+  metrics._prepare_for_test()  # pylint: disable=protected-access
+  _run(src, tracer_vm.CallTracer)
+  executed = vm._opcode_counter._total  # pylint: disable=protected-access
+  metrics._prepare_for_test(enabled=False)  # pylint: disable=protected-access
+
+  # Alternate between the two VMs, so that they see the same machine load.
+  times = {tracer_vm.CallTracer: [], _DecodeEachTimeVM: []}
+  for _ in range(args.repeat):
+    for vm_class, vm_times in times.items():
+      vm_times.append(_run(src, vm_class))
+  after = min(times[tracer_vm.CallTracer])
+  before = min(times[_DecodeEachTimeVM])
+  print(f"instructions executed:       {executed}")
+  print(f"decoding on each execution:  {before * 1e3:.2f} ms")
+  print(f"decoding once per code:      {after * 1e3:.2f} ms")
+  print(
+      "saved per executed instruction: "
+      f"{(before - after) / executed * 1e9:.0f} ns"
+  )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,82 @@
+"""Attribute the cost of solver queries to the source lines that caused them.
+
+The VM tags every solver query with the opcode it was executing at the time
+(see cfg.Program.query_tag), and SolverProfiler aggregates the tagged query
+metrics into a per-line report. Enable it with --solver-profile=<file>.
+"""
+
+import dataclasses
+
+from pytype.typegraph import cfg
+import tabulate
+
+_UNTAGGED = -1
+
+
+@dataclasses.dataclass
+class LineStats:
+  """Solver cost of the queries issued by one opcode on one line."""
+
+  line: int | None
+  opcode: str | None
+  queries: int = 0
+  nodes_visited: int = 0
+  cache_misses: int = 0
+  time_ns: int = 0
+
+
+class SolverProfiler:
+  """Tags solver queries with the opcode that issued them."""
+
+  def __init__(self, program: cfg.Program):
+    self._program = program
+    self._tags: dict[tuple[int, str], int] = {}
+    self._keys: list[tuple[int, str]] = []
+
+  def enter(self, op) -> int:
+    """Tags subsequent queries with op. Returns the previous tag."""
+    key = (op.line, op.name)
+    tag = self._tags.get(key)
+    if tag is None:
+      tag = self._tags[key] = len(self._keys)
+      self._keys.append(key)
+    prev_tag = self._program.query_tag
+    self._program.query_tag = tag
+    return prev_tag
+
+  def exit(self, prev_tag: int) -> None:
+    """Restores the tag returned by the matching call to enter()."""
+    self._program.query_tag = prev_tag
+
+  def line_stats(self) -> list[LineStats]:
+    """Aggregates query metrics by opcode, most expensive first."""
+    stats: dict[int, LineStats] = {}
+    for solver in self._program.calculate_metrics().solver_metrics:
+      for query in solver.query_metrics:
+        s = stats.get(query.tag)
+        if s is None:
+          if query.tag == _UNTAGGED:
+            s = stats[query.tag] = LineStats(None, None)
+          else:
+            s = stats[query.tag] = LineStats(*self._keys[query.tag])
+        s.queries += 1
+        s.nodes_visited += query.nodes_visited
+        s.cache_misses += not query.from_cache
+        s.time_ns += query.duration_ns
+    return sorted(stats.values(), key=lambda s: s.time_ns, reverse=True)
+
+  def report(self) -> str:
+    """A table of line_stats(), for humans."""
+    rows = [
+        (
+            "-" if s.line is None else s.line,
+            s.opcode or "(no opcode)",
+            s.queries,
+            s.nodes_visited,
+            s.cache_misses,
+            f"{s.time_ns / 1e6:.3f}",
+        )
+        for s in self.line_stats()
+    ]
+    headers = ("line", "opcode", "queries", "nodes", "misses", "time (ms)")
+    return tabulate.tabulate(rows, headers) + "\n"
@@ -0,0 +1,95 @@
+"""Tests for solver_profile.py."""
+
+import dataclasses
+import textwrap
+from unittest import mock
+
+from pytype import context
+from pytype import solver_profile
+from pytype.tests import test_base
+from pytype.typegraph import cfg
+
+import unittest
+
+
+@dataclasses.dataclass
+class FakeOpcode:
+  line: int
+  name: str
+
+
+class SolverProfilerTest(unittest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.prog = cfg.Program()
+    self.n1 = self.prog.NewCFGNode("n1")
+    self.n2 = self.n1.ConnectNew("n2")
+    self.x = self.prog.NewVariable().AddBinding("x", [], self.n1)
+    self.profiler = solver_profile.SolverProfiler(self.prog)
+
+  def test_tags(self):
+    self.assertEqual(self.prog.query_tag, -1)
+    prev = self.profiler.enter(FakeOpcode(3, "LOAD_NAME"))
+    self.assertEqual(prev, -1)
+    tag = self.prog.query_tag
+    # Nested opcodes restore the outer tag when they're done.
+    inner = self.profiler.enter(FakeOpcode(10, "CALL"))
+    self.assertEqual(inner, tag)
+    self.profiler.exit(inner)
+    self.assertEqual(self.prog.query_tag, tag)
+    self.profiler.exit(prev)
+    self.assertEqual(self.prog.query_tag, -1)
+
+  def test_line_stats(self):
+    self.n2.HasCombination([self.x])
+    prev = self.profiler.enter(FakeOpcode(3, "LOAD_NAME"))
+    self.n2.HasCombination([self.x])
+    self.n1.HasCombination([self.x])
+    self.profiler.exit(prev)
+    prev = self.profiler.enter(FakeOpcode(5, "STORE_NAME"))
+    self.n1.HasCombination([self.x])
+    self.profiler.exit(prev)
+    stats = {(s.line, s.opcode): s for s in self.profiler.line_stats()}
+    self.assertCountEqual(
+        stats, [(None, None), (3, "LOAD_NAME"), (5, "STORE_NAME")]
+    )
+    load = stats[(3, "LOAD_NAME")]
+    self.assertEqual(load.queries, 2)
+    self.assertGreater(load.time_ns, 0)
+    self.assertEqual(stats[(5, "STORE_NAME")].queries, 1)
+    self.assertEqual(stats[(None, None)].queries, 1)
+    report = self.profiler.report()
+    self.assertIn("LOAD_NAME", report)
+    self.assertIn("(no opcode)", report)
+
+
+class VmProfilingTest(test_base.BaseTest):
+
+  def test_profile(self):
+    src = textwrap.dedent("""
+        def foo(x: str) -> int:
+          return x + 1
+        a = foo(1)
+    """)
+    self.options.tweak(solver_profile="profile.txt")
+    ctx = context.Context(options=self.options, loader=self.loader, src=src)
+    ctx.vm.run_program(src, "", maximum_depth=10)
+    lines = {s.line for s in ctx.vm.solver_profiler.line_stats()}
+    self.assertTrue(lines & {2, 3, 4})
+
+  def test_tag_restored_after_error(self):
+    self.options.tweak(solver_profile="profile.txt")
+    ctx = context.Context(options=self.options, loader=self.loader, src="")
+
+    class Error(Exception):
+      pass
+
+    with mock.patch.object(ctx.vm, "byte_LOAD_CONST", side_effect=Error):
+      with self.assertRaises(Error):
+        ctx.vm.run_program("x = 1", "", maximum_depth=10)
+    self.assertEqual(ctx.program.query_tag, -1)
+
+
+if __name__ == "__main__":
+  unittest.main()
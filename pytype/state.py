@@ -7,6 +7,7 @@ import logging
 from typing import Any, Union
 
 from pytype import compare
+from pytype import datatypes
 from pytype import metrics
 from pytype import module_utils
 from pytype import utils
@@ -28,13 +29,25 @@ FrameType = Union["SimpleFrame", "Frame"]
 _ContextType = Any
 
 
+_EMPTY_STACK = datatypes.PersistentStack()
+
+
 class FrameState(utils.ContextWeakrefMixin):
-  """Immutable state object, for attaching to opcodes."""
+  """Immutable state object, for attaching to opcodes.
+
+  The data and block stacks are datatypes.PersistentStack objects, so that a
+  stack operation shares everything but the top of the stack with the state it
+  was applied to, rather than copying the whole stack.
+  """
 
   __slots__ = ["block_stack", "data_stack", "node", "exception", "why"]
 
   def __init__(self, data_stack, block_stack, node, ctx, exception, why):
     super().__init__(ctx)
+    if not isinstance(data_stack, datatypes.PersistentStack):
+      data_stack = datatypes.PersistentStack(data_stack)
+    if not isinstance(block_stack, datatypes.PersistentStack):
+      block_stack = datatypes.PersistentStack(block_stack)
     self.data_stack = data_stack
     self.block_stack = block_stack
     self.node = node
@@ -43,7 +56,7 @@ class FrameState(utils.ContextWeakrefMixin):
 
   @classmethod
   def init(cls, node, ctx):
-    return FrameState((), (), node, ctx, False, None)
+    return FrameState(_EMPTY_STACK, _EMPTY_STACK, node, ctx, False, None)
 
   def __setattribute__(self):
     raise AttributeError("States are immutable.")
@@ -70,52 +83,51 @@ class FrameState(utils.ContextWeakrefMixin):
 
   def push(self, *values):
     """Push value(s) onto the value stack."""
-    return self.set_stack(self.data_stack + tuple(values))
+    return self.set_stack(self.data_stack.push(*values))
 
   def peek(self, n):
     """Get a value `n` entries down in the stack, without changing the stack."""
     return self.data_stack[-n]
 
   def top(self):
-    return self.data_stack[-1]
+    return self.data_stack.top()
 
   def topn(self, n):
     if n > 0:
-      return self.data_stack[-n:]
+      return self.data_stack.popn(min(n, len(self.data_stack)))[1]
     else:
       return ()
 
   def pop(self):
     """Pop a value from the value stack."""
-    if not self.data_stack:
-      raise IndexError("Trying to pop from an empty stack")
-    value = self.data_stack[-1]
-    return self.set_stack(self.data_stack[:-1]), value
+    stack, value = self.data_stack.pop()
+    return self.set_stack(stack), value
 
   def pop_and_discard(self):
     """Pop a value from the value stack and discard it."""
-    return self.set_stack(self.data_stack[:-1])
+    if not self.data_stack:
+      return self
+    return self.set_stack(self.data_stack.pop()[0])
 
   def popn(self, n):
     """Return n values, ordered oldest-to-newest."""
     if not n:
       # Not an error: E.g. function calls with no parameters pop zero items
       return self, ()
-    if len(self.data_stack) < n:
-      raise IndexError(
-          "Trying to pop %d values from stack of size %d"
-          % (n, len(self.data_stack))
-      )
-    values = self.data_stack[-n:]
-    return self.set_stack(self.data_stack[:-n]), values
+    stack, values = self.data_stack.popn(n)
+    return self.set_stack(stack), values
 
   def set_top(self, value):
     """Replace top of data stack with value."""
-    return self.set_stack(self.data_stack[:-1] + (value,))
+    stack = self.data_stack.pop()[0] if self.data_stack else self.data_stack
+    return self.set_stack(stack.push(value))
 
   def set_second(self, value):
     """Replace second element of data stack with value."""
-    return self.set_stack(self.data_stack[:-2] + (value, self.data_stack[-1]))
+    stack, top = self.data_stack.pop()
+    if stack:
+      stack = stack.pop()[0]
+    return self.set_stack(stack.push(value, top))
 
   def rotn(self, n):
     """Rotate the top n values by one."""
@@ -124,9 +136,8 @@ class FrameState(utils.ContextWeakrefMixin):
           "Trying to rotate %d values from stack of size %d"
           % (n, len(self.data_stack))
       )
-    top = self.data_stack[-1]
-    rot = self.data_stack[-n:-1]
-    return self.set_stack(self.data_stack[:-n] + (top,) + rot)
+    stack, values = self.data_stack.popn(n)
+    return self.set_stack(stack.push(values[-1], *values[:-1]))
 
   def swap(self, n):
     """Swap the top of the data stack with the value in position n."""
@@ -135,17 +146,14 @@ class FrameState(utils.ContextWeakrefMixin):
           "Trying to swap value %d in stack of size %d"
           % (n, len(self.data_stack))
       )
-    top = self.data_stack[-1]
-    nth = self.data_stack[-n]
-    in_between = self.data_stack[(-n + 1) : -1]
-    rest = self.data_stack[:-n]
-    return self.set_stack(rest + (top,) + in_between + (nth,))
+    stack, values = self.data_stack.popn(n)
+    return self.set_stack(stack.push(values[-1], *values[1:-1], values[0]))
 
   def push_block(self, block):
     """Push a block on to the block stack."""
     return FrameState(
         self.data_stack,
-        self.block_stack + (block,),
+        self.block_stack.push(block),
         self.node,
         self.ctx,
         self.exception,
@@ -154,11 +162,11 @@ class FrameState(utils.ContextWeakrefMixin):
 
   def pop_block(self):
     """Pop a block from the block stack."""
-    block = self.block_stack[-1]
+    block_stack, block = self.block_stack.pop()
     return (
         FrameState(
             self.data_stack,
-            self.block_stack[:-1],
+            block_stack,
             self.node,
             self.ctx,
             self.exception,
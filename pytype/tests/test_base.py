@@ -265,10 +265,16 @@ class BaseTest(unittest.TestCase):
   def assertDiagnosticMessages(self, matcher, expected_errors):
     matcher.assert_diagnostic_messages(expected_errors)
 
-  def _PickleAst(self, ast, module_name):
+  def _PickleAst(self, ast, module_name, function_summaries=()):
     assert module_name
+    if function_summaries:
+      function_summaries = serialize_ast.PrepareSummariesForExport(
+          module_name, ast, function_summaries, self.loader
+      )
     ast = serialize_ast.PrepareForExport(module_name, ast, self.loader)
-    return pickle_utils.Serialize(ast)
+    return pickle_utils.Serialize(
+        ast, function_summaries=function_summaries or None
+    )
 
   def _PickleSource(self, src, module_name):
     ast = serialize_ast.SourceToExportableAst(
@@ -287,7 +293,7 @@ class BaseTest(unittest.TestCase):
       **kwargs,
   ):
     """Runs inference on srccode."""
-    types, deps = self._InferAndVerify(
+    types, deps, function_summaries = self._InferAndVerify(
         _Format(srccode),
         pythonpath=pythonpath,
         analyze_annotated=analyze_annotated,
@@ -305,7 +311,7 @@ class BaseTest(unittest.TestCase):
     )
     types = pytd_utils.CanonicalOrdering(types)
     if pickle:
-      return self._PickleAst(types, module_name)
+      return self._PickleAst(types, module_name, function_summaries)
     else:
       return types
 
@@ -338,7 +344,8 @@ class BaseTest(unittest.TestCase):
     Raises:
       AssertionError: If report_errors is True and we found errors.
     Returns:
-      A pytd.TypeDeclUnit
+      A tuple of the pytd.TypeDeclUnit, its dependencies and its function
+      summaries.
     """
     self.ConfigureOptions(
         module_name=module_name,
@@ -359,7 +366,7 @@ class BaseTest(unittest.TestCase):
     if report_errors and errorlog:
       errorlog.print_to_stderr()
       self.fail(f"Inferencer found {len(errorlog)} errors:\n{errorlog}")
-    return unit, ret.ast_deps
+    return unit, ret.ast_deps, ret.function_summaries
 
   def assertTypesMatchPytd(self, ty, pytd_src):
     """Parses pytd_src and compares with ty."""
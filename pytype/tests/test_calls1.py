@@ -1,10 +1,12 @@
 """Tests for calling other functions, and the corresponding checks."""
 
+from pytype.abstract import _interpreter_function
 from pytype.tests import test_base
 from pytype.tests import test_utils
+from pytype.typegraph import cfg_utils
 
 
-class CallsTest(test_base.BaseTest):
+class CallsTest(test_base.BaseTest, test_utils.MetricsTestMixin):
   """Tests for checking function calls."""
 
   def test_optional(self):
@@ -123,6 +125,166 @@ class CallsTest(test_base.BaseTest):
       )
       self.assertErrorRegexes(errors, {"e": r"\bz\b"})
 
+  def test_widen_call_result(self):
+    # pylint: disable=protected-access
+    widened_variables = cfg_utils._widened_variables
+    widened_bindings = cfg_utils._widened_bindings
+    # pylint: enable=protected-access
+    self.enable_metrics(widened_variables, widened_bindings)
+    self.options.tweak(widen_variables=2)
+    ty = self.Infer("""
+      def f1():
+        return int()
+      def f2():
+        return int()
+      def f3():
+        return int()
+      def f4():
+        return str()
+      x = (f1 if __random__ else f2 if __random__ else
+           f3 if __random__ else f4)()
+    """)
+    self.assertTypesMatchPytd(
+        ty,
+        """
+      from typing import Union
+      x: Union[int, str]
+      def f1() -> int: ...
+      def f2() -> int: ...
+      def f3() -> int: ...
+      def f4() -> str: ...
+    """,
+    )
+    # The four results of the call were widened to one binding per type.
+    self.assertEqual(self.get_count(widened_variables), 1)
+    self.assertEqual(self.get_count(widened_bindings), 2)
+
+  def test_widen_instances_with_different_attributes(self):
+    # pylint: disable=protected-access
+    widened_bindings = cfg_utils._widened_bindings
+    # pylint: enable=protected-access
+    self.enable_metrics(widened_bindings)
+    self.options.tweak(widen_variables=2)
+    self.Check("""
+      from typing import Union
+      class A:
+        pass
+      def f1():
+        a = A()
+        a.x = 0
+        return a
+      def f2():
+        a = A()
+        a.x = 0
+        return a
+      def f3():
+        a = A()
+        a.x = ''
+        return a
+      a = (f1 if __random__ else f2 if __random__ else f3)()
+      assert_type(a.x, Union[int, str])
+    """)
+    # Only the two instances with an int attribute were merged.
+    self.assertEqual(self.get_count(widened_bindings), 1)
+
+
+class CallCacheTest(test_base.BaseTest, test_utils.MetricsTestMixin):
+  """Tests for reusing the results of previous calls."""
+
+  def setUp(self):
+    super().setUp()
+    # pylint: disable=protected-access
+    self._hits = _interpreter_function._call_cache_hits
+    self._misses = _interpreter_function._call_cache_misses
+    # pylint: enable=protected-access
+    self.enable_metrics(self._hits, self._misses)
+
+  def _counts(self, name):
+    return self.get_count(self._hits, name), self.get_count(self._misses, name)
+
+  def _infer_with_counts(self, src, name):
+    hits, misses = self._counts(name)
+    ty = self.Infer(src)
+    new_hits, new_misses = self._counts(name)
+    return ty, new_hits - hits, new_misses - misses
+
+  def test_exact_keys(self):
+    _, hits, misses = self._infer_with_counts(
+        """
+      class A:
+        def __init__(self, v):
+          self.v = v
+      def wrap(x):
+        return [x.__class__, 0]
+      a = wrap(A(''))
+      b = wrap(A('b'))
+    """,
+        "wrap",
+    )
+    self.assertEqual((hits, misses), (0, 3))
+
+  def test_abstract_keys(self):
+    self.options.tweak(abstract_call_keys=True)
+    ty, hits, misses = self._infer_with_counts(
+        """
+      class A:
+        def __init__(self, v):
+          self.v = v
+      def count(x, y):
+        return len([x, y])
+      a = count(A(''), A(''))
+      b = count(A('b'), A('b'))
+      c = count(A(''), 0)
+    """,
+        "count",
+    )
+    self.assertEqual((hits, misses), (1, 3))
+    self.assertTypesMatchPytd(
+        ty,
+        """
+      from typing import Any
+      class A:
+        v: Any
+        def __init__(self, v) -> None: ...
+      def count(x, y) -> int: ...
+      a: int
+      b: int
+      c: int
+    """,
+    )
+
+  def test_abstract_keys_identity(self):
+    self.options.tweak(abstract_call_keys=True)
+    _, hits, _ = self._infer_with_counts(
+        """
+      class A:
+        def __init__(self, v):
+          self.v = v
+      def same(x, y):
+        return x is y
+      a = same(A(''), A(''))
+      b = same(A('b'), A('b'))
+    """,
+        "same",
+    )
+    self.assertEqual(hits, 0)
+
+  def test_abstract_keys_return_argument(self):
+    self.options.tweak(abstract_call_keys=True)
+    _, hits, _ = self._infer_with_counts(
+        """
+      class A:
+        def __init__(self, v):
+          self.v = v
+      def box(x):
+        return [x]
+      a = box(A(''))
+      b = box(A('b'))
+    """,
+        "box",
+    )
+    self.assertEqual(hits, 0)
+
 
 if __name__ == "__main__":
   test_base.main()
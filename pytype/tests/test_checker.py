@@ -189,6 +189,64 @@ class CheckerTest(test_base.BaseTest):
         },
     )
 
+  def test_analyze_workers(self):
+    self.options.tweak(analyze_workers=3)
+    errorlog = self.CheckWithErrors("""
+      import functools
+      def f1() -> int:
+        return ''  # bad-return-type[e1]
+      def f2(x: str):
+        return x + 1  # unsupported-operands
+      class A:
+        def f(self) -> str:
+          return 0  # bad-return-type[e2]
+      def f3():
+        class B:
+          def g(self) -> int:
+            return ''  # bad-return-type
+        return B
+      def deco(f):
+        return functools.wraps(f)(lambda: f())
+      @deco
+      def f4() -> int:
+        return ''  # bad-return-type
+      def f5(x: int):
+        return f1() + x
+    """)
+    self.assertErrorRegexes(
+        errorlog, {"e1": r"Expected: int", "e2": r"Expected: str"}
+    )
+
+  def test_function_budget(self):
+    self.options.tweak(function_budget=50)
+    errorlog = self.CheckWithErrors("""
+      from typing import Any
+      def cheap(x):
+        return x + 1
+      def expensive(x):  # analysis-budget-exceeded[e1]
+        y = [cheap(x)]
+        y = y + [cheap(y[0])]
+        y = y + [cheap(y[1])]
+        y = y + [cheap(y[2])]
+        y = y + [cheap(y[3])]
+        y = y + [cheap(y[4])]
+        y = y + [cheap(y[5])]
+        y = y + [cheap(y[6])]
+        return y
+      def annotated(x) -> str:  # analysis-budget-exceeded[e2]
+        return str(expensive(x))
+      assert_type(cheap(0), int)
+      assert_type(expensive(0), Any)
+      assert_type(annotated(0), str)
+    """)
+    self.assertErrorRegexes(
+        errorlog,
+        {
+            "e1": r"expensive.*budget.*annotated return type, or Any",
+            "e2": r"annotated.*budget",
+        },
+    )
+
 
 if __name__ == "__main__":
   test_base.main()
@@ -1,6 +1,8 @@
 """Tests for loading and saving pickled files."""
 
+import msgspec
 from pytype.imports import pickle_utils
+from pytype.pytd import pytd
 from pytype.pytd import visitors
 from pytype.tests import test_base
 from pytype.tests import test_utils
@@ -275,6 +277,125 @@ class PickleTest(test_base.BaseTest):
           pass
       """)
 
+  def test_function_summaries(self):
+    self.options.tweak(function_summaries=True)
+    pickled = self.Infer(
+        """
+      class A:
+        pass
+      def f(x):
+        if isinstance(x, int):
+          return A()
+        return x
+      def g():
+        return f(0), f('')
+    """,
+        pickle=True,
+        module_name="foo",
+    )
+    summaries = pickle_utils.DecodeAst(pickled).function_summaries
+    self.assertEqual(
+        [f.name for f in summaries.functions], ["foo.f", "foo.g"]
+    )
+    with test_utils.Tempdir() as d:
+      foo = d.create_file("foo.pickled", pickled)
+      ty = self.Infer(
+          """
+        import foo
+        a = foo.f(0)
+        b = foo.f('')
+        c = foo.f(0.0)
+      """,
+          imports_map={"foo": foo},
+      )
+      self.assertTypesMatchPytd(
+          ty,
+          """
+        import foo
+        from typing import Union
+        a: foo.A
+        b: str
+        c: Union[float, foo.A]
+      """,
+      )
+
+  def test_function_summaries_reassigned_global(self):
+    self.options.tweak(function_summaries=True)
+    pickled = self.Infer(
+        """
+      MODE = None
+      def get(x):
+        return MODE
+      get(0)
+      MODE = 'a'
+      def use():
+        return get(0)
+    """,
+        pickle=True,
+        module_name="foo",
+    )
+    summaries = pickle_utils.DecodeAst(pickled).function_summaries
+    self.assertEqual([f.name for f in summaries.functions], ["foo.use"])
+    with test_utils.Tempdir() as d:
+      foo = d.create_file("foo.pickled", pickled)
+      ty = self.Infer(
+          """
+        import foo
+        v = foo.get(0)
+        w = foo.use()
+      """,
+          imports_map={"foo": foo},
+      )
+      self.assertTypesMatchPytd(
+          ty,
+          """
+        import foo
+        v: str
+        w: str
+      """,
+      )
+
+  def test_function_summaries_incompatible_return(self):
+    self.options.tweak(function_summaries=True)
+    pickled = self.Infer(
+        """
+      def f(x):
+        return str(x)
+      def g():
+        return f(0)
+    """,
+        pickle=True,
+        module_name="foo",
+    )
+    data = pickle_utils.DecodeAst(pickled)
+    summaries = data.function_summaries
+    f = summaries.Lookup("foo.f")
+    stale = f.Replace(
+        signatures=tuple(
+            sig.Replace(return_type=pytd.ClassType("builtins.int"))
+            for sig in f.signatures
+        )
+    )
+    data = msgspec.structs.replace(
+        data, function_summaries=summaries.Replace(functions=(stale,))
+    )
+    with test_utils.Tempdir() as d:
+      foo = d.create_file("foo.pickled", pickle_utils.Encode(data))
+      ty = self.Infer(
+          """
+        import foo
+        v = foo.f(0)
+      """,
+          imports_map={"foo": foo},
+      )
+      self.assertTypesMatchPytd(
+          ty,
+          """
+        import foo
+        v: str
+      """,
+      )
+
 
 if __name__ == "__main__":
   test_base.main()
@@ -18,6 +18,7 @@ from pytype import config
 from pytype import context
 from pytype import file_utils
 from pytype import load_pytd
+from pytype import metrics
 from pytype import pretty_printer_base
 from pytype import state as frame_state
 from pytype import utils
@@ -308,6 +309,35 @@ class MakeCodeMixin:
     )
 
 
+class MetricsTestMixin:
+  """Mixin providing utilities for tests of metrics counters.
+
+  Counters are module-level objects that keep their counts across tests, so
+  tests that check them reset them first.
+  """
+
+  _HAS_DYNAMIC_ATTRIBUTES = True
+
+  # pylint: disable=protected-access
+
+  def enable_metrics(self, *counters):
+    """Collects metrics until the end of the test, starting from zero."""
+    metrics._prepare_for_test()
+    self.addCleanup(metrics._prepare_for_test, enabled=False)
+    for counter in counters:
+      if isinstance(counter, metrics.MapCounter):
+        counter._counts.clear()
+      counter._total = 0
+
+  def get_count(self, counter, key=None):
+    """Gets the total of a counter, or the count of one key of a MapCounter."""
+    if key is None:
+      return counter._total
+    return counter._counts.get(key, 0)
+
+  # pylint: enable=protected-access
+
+
 class RegexMatcher:
   """Match a regex."""
 
@@ -4,18 +4,22 @@ import collections
 from collections.abc import Sequence
 import dataclasses
 import enum
+import itertools
 import logging
 import re
 from typing import Any, Union
 
 import attrs
+from pytype import fork_utils
 from pytype import state as frame_state
 from pytype import vm
 from pytype.abstract import abstract
 from pytype.abstract import abstract_utils
 from pytype.abstract import function
+from pytype.blocks import blocks
 from pytype.overlays import special_builtins
 from pytype.overlays import typing_overlay
+from pytype.pyc import opcodes
 from pytype.pytd import escape
 from pytype.pytd import optimize
 from pytype.pytd import pytd
@@ -556,46 +560,135 @@ class CallTracer(vm.VirtualMachine):
         and not _SKIP_FUNCTION_RE.search(data.name)
     )
 
-  def analyze_toplevel(self, node, defs):
-    for name, var in sorted(defs.items()):  # sort, for determinicity
-      if not self._is_typing_member(name, var):
-        for value in var.bindings:
-          if isinstance(value.data, abstract.InterpreterClass):
-            new_node = self.analyze_class(node, value)
-          elif (
-              isinstance(value.data, abstract.INTERPRETER_FUNCTION_TYPES)
-              and not value.data.is_overload
-          ):
-            new_node = self.analyze_function(node, value)
-          else:
-            continue
-          new_node.ConnectTo(node)
-    # Now go through all functions and classes we haven't analyzed yet.
+  def _toplevel_defs(self, defs):
+    return [
+        (name, var)
+        for name, var in sorted(defs.items())  # sort, for determinicity
+        if not self._is_typing_member(name, var)
+    ]
+
+  def _analyze_defs(self, node, toplevel_defs):
+    for _, var in toplevel_defs:
+      for value in var.bindings:
+        if isinstance(value.data, abstract.InterpreterClass):
+          new_node = self.analyze_class(node, value)
+        elif (
+            isinstance(value.data, abstract.INTERPRETER_FUNCTION_TYPES)
+            and not value.data.is_overload
+        ):
+          new_node = self.analyze_function(node, value)
+        else:
+          continue
+        new_node.ConnectTo(node)
+
+  def _analyze_remaining(self, node, first_class=0, first_function=0):
+    """Analyzes the traced functions and classes we haven't analyzed yet."""
     # These are typically hidden under a decorator.
     # Go through classes first so that the `is_attribute_of_class` will
     # be set for all functions in class.
-    for c in self._interpreter_classes:
+    for c in itertools.islice(self._interpreter_classes, first_class, None):
       for value in c.bindings:
         if (
             isinstance(value.data, abstract.InterpreterClass)
             and value.data not in self._analyzed_classes
         ):
           node = self.analyze_class(node, value)
-    for f in self._interpreter_functions:
+    for f in itertools.islice(
+        self._interpreter_functions, first_function, None
+    ):
       for value in f.bindings:
         if self._should_analyze_as_interpreter_function(value.data):
           node = self.analyze_function(node, value)
-    for func, opcode in self.functions_type_params_check:
+    return node
+
+  def _check_type_parameters(self, first_check=0):
+    for func, opcode in itertools.islice(
+        self.functions_type_params_check, first_check, None
+    ):
       func.signature.check_type_parameters(
           self.simple_stack(opcode), opcode, func.is_attribute_of_class
       )
+
+  def analyze_toplevel(self, node, defs):
+    self._analyze_defs(node, self._toplevel_defs(defs))
+    node = self._analyze_remaining(node)
+    self._check_type_parameters()
     return node
 
-  def analyze(self, node, defs, maximum_depth):
+  def _analyze_partition(self, node, toplevel_defs):
+    """Runs in a forked worker. See analyze_toplevel_in_workers."""
+    first_error = len(self.ctx.errorlog)
+    first_class = len(self._interpreter_classes)
+    first_function = len(self._interpreter_functions)
+    first_check = len(self.functions_type_params_check)
+    self._analyze_defs(node, toplevel_defs)
+    # The parent takes care of the functions and classes that it knows about,
+    # so we only look at the ones that were defined while analyzing.
+    node = self._analyze_remaining(node, first_class, first_function)
+    self._check_type_parameters(first_check)
+    errors = list(self.ctx.errorlog)[first_error:]
+    # Objects that existed before the fork have the same id in the parent.
+    analyzed_classes = {id(cls) for cls in self._analyzed_classes}
+    analyzed_functions = {id(op) for op in self._analyzed_functions}
+    return errors, analyzed_classes, analyzed_functions
+
+  def analyze_toplevel_in_workers(self, node, defs, num_workers):
+    """Like analyze_toplevel, but splits the work across forked workers.
+
+    Each worker analyzes a slice of the top-level definitions, starting from
+    the state after module loading. The parent collects their errors and then
+    analyzes the functions and classes that no worker got to. The analysis
+    results of the workers are discarded, so this is only suitable for
+    checking. Partitioning and merging are deterministic.
+
+    Args:
+      node: The CFG node to analyze from.
+      defs: The top-level definitions.
+      num_workers: The maximum number of workers to fork.
+
+    Returns:
+      The CFG node after the analysis.
+    """
+    toplevel_defs = self._toplevel_defs(defs)
+    num_workers = min(num_workers, len(toplevel_defs))
+    if num_workers < 2 or not fork_utils.can_fork():
+      return self.analyze_toplevel(node, defs)
+    partitions = [toplevel_defs[i::num_workers] for i in range(num_workers)]
+    results = fork_utils.fork_map(
+        self._analyze_partition, [(node, p) for p in partitions]
+    )
+    analyzed_classes = set()
+    analyzed_functions = set()
+    for partition, result in zip(partitions, results):
+      if result is None:
+        log.error("Analysis worker failed; analyzing its share serially")
+        self._analyze_defs(node, partition)
+        continue
+      errors, classes, functions = result
+      self.ctx.errorlog.extend(errors)
+      analyzed_classes |= classes
+      analyzed_functions |= functions
+    for c in self._interpreter_classes:
+      for value in c.bindings:
+        if id(value.data) in analyzed_classes:
+          self._analyzed_classes.add(value.data)
+    for f in self._interpreter_functions:
+      for value in f.bindings:
+        if isinstance(value.data, abstract.InterpreterFunction):
+          op = value.data.get_first_opcode()
+          if id(op) in analyzed_functions:
+            self._analyzed_functions.add(op)
+    node = self._analyze_remaining(node)
+    self._check_type_parameters()
+    return node
+
+  def analyze(self, node, defs, maximum_depth, num_workers=None):
     assert not self.frame
     self._maximum_depth = maximum_depth
     self._analyzing = True
     node = node.ConnectNew(name="Analyze")
+    if num_workers:
+      return self.analyze_toplevel_in_workers(node, defs, num_workers)
     return self.analyze_toplevel(node, defs)
 
   def trace_unknown(self, name, unknown_binding):
@@ -834,6 +927,52 @@ class CallTracer(vm.VirtualMachine):
       )
     return classes
 
+  def _reassigned_globals(self):
+    """Module globals that are stored more than once or from a function."""
+    stores = collections.Counter()
+    for code in self.block_graph.graph.values():
+      for op in code.code_iter:
+        if isinstance(op, (opcodes.STORE_GLOBAL, opcodes.DELETE_GLOBAL)):
+          # Functions can change the global after the module has loaded.
+          stores[op.argval] += 2
+        elif code.name == "<module>" and isinstance(
+            op, (opcodes.STORE_NAME, opcodes.DELETE_NAME)
+        ):
+          stores[op.argval] += 1
+    return {name for name, count in stores.items() if count > 1}
+
+  def _reads_globals(self, code, names):
+    """Whether code or the code nested in it loads one of the given globals."""
+    for op in code.code_iter:
+      if (
+          isinstance(op, (opcodes.LOAD_GLOBAL, opcodes.LOAD_NAME))
+          and op.argval in names
+      ):
+        return True
+    return any(
+        self._reads_globals(c, names)
+        for c in code.consts
+        if isinstance(c, blocks.OrderedCode)
+    )
+
+  def pytd_functions_for_summaries(self, defs):
+    """Summaries of the calls made to module-level functions."""
+    functions = []
+    # The result of a function that reads such a global depends on when it is
+    # called, so it can't be summarized by its argument types.
+    reassigned = self._reassigned_globals()
+    for name, var in sorted(defs.items()):
+      if self._skip_definition_export(name, var) or len(var.data) != 1:
+        continue
+      value = var.data[0]
+      if isinstance(
+          value, abstract.InterpreterFunction
+      ) and not self._reads_globals(value.code, reassigned):
+        f = self.ctx.pytd_convert.function_summary_to_def(value, name)
+        if f:
+          functions.append(f)
+    return tuple(functions)
+
   def compute_types(self, defs):
     classes = tuple(self.pytd_classes_for_unknowns()) + tuple(
         self.pytd_classes_for_call_traces()
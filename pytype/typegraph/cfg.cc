@@ -5,6 +5,7 @@
 
 #include <cstddef>
 #include <string>
+#include <thread>
 #include <unordered_map>
 #include <utility>
 #include <vector>
@@ -46,6 +47,7 @@ static PyObject* k_next_variable_id;
 static PyObject* k_next_binding_id;
 static PyObject* k_condition;
 static PyObject* k_default_data;
+static PyObject* k_query_tag;
 
 // String constants for __dir__, Initialized on module init.
 // Program
@@ -53,6 +55,9 @@ static PyObject *k_NewCFGNode;
 static PyObject *k_NewVariable;
 static PyObject *k_is_reachable;
 static PyObject *k_calculate_metrics;
+static PyObject *k_calculate_counters;
+static PyObject *k_compact;
+static PyObject *k_solve_batch;
 
 // CFGNode
 static PyObject *k_ConnectNew;
@@ -323,6 +328,8 @@ static PyObject* ProgramGetAttro(PyObject* self, PyObject* attr) {
     }
     Py_INCREF(data);
     return data;
+  } else if (PyObject_RichCompareBool(attr, k_query_tag, Py_EQ) > 0) {
+    return PyLong_FromLongLong(program->program->query_tag());
   }
   return PyObject_GenericGetAttr(self, attr);
 }
@@ -332,7 +339,13 @@ static int ProgramSetAttro(PyObject* self, PyObject* attr, PyObject* val) {
   CHECK(Py_TYPE(self) == &PyProgram);
   PyProgramObj* program = reinterpret_cast<PyProgramObj*>(self);
 
-  if (PyObject_RichCompareBool(attr, k_entrypoint, Py_EQ) > 0) {
+  // The query tag is set often while profiling, so check for it first.
+  if (PyObject_RichCompareBool(attr, k_query_tag, Py_EQ) > 0) {
+    long long tag = PyLong_AsLongLong(val);
+    if (tag == -1 && PyErr_Occurred()) return -1;
+    program->program->set_query_tag(tag);
+    return 0;
+  } else if (PyObject_RichCompareBool(attr, k_entrypoint, Py_EQ) > 0) {
     if (Py_TYPE(val) == &PyCFGNode) {
       PyCFGNodeObj* cfg_node = reinterpret_cast<PyCFGNodeObj*>(val);
       program->program->set_entrypoint(cfg_node->cfg_node);
@@ -511,6 +524,107 @@ static PyObject* calculate_metrics(PyProgramObj* self, PyObject* _args) {
   return pybind11::cast(data).release().ptr();
 }
 
+PyDoc_STRVAR(calculate_counters_doc,
+             "Get the program's running totals. Much cheaper than "
+             "calculate_metrics().");
+
+static PyObject* calculate_counters(PyProgramObj* self, PyObject* _args) {
+  auto data = self->program->CalculateCounters();
+  return pybind11::cast(data).release().ptr();
+}
+
+PyDoc_STRVAR(
+    compact_doc,
+    "Delete the variables and bindings that Python can no longer reach.\n\n"
+    "Every Variable or Binding that still has a Python object, and every "
+    "binding used as a CFG node condition, is live, as is everything in the "
+    "source sets of live bindings. Everything else is deleted, and is no "
+    "longer listed in CFGNode.bindings or Program.variables. Returns the "
+    "number of deleted variables; calculate_metrics() reports the totals.");
+
+static PyObject* compact(PyProgramObj* self, PyObject* _args) {
+  // The wrapper cache holds exactly the objects that Python code still
+  // references, so it provides the roots.
+  std::vector<const typegraph::Variable*> live_variables;
+  for (const auto& [key, obj] : *self->cache) {
+    if (Py_TYPE(obj) == &PyVariable) {
+      live_variables.push_back(reinterpret_cast<PyVariableObj*>(obj)->u);
+    } else if (Py_TYPE(obj) == &PyBinding) {
+      live_variables.push_back(
+          reinterpret_cast<PyBindingObj*>(obj)->attr->variable());
+    }
+  }
+  return PyLong_FromSize_t(self->program->Compact(live_variables));
+}
+
+PyDoc_STRVAR(
+    solve_batch_doc,
+    "solve_batch([(node, [binding, ...]), ...], max_workers=None) -> list\n\n"
+    "Equivalent to [node.HasCombination(bindings) for node, bindings in "
+    "queries], but the queries are solved without holding the GIL, and on up "
+    "to max_workers threads (default: the number of CPUs). The queries must "
+    "be independent; the program can't be modified while they are solved.");
+
+static PyObject* solve_batch(PyProgramObj* self,
+                             PyObject* args, PyObject* kwargs) {
+  static const char* kwlist[] = {"queries", "max_workers", nullptr};
+  PyObject* py_queries;
+  PyObject* max_workers_obj = Py_None;
+  if (!SafeParseTupleAndKeywords(args, kwargs, "O|O", kwlist, &py_queries,
+                                 &max_workers_obj))
+    return nullptr;
+  std::size_t num_threads = std::thread::hardware_concurrency();
+  if (max_workers_obj != Py_None) {
+    num_threads = PyLong_AsSize_t(max_workers_obj);
+    if (PyErr_Occurred()) return nullptr;
+  }
+  PyObject* seq = PySequence_Fast(py_queries, "queries must be a sequence");
+  if (!seq) return nullptr;
+  Py_ssize_t length = PySequence_Fast_GET_SIZE(seq);
+  std::vector<typegraph::SolverQuery> queries(length);
+  for (Py_ssize_t i = 0; i < length; i++) {
+    PyObject* item = PySequence_Fast_GET_ITEM(seq, i);
+    PyCFGNodeObj* node;
+    PyObject* list;
+    if (!PyTuple_Check(item) ||
+        !PyArg_ParseTuple(item, "O!O!", &PyCFGNode, &node, &PyList_Type,
+                          &list)) {
+      PyErr_Clear();
+      PyErr_SetString(PyExc_TypeError,
+                      "queries must be (CFGNode, list of Binding) tuples");
+      Py_DECREF(seq);
+      return nullptr;
+    }
+    if (!VerifyListOfBindings(list, self)) {
+      Py_DECREF(seq);
+      return nullptr;
+    }
+    queries[i].node = node->cfg_node;
+    Py_ssize_t n = PyList_GET_SIZE(list);
+    queries[i].bindings.reserve(n);
+    for (Py_ssize_t j = 0; j < n; j++) {
+      queries[i].bindings.push_back(
+          reinterpret_cast<PyBindingObj*>(PyList_GET_ITEM(list, j))->attr);
+    }
+  }
+  Py_DECREF(seq);
+  std::vector<bool> results;
+#ifdef PYTYPE_ENABLE_CPP_LOGGING
+  // The solver logs through Python, so it needs the GIL.
+  results = self->program->SolveBatch(queries, 1);
+#else
+  Py_BEGIN_ALLOW_THREADS
+  results = self->program->SolveBatch(queries, num_threads);
+  Py_END_ALLOW_THREADS
+#endif
+  PyObject* py_results = PyList_New(length);
+  for (Py_ssize_t i = 0; i < length; i++) {
+    PyObject* result = results[i] ? Py_True : Py_False;
+    Py_INCREF(result);
+    PyList_SET_ITEM(py_results, i, result);
+  }
+  return py_results;
+}
 
 PyDoc_STRVAR(
     program_dir_doc,
@@ -526,12 +640,16 @@ static PyObject* ProgramDir(PyVariableObj* self, PyObject* args,
   PyList_Append(list, k_next_variable_id);
   PyList_Append(list, k_next_binding_id);
   PyList_Append(list, k_default_data);
+  PyList_Append(list, k_query_tag);
 
   // methods
   PyList_Append(list, k_NewCFGNode);
   PyList_Append(list, k_NewVariable);
   PyList_Append(list, k_is_reachable);
   PyList_Append(list, k_calculate_metrics);
+  PyList_Append(list, k_calculate_counters);
+  PyList_Append(list, k_compact);
+  PyList_Append(list, k_solve_batch);
   return list;
 }
 
@@ -544,6 +662,12 @@ static PyMethodDef program_methods[] = {
    METH_VARARGS|METH_KEYWORDS, is_reachable_doc},
   {"calculate_metrics", reinterpret_cast<PyCFunction>(calculate_metrics),
    METH_NOARGS, calculate_metrics_doc},
+  {"calculate_counters", reinterpret_cast<PyCFunction>(calculate_counters),
+   METH_NOARGS, calculate_counters_doc},
+  {"compact", reinterpret_cast<PyCFunction>(compact),
+   METH_NOARGS, compact_doc},
+  {"solve_batch", reinterpret_cast<PyCFunction>(solve_batch),
+   METH_VARARGS|METH_KEYWORDS, solve_batch_doc},
   {"__dir__", reinterpret_cast<PyCFunction>(ProgramDir),
     METH_VARARGS | METH_KEYWORDS, program_dir_doc},
   {0, 0, 0, nullptr}  // sentinel
@@ -1631,6 +1755,8 @@ static PyObject* InitModule(PyObject* module) {
   k_condition = PyUnicode_FromString("condition");
   Py_XDECREF(k_default_data);
   k_default_data = PyUnicode_FromString("default_data");
+  Py_XDECREF(k_query_tag);
+  k_query_tag = PyUnicode_FromString("query_tag");
 
   // Program
   Py_XDECREF(k_NewCFGNode);
@@ -1641,6 +1767,12 @@ static PyObject* InitModule(PyObject* module) {
   k_is_reachable = PyUnicode_FromString("is_reachable");
   Py_XDECREF(k_calculate_metrics);
   k_calculate_metrics = PyUnicode_FromString("calculate_metrics");
+  Py_XDECREF(k_calculate_counters);
+  k_calculate_counters = PyUnicode_FromString("calculate_counters");
+  Py_XDECREF(k_compact);
+  k_compact = PyUnicode_FromString("compact");
+  Py_XDECREF(k_solve_batch);
+  k_solve_batch = PyUnicode_FromString("solve_batch");
   // CFGNode
   Py_XDECREF(k_ConnectNew);
   k_ConnectNew = PyUnicode_FromString("ConnectNew");
@@ -1717,6 +1849,9 @@ PYBIND11_MODULE(cfg, m) {
                              &typegraph::QueryMetrics::shortcircuited)
       .def_property_readonly("from_cache",
                              &typegraph::QueryMetrics::from_cache)
+      .def_property_readonly("tag", &typegraph::QueryMetrics::tag)
+      .def_property_readonly("duration_ns",
+                             &typegraph::QueryMetrics::duration_ns)
       .def_property_readonly("steps", &typegraph::QueryMetrics::steps);
 
   pybind11::class_<typegraph::CacheMetrics>(m, "CacheMetrics")
@@ -1738,7 +1873,29 @@ PYBIND11_MODULE(cfg, m) {
       .def_property_readonly("variable_metrics",
                              &typegraph::Metrics::variable_metrics)
       .def_property_readonly("solver_metrics",
-                             &typegraph::Metrics::solver_metrics);
+                             &typegraph::Metrics::solver_metrics)
+      .def_property_readonly("collected_variable_count",
+                             &typegraph::Metrics::collected_variable_count)
+      .def_property_readonly("collected_binding_count",
+                             &typegraph::Metrics::collected_binding_count);
+
+  pybind11::class_<typegraph::ProgramCounters>(m, "ProgramCounters")
+      .def_readonly("cfg_node_count",
+                    &typegraph::ProgramCounters::cfg_node_count)
+      .def_readonly("variable_count",
+                    &typegraph::ProgramCounters::variable_count)
+      .def_readonly("binding_count", &typegraph::ProgramCounters::binding_count)
+      .def_readonly("origin_count", &typegraph::ProgramCounters::origin_count)
+      .def_readonly("solver_count", &typegraph::ProgramCounters::solver_count)
+      .def_readonly("query_count", &typegraph::ProgramCounters::query_count)
+      .def_readonly("state_cache_hits",
+                    &typegraph::ProgramCounters::state_cache_hits)
+      .def_readonly("state_cache_misses",
+                    &typegraph::ProgramCounters::state_cache_misses)
+      .def_readonly("state_cache_size",
+                    &typegraph::ProgramCounters::state_cache_size)
+      .def_readonly("path_cache_size",
+                    &typegraph::ProgramCounters::path_cache_size);
 
   PyType_Ready(&PyProgram);
   PyType_Ready(&PyCFGNode);
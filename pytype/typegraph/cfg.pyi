@@ -8,11 +8,15 @@ class Program:
   entrypoint: CFGNode
   next_variable_id: int
   next_binding_id: int
+  query_tag: int
 
   def NewCFGNode(self, name: Optional[str] = ..., condition: Binding = ...) -> CFGNode: ...
   def NewVariable(self, bindings: Optional[Iterable[BindingData]] = ..., source_set: Optional[Iterable[Binding]] = ..., where: Optional[CFGNode] = ...) -> Variable: ...
   def is_reachable(self, src: CFGNode, dst: CFGNode) -> bool: ...
   def calculate_metrics(self) -> Metrics: ...
+  def calculate_counters(self) -> ProgramCounters: ...
+  def compact(self) -> int: ...
+  def solve_batch(self, queries: list[tuple[CFGNode, list[Binding]]], max_workers: Optional[int] = ...) -> list[bool]: ...
 
 class CFGNode:
   id: int
@@ -84,6 +88,8 @@ class QueryMetrics:
   total_binding_count: int
   shortcircuited: bool
   from_cache: bool
+  tag: int
+  duration_ns: int
   steps: list[QueryStep]
 
 class CacheMetrics:
@@ -100,3 +106,17 @@ class Metrics:
   cfg_node_metrics: list[NodeMetrics]
   variable_metrics: list[VariableMetrics]
   solver_metrics: list[SolverMetrics]
+  collected_variable_count: int
+  collected_binding_count: int
+
+class ProgramCounters:
+  cfg_node_count: int
+  variable_count: int
+  binding_count: int
+  origin_count: int
+  solver_count: int
+  query_count: int
+  state_cache_hits: int
+  state_cache_misses: int
+  state_cache_size: int
+  path_cache_size: int
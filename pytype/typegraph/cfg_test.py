@@ -179,6 +179,21 @@ class CFGTest(unittest.TestCase):
     n2.condition = x_a
     self.assertFalse(n3.HasCombination([x_b]))
 
+  def test_condition_set_after_query(self):
+    p = cfg.Program()
+    n1 = p.NewCFGNode("n1")
+    n2 = n1.ConnectNew("n2")
+    n3 = n2.ConnectNew("n3")
+    x = p.NewVariable()
+    x_a = x.AddBinding("a", source_set=[], where=n1)
+    x_b = x.AddBinding("b", source_set=[], where=n1)
+    p.entrypoint = n1
+    self.assertTrue(n3.HasCombination([x_b]))
+    n2.condition = x_a
+    self.assertFalse(n3.HasCombination([x_b]))
+    n2.condition = None
+    self.assertTrue(n3.HasCombination([x_b]))
+
   def test_condition_order(self):
     p = cfg.Program()
     x, y = p.NewVariable(), p.NewVariable()
@@ -945,5 +960,72 @@ class CFGTest(unittest.TestCase):
     self.assertEqual(b3.origins, b2.origins)
 
 
+  def test_compact(self):
+    p = cfg.Program()
+    n1 = p.NewCFGNode("n1")
+    n2 = n1.ConnectNew("n2")
+    data = ["x"]
+    x = p.NewVariable()
+    bx = x.AddBinding(data, [], n1)
+    y = p.NewVariable()
+    y.AddBinding("y", [bx], n2)
+    p.NewVariable().AddBinding("garbage", [], n2)
+    del x, bx  # x is still reachable through y's source set.
+    self.assertEqual(p.compact(), 1)
+    self.assertCountEqual([b.data for b in n2.bindings], ["y"])
+    self.assertEqual(len(p.variables), 2)
+    self.assertEqual(p.compact(), 0)
+    del y
+    self.assertEqual(p.compact(), 2)
+    self.assertFalse(n1.bindings)
+    self.assertFalse(p.variables)
+    metrics = p.calculate_metrics()
+    self.assertEqual(metrics.collected_variable_count, 3)
+    self.assertEqual(metrics.collected_binding_count, 3)
+
+  def test_compact_keeps_conditions(self):
+    p = cfg.Program()
+    n1 = p.NewCFGNode("n1")
+    cond = p.NewVariable().AddBinding("cond", [], n1)
+    n2 = n1.ConnectNew("n2", cond)
+    del cond
+    self.assertEqual(p.compact(), 0)
+    self.assertEqual(n2.condition.data, "cond")
+
+  def test_solve_batch(self):
+    p = cfg.Program()
+    n1 = p.NewCFGNode("n1")
+    n2 = n1.ConnectNew("n2")
+    n3 = n2.ConnectNew("n3")
+    x = p.NewVariable()
+    ax = x.AddBinding("a", [], n1)
+    bx = x.AddBinding("b", [], n2)
+    queries = [(n, [b]) for n in (n1, n2, n3) for b in (ax, bx)] * 10
+    expected = [n.HasCombination(b) for n, b in queries]
+    self.assertEqual(p.solve_batch(queries), expected)
+    self.assertEqual(p.solve_batch(queries, max_workers=4), expected)
+    self.assertEqual(p.solve_batch([]), [])
+    self.assertRaises(TypeError, p.solve_batch, [(n1, ax)])
+
+  def test_calculate_counters(self):
+    p = cfg.Program()
+    n1 = p.NewCFGNode("n1")
+    n2 = n1.ConnectNew("n2")
+    x = p.NewVariable()
+    y = p.NewVariable()
+    ax = x.AddBinding("a", [], n1)
+    by = y.AddBinding("b", [ax], n2)
+    counters = p.calculate_counters()
+    self.assertEqual(counters.cfg_node_count, 2)
+    self.assertEqual(counters.variable_count, 2)
+    self.assertEqual(counters.binding_count, 2)
+    self.assertEqual(counters.origin_count, 2)
+    self.assertEqual(counters.query_count, 0)
+    self.assertTrue(n2.HasCombination([by]))
+    counters = p.calculate_counters()
+    self.assertEqual(counters.solver_count, 1)
+    self.assertEqual(counters.query_count, 1)
+
+
 if __name__ == "__main__":
   unittest.main()
@@ -1,9 +1,11 @@
 """Utilities for working with the CFG."""
 
 import collections
-from collections.abc import Generator, Iterable, Sequence
+from collections.abc import Callable, Generator, Hashable, Iterable, Sequence
 import itertools
-from typing import Protocol, TypeVar
+import math
+from typing import Any, Protocol, TypeVar
+from pytype import metrics
 from pytype.typegraph import cfg
 
 
@@ -18,20 +20,58 @@ from pytype.typegraph import cfg
 # cuts off problematic files, with a comfortable margin.
 DEEP_VARIABLE_LIMIT = 1024
 
+_widened_variables = metrics.Counter("widened_variables")
+_widened_bindings = metrics.Counter("widened_bindings")
+
+
+def _product_bindings(
+    variables: Iterable[cfg.Variable],
+    node: cfg.CFGNode | None,
+    unique_data: bool,
+) -> list[list[cfg.Binding]]:
+  """Get the bindings of each variable that can take part in a product."""
+  bindings_list = []
+  for v in variables:
+    if node:
+      bindings = [b for b in v.bindings if b.IsVisible(node)]
+    else:
+      bindings = v.bindings
+    if unique_data:
+      bindings = list({id(b.data): b for b in reversed(bindings)}.values())
+      bindings.reverse()
+    bindings_list.append(bindings)
+  return bindings_list
+
 
 def variable_product(
     variables: list[cfg.Variable],
+    node: cfg.CFGNode | None = None,
+    unique_data: bool = False,
 ) -> Iterable[tuple[cfg.Binding, ...]]:
   """Take the Cartesian product of a number of Variables.
 
+  The product is generated lazily.
+
   Args:
     variables: A sequence of Variables.
+    node: Optionally, a CFG node. If given, bindings that aren't visible at the
+      node are dropped before taking the product, since no combination that
+      contains them can be visible either.
+    unique_data: If True, only the first binding of each distinct data (by
+      identity) is used. Use this when only the data of the bindings matters.
 
   Returns:
-    A list of lists of Values, where each sublist has one element from each
-    of the given Variables.
+    An iterable of tuples of Bindings, where each tuple has one element from
+    each of the given Variables.
   """
-  return itertools.product(*(v.bindings for v in variables))
+  if node is None and not unique_data:
+    return itertools.product(*(v.bindings for v in variables))
+  return itertools.product(*_product_bindings(variables, node, unique_data))
+
+
+def estimate_product_size(variables: Iterable[cfg.Variable]) -> int:
+  """The number of combinations that variable_product(variables) yields."""
+  return math.prod(len(v.bindings) for v in variables)
 
 
 def _variable_product_items(
@@ -105,9 +145,12 @@ def deep_variable_product(variables, limit: int = DEEP_VARIABLE_LIMIT):
   Raises:
     TooComplexError: If we expanded too many values.
   """
-  return _deep_values_list_product(
-      [v.bindings for v in variables], set(), ComplexityLimit(limit)
-  )
+  values_list = [v.bindings for v in variables]
+  # Every row of the top-level product yields at least one result, so we can
+  # give up before expanding anything if there are too many rows.
+  if math.prod(len(values) for values in values_list if values) >= limit:
+    raise TooComplexError()
+  return _deep_values_list_product(values_list, set(), ComplexityLimit(limit))
 
 
 def _deep_values_list_product(
@@ -155,7 +198,13 @@ def variable_product_dict(
 
   Returns:
     A list of dicts with Value values.
+
+  Raises:
+    TooComplexError: If the product has too many results.
   """
+  # Fail before enumerating anything if the final product alone is too big.
+  if estimate_product_size(variabledict.values()) >= limit:
+    raise TooComplexError()
   return [
       dict(d)
       for d in _variable_product_items(
@@ -164,8 +213,56 @@ def variable_product_dict(
   ]
 
 
+class WideningPolicy:
+  """Merges the bindings of variables that have grown too big.
+
+  Once a variable has more than `threshold` bindings, bindings whose data have
+  the same key are replaced by a single binding of the first such data, so the
+  key must only be equal for data that can stand in for each other. The merged
+  binding has no source set, so it is visible wherever any of the bindings it
+  replaces was: widening loses the conditions under which each value was
+  possible, but not the values themselves.
+  """
+
+  def __init__(self, threshold: int, key: Callable[[Any], Hashable]):
+    """Constructor.
+
+    Args:
+      threshold: The number of bindings above which a variable is widened.
+      key: A function from binding data to a key. Bindings with equal keys are
+        merged into one, keeping only the first of their data.
+    """
+    self.threshold = threshold
+    self.key = key
+
+  def widen(
+      self, program: cfg.Program, node: cfg.CFGNode, variable: cfg.Variable
+  ) -> cfg.Variable:
+    """Returns a widened copy of variable, or variable if it's small enough."""
+    bindings = variable.bindings
+    if len(bindings) <= self.threshold:
+      return variable
+    groups: dict[Hashable, list[cfg.Binding]] = {}
+    for b in bindings:
+      groups.setdefault(self.key(b.data), []).append(b)
+    if len(groups) == len(bindings):
+      return variable
+    v = program.NewVariable()
+    for group in groups.values():
+      if len(group) == 1:
+        v.PasteBinding(group[0], node)
+      else:
+        v.AddBinding(group[0].data, [], node)
+    _widened_variables.inc()
+    _widened_bindings.inc(len(bindings) - len(groups))
+    return v
+
+
 def merge_variables(
-    program: cfg.Program, node: cfg.CFGNode, variables: Sequence[cfg.Variable]
+    program: cfg.Program,
+    node: cfg.CFGNode,
+    variables: Sequence[cfg.Variable],
+    widening: WideningPolicy | None = None,
 ) -> cfg.Variable:
   """Create a combined Variable for a list of variables.
 
@@ -177,6 +274,7 @@ def merge_variables(
     program: A cfg.Program instance.
     node: The current CFG node.
     variables: A list of cfg.Variables.
+    widening: Optionally, a policy for widening the combined Variable.
 
   Returns:
     A cfg.Variable.
@@ -184,12 +282,14 @@ def merge_variables(
   if not variables:
     return program.NewVariable()  # return empty var
   elif all(v is variables[0] for v in variables):
-    return variables[0].AssignToNewVariable(node)
+    v = variables[0].AssignToNewVariable(node)
   else:
     v = program.NewVariable()
     for r in variables:
       v.PasteVariable(r, node)
-    return v
+  if widening:
+    v = widening.widen(program, node, v)
+  return v
 
 
 def merge_bindings(
@@ -42,6 +42,45 @@ class CFGUtilTest(unittest.TestCase):
     (val1,) = (v for v in vw.bindings if v.data == 1)
     self.assertTrue(val1.HasSource(u1))
 
+  def test_merge_variables_widening(self):
+    p = cfg.Program()
+    n0 = p.NewCFGNode("n0")
+    n1 = n0.ConnectNew("n1")
+    n2 = n0.ConnectNew("n2")
+    n3 = p.NewCFGNode("n3")
+    n1.ConnectTo(n3)
+    n2.ConnectTo(n3)
+    cond = p.NewVariable().AddBinding("cond", [], n0)
+    v = p.NewVariable()
+    v.AddBinding(1, source_set=[cond], where=n1)
+    v.AddBinding(2, source_set=[], where=n2)
+    w = p.NewVariable()
+    w.AddBinding("a", source_set=[cond], where=n1)
+    w.AddBinding(None, source_set=[], where=n2)
+    widening = cfg_utils.WideningPolicy(threshold=3, key=type)
+    vw = cfg_utils.merge_variables(p, n3, [v, w], widening)
+    self.assertCountEqual(vw.data, [1, "a", None])
+    # The merged binding doesn't depend on the source sets it replaces.
+    (val1,) = (b for b in vw.bindings if b.data == 1)
+    self.assertFalse(val1.HasSource(cond))
+    self.assertTrue(val1.IsVisible(n3))
+    # Bindings that weren't merged keep their origins.
+    (vala,) = (b for b in vw.bindings if b.data == "a")
+    self.assertTrue(vala.HasSource(cond))
+
+  def test_merge_variables_below_widening_threshold(self):
+    p = cfg.Program()
+    n0 = p.NewCFGNode("n0")
+    v = p.NewVariable([1, 2, 3], source_set=[], where=n0)
+    widening = cfg_utils.WideningPolicy(threshold=3, key=type)
+    self.assertCountEqual(
+        cfg_utils.merge_variables(p, n0, [v, v], widening).data, [1, 2, 3]
+    )
+    widening = cfg_utils.WideningPolicy(threshold=2, key=type)
+    self.assertEqual(
+        cfg_utils.merge_variables(p, n0, [v, v], widening).data, [1]
+    )
+
   def test_merge_bindings(self):
     p = cfg.Program()
     n0 = p.NewCFGNode("n0")
@@ -101,6 +140,34 @@ class VariableProductTest(unittest.TestCase):
         ],
     )
 
+  def test_variable_product_visible(self):
+    n1 = self.current_location
+    n2 = n1.ConnectNew()
+    n3 = n1.ConnectNew()
+    u1 = self.prog.NewVariable()
+    u1.AddBinding(1, [], n1)
+    u1.AddBinding(2, [], n3)
+    u2 = self.prog.NewVariable([3, 4], [], n2)
+    product = cfg_utils.variable_product([u1, u2], node=n2)
+    pairs = [[a.data for a in d] for d in product]
+    self.assertCountEqual(pairs, [[1, 3], [1, 4]])
+
+  def test_variable_product_unique_data(self):
+    x = DummyValue(1)
+    n2 = self.current_location.ConnectNew()
+    u1 = self.prog.NewVariable([x, 2], [], self.current_location)
+    u1.AddBinding(x, [], n2)
+    u2 = self.prog.NewVariable([3], [], self.current_location)
+    product = cfg_utils.variable_product([u1, u2], unique_data=True)
+    pairs = [[a.data for a in d] for d in product]
+    self.assertEqual(pairs, [[x, 3], [2, 3]])
+
+  def test_estimate_product_size(self):
+    u1 = self.prog.NewVariable([1, 2, 3], [], self.current_location)
+    u2 = self.prog.NewVariable([4, 5], [], self.current_location)
+    self.assertEqual(cfg_utils.estimate_product_size([u1, u2]), 6)
+    self.assertEqual(cfg_utils.estimate_product_size([]), 1)
+
   def test_deep_variable_product_raises(self):
     x1, x2 = (DummyValue(i + 1) for i in range(2))
     v1 = self.prog.NewVariable([x1, x2], [], self.current_location)
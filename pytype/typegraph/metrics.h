@@ -7,6 +7,7 @@
 #define THIRD_PARTY_PY_PYTYPE_TYPEGRAPH_METRICS_H_
 
 #include <cstddef>
+#include <cstdint>
 #include <utility>
 #include <vector>
 
@@ -86,7 +87,8 @@ class QueryMetrics {
         from_cache_(from_cache) {}
 
   // A constructor for creating QueryMetrics that will be filled in later.
-  QueryMetrics(NodeID start, std::size_t initial_binding_count)
+  QueryMetrics(NodeID start, std::size_t initial_binding_count,
+               std::int64_t tag = -1)
       : nodes_visited_(0),
         start_node_(start),
         end_node_(start),
@@ -94,6 +96,8 @@ class QueryMetrics {
         total_binding_count_(0),
         shortcircuited_(false),
         from_cache_(false),
+        tag_(tag),
+        duration_ns_(0),
         steps_({}) {}
 
   ~QueryMetrics() {}
@@ -120,6 +124,14 @@ class QueryMetrics {
   bool from_cache() const { return from_cache_; }
   void set_from_cache(bool status) { from_cache_ = status; }
 
+  // The Program's query tag at the time of the query. See
+  // Program::set_query_tag.
+  std::int64_t tag() const { return tag_; }
+
+  // Wall time spent solving the query.
+  std::int64_t duration_ns() const { return duration_ns_; }
+  void set_duration_ns(std::int64_t duration) { duration_ns_ = duration; }
+
  private:
   std::size_t nodes_visited_;
   NodeID start_node_;
@@ -130,6 +142,8 @@ class QueryMetrics {
   std::size_t total_binding_count_;
   bool shortcircuited_;
   bool from_cache_;
+  std::int64_t tag_ = -1;
+  std::int64_t duration_ns_ = 0;
   std::vector<QueryStep> steps_;
 };
 
@@ -161,7 +175,9 @@ class SolverMetrics {
 
   ~SolverMetrics() {}
 
-  std::vector<QueryMetrics> query_metrics() const { return query_metrics_; }
+  const std::vector<QueryMetrics>& query_metrics() const {
+    return query_metrics_;
+  }
 
   CacheMetrics cache_metrics() const { return cache_metrics_; }
 
@@ -174,11 +190,15 @@ class Metrics {
  public:
   Metrics(std::size_t binding_count, std::vector<NodeMetrics> cfg_node_metrics,
           std::vector<VariableMetrics> variable_metrics,
-          std::vector<SolverMetrics> solver_metrics)
+          std::vector<SolverMetrics> solver_metrics,
+          std::size_t collected_variable_count = 0,
+          std::size_t collected_binding_count = 0)
       : binding_count_(binding_count),
         cfg_node_metrics_(std::move(cfg_node_metrics)),
         variable_metrics_(std::move(variable_metrics)),
-        solver_metrics_(std::move(solver_metrics)) {}
+        solver_metrics_(std::move(solver_metrics)),
+        collected_variable_count_(collected_variable_count),
+        collected_binding_count_(collected_binding_count) {}
 
   ~Metrics() {}
 
@@ -194,11 +214,38 @@ class Metrics {
 
   std::vector<SolverMetrics> solver_metrics() const { return solver_metrics_; }
 
+  // Variables and bindings deleted by Program::Compact.
+  std::size_t collected_variable_count() const {
+    return collected_variable_count_;
+  }
+  std::size_t collected_binding_count() const {
+    return collected_binding_count_;
+  }
+
  private:
   std::size_t binding_count_;
   const std::vector<NodeMetrics> cfg_node_metrics_;
   const std::vector<VariableMetrics> variable_metrics_;
   const std::vector<SolverMetrics> solver_metrics_;
+  std::size_t collected_variable_count_;
+  std::size_t collected_binding_count_;
+};
+
+// Running totals for a Program. Unlike Metrics, these are cheap to compute, so
+// they can be sampled repeatedly during an analysis. Solver totals include
+// the solvers that were discarded by Program::InvalidateSolver.
+struct ProgramCounters {
+  std::size_t cfg_node_count = 0;
+  std::size_t variable_count = 0;
+  std::size_t binding_count = 0;
+  std::size_t origin_count = 0;
+  std::size_t solver_count = 0;
+  std::size_t query_count = 0;
+  std::size_t state_cache_hits = 0;
+  std::size_t state_cache_misses = 0;
+  // Sizes of the caches of the current solver.
+  std::size_t state_cache_size = 0;
+  std::size_t path_cache_size = 0;
 };
 
 }  // namespace devtools_python_typegraph
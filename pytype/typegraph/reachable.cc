@@ -8,17 +8,21 @@ static inline std::int64_t _node_bit(int node_id) {
   return 1l << (node_id & 63);
 }
 
-ReachabilityAnalyzer::ReachabilityAnalyzer() : num_nodes_(0) {
+ReachabilityAnalyzer::ReachabilityAnalyzer() : num_nodes_(0), size_(0) {
 }
 
 int ReachabilityAnalyzer::add_node() {
-  /* Add a single node, and grow the matrix by one row and one column. */
+  /* Add a single node, and grow the matrix by one row and one column. The
+   * existing rows only need to grow when we start a new 64-bit word. */
   int node = num_nodes_++;
-  size_ = (num_nodes_ + 63) / 64;
-  adj_.resize(num_nodes_);
-  for (int i = 0; i < num_nodes_; i++) {
-    adj_[i].resize(size_, 0);
+  std::size_t size = (num_nodes_ + 63) / 64;
+  if (size != size_) {
+    size_ = size;
+    for (auto& row : adj_) {
+      row.resize(size_, 0);
+    }
   }
+  adj_.emplace_back(size_, 0);
   adj_[node][node / 64] = _node_bit(node);  // New row, so we don't need "|="
   return node;
 }
@@ -27,6 +31,10 @@ void ReachabilityAnalyzer::add_connection(const int src, const int dst) {
   /* Update the bit matrix to account for the fact that src and dst are now
    * connected. We consider every pair (i, j) of nodes, and check whether we
    * can now connect them using the new src->dst edge. */
+  if (is_reachable(src, dst)) {
+    // Everything that reaches src already reaches dst and its successors.
+    return;
+  }
   std::int64_t src_bit = _node_bit(src);
   int src_pos = src / 64;
   std::int64_t* row_dst = adj_[dst].data();
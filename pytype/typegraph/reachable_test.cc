@@ -55,5 +55,23 @@ TEST_F(ReachabilityTest, TestReachabilityRaw) {
   EXPECT_FALSE(reach_.is_reachable(200, 4));
 }
 
+TEST_F(ReachabilityTest, TestGrowAfterConnections) {
+  for (int i = 0; i < 64; i++) {
+    reach_.add_node();
+  }
+  reach_.add_connection(0, 63);
+  reach_.add_connection(0, 63);  // Already connected.
+  EXPECT_EQ(reach_.size(), 1);
+  int node = reach_.add_node();
+  EXPECT_EQ(node, 64);
+  EXPECT_EQ(reach_.size(), 2);
+  EXPECT_TRUE(reach_.is_reachable(0, 63));
+  EXPECT_TRUE(reach_.is_reachable(64, 64));
+  EXPECT_FALSE(reach_.is_reachable(0, 64));
+  reach_.add_connection(63, 64);
+  EXPECT_TRUE(reach_.is_reachable(0, 64));
+  EXPECT_FALSE(reach_.is_reachable(64, 0));
+}
+
 }  // namespace
 }  // namespace devtools_python_typegraph
@@ -1,6 +1,8 @@
 #include "solver.h"
 
 #include <algorithm>
+#include <atomic>
+#include <chrono>
 #include <cstddef>
 #include <deque>
 #include <functional>
@@ -10,6 +12,7 @@
 #include <set>
 #include <stack>
 #include <string>
+#include <thread>
 #include <tuple>
 #include <unordered_map>
 #include <unordered_set>
@@ -72,7 +75,7 @@ struct Action {
     // source sets. The two entries are never the same for actions on the
     // actions stack. (Ideally, this would be an anonymous struct with proper
     // field names but gcc does not allow this, as opposed to clang.)
-    std::set<SourceSet>::const_iterator source_sets_it[2];
+    std::vector<SourceSet>::const_iterator source_sets_it[2];
   };
 
   Action(ActionType action_type, const Binding* goal)
@@ -80,8 +83,8 @@ struct Action {
   Action(ActionType action_type, GoalSet::iterator erase_it)
       : action_type(action_type), erase_it(erase_it) {}
   Action(ActionType action_type,
-         std::set<SourceSet>::const_iterator source_sets_it,
-         std::set<SourceSet>::const_iterator source_sets_end)
+         std::vector<SourceSet>::const_iterator source_sets_it,
+         std::vector<SourceSet>::const_iterator source_sets_end)
       : action_type(action_type),
         source_sets_it{source_sets_it, source_sets_end} {}
 };
@@ -227,6 +230,24 @@ QueryResult PathCacheTrie::InsertResult(
   return {path_exists, &current_trie_node->path.value()};
 }
 
+std::size_t PathCacheTrie::CountResults(const TrieNode& node) {
+  std::size_t count = node.path.has_value() ? 1 : 0;
+  for (const auto& [id, child] : node.children) {
+    count += CountResults(*child);
+  }
+  return count;
+}
+
+std::size_t PathCacheTrie::size() const {
+  std::size_t count = 0;
+  for (const auto& [start, finishes] : root_) {
+    for (const auto& [finish, node] : finishes) {
+      count += CountResults(node);
+    }
+  }
+  return count;
+}
+
 QueryResult PathCacheTrie::GetResult(const CFGNode* start,
                                      const CFGNode* finish,
                                      const CFGNodeSet& blocked) {
@@ -249,9 +270,28 @@ QueryResult PathCacheTrie::GetResult(const CFGNode* start,
   return {false, nullptr};
 }
 
+void PathCacheTrie::InvalidateFrom(const Program* program,
+                                   const CFGNode* node) {
+  if (node->outgoing().empty()) {
+    // Fast path for the common case of extending the CFG at its frontier.
+    root_.erase(node);
+    return;
+  }
+  for (auto it = root_.begin(); it != root_.end();) {
+    if (program->is_reachable(node, it->first)) {
+      it = root_.erase(it);
+    } else {
+      ++it;
+    }
+  }
+}
+
 std::deque<const CFGNode*> PathFinder::FindShortestPathToNode(
     const CFGNode* start, const CFGNode* finish,
     const CFGNodeSet& blocked) const {
+  if (!CanReach(finish, start)) {
+    return {};
+  }
   std::deque<const CFGNode*> queue;
   queue.push_front(start);
   std::unordered_map<const CFGNode*, const CFGNode*, CFGNodePtrHash> previous;
@@ -270,9 +310,12 @@ std::deque<const CFGNode*> PathFinder::FindShortestPathToNode(
       continue;
     seen.insert(node);
     for (auto n : node->incoming()) {
-      previous.emplace(n, node);
+      // Nodes that |finish| can't reach can't lead back to it either.
+      if (CanReach(finish, n)) {
+        previous.emplace(n, node);
+        queue.push_back(n);
+      }
     }
-    queue.insert(queue.end(), node->incoming().begin(), node->incoming().end());
   }
   std::deque<const CFGNode*> path;
   if (!found)
@@ -315,6 +358,10 @@ const CFGNode* PathFinder::FindHighestReachableWeight(
 QueryResult PathFinder::FindNodeBackwards(const CFGNode* start,
                                           const CFGNode* finish,
                                           const CFGNodeSet& blocked) {
+  if (!CanReach(finish, start)) {
+    // Not worth caching: the reachability index answers this in O(1).
+    return {false, nullptr};
+  }
   QueryResult result = path_trie_.GetResult(start, finish, blocked);
   if (result.path) {
     return result;
@@ -353,13 +400,43 @@ QueryResult PathFinder::FindNodeBackwards(const CFGNode* start,
 
 }  // namespace internal
 
-Solver::Solver(const Program* program)
-    : state_cache_hits_(0), state_cache_misses_(0), program_(program) {}
+Solver::Solver(const Program* program) : Solver(program, nullptr) {}
+
+Solver::Solver(const Program* program, const Solver* parent)
+    : state_cache_hits_(0),
+      state_cache_misses_(0),
+      program_(program),
+      path_finder_(program),
+      parent_(parent) {}
+
+CacheMetrics Solver::CalculateCacheMetrics() const {
+  std::size_t total_size = 0;
+  for (const auto& [pos, states] : solved_states_) {
+    total_size += states.size();
+  }
+  return CacheMetrics(total_size, state_cache_hits_, state_cache_misses_);
+}
 
 SolverMetrics Solver::CalculateMetrics() const {
-  auto cm = CacheMetrics(solved_states_.size(), state_cache_hits_,
-                         state_cache_misses_);
-  return SolverMetrics(query_metrics_, std::move(cm));
+  return SolverMetrics(query_metrics_, CalculateCacheMetrics());
+}
+
+void Solver::InvalidateFrom(const CFGNode* node, bool cfg_changed) {
+  if (cfg_changed) {
+    path_finder_.InvalidateFrom(program_, node);
+  }
+  if (node->outgoing().empty()) {
+    // Nothing but |node| itself is reachable from it.
+    solved_states_.erase(node);
+    return;
+  }
+  for (auto it = solved_states_.begin(); it != solved_states_.end();) {
+    if (program_->is_reachable(node, it->first)) {
+      it = solved_states_.erase(it);
+    } else {
+      ++it;
+    }
+  }
 }
 
 bool Solver::GoalsConflict(const internal::GoalSet& goals) const {
@@ -498,17 +575,20 @@ bool Solver::CanHaveSolution(
 bool Solver::RecallOrFindSolution(
     const internal::State& state, internal::StateSet& seen_states,
     int current_depth) {
-  auto it = solved_states_.find(state);
-  if (it != solved_states_.end()) {
+  internal::StateMap& states_at_pos = solved_states_[state.pos()];
+  auto it = states_at_pos.find(state);
+  const bool* known = it != states_at_pos.end() ? &it->second
+                                                : FindInParent(state);
+  if (known) {
     state_cache_hits_ += 1;
     query_metrics_.back().set_from_cache(true);
     std::string indent(current_depth, ' ');
-    if (it->second) {
+    if (*known) {
       LOG(INFO) << indent << "Known state: solvable.";
     } else {
       LOG(INFO) << indent << "Known state: not solvable.";
     }
-    return it->second;
+    return *known;
   } else {
     state_cache_misses_ += 1;
   }
@@ -517,18 +597,29 @@ bool Solver::RecallOrFindSolution(
   // solvable state, even though we have not solved it yet. The reasoning is
   // that if it's possible to solve this state at this level of the tree, it can
   // also be solved in any of the children.
-  solved_states_[state] = true;
+  states_at_pos[state] = true;
   // Careful! Modifying seen_states would affect other recursive calls, so we
   // need to copy it.
   auto inserted = seen_states.insert(&state);
   bool result = FindSolution(state, seen_states, current_depth);
-  solved_states_[state] = result;
+  // The recursion may have added states at other positions, which can rehash
+  // solved_states_, so look the map up again.
+  solved_states_[state.pos()][state] = result;
   if (inserted.second) {
     seen_states.erase(inserted.first);
   }
   return result;
 }
 
+const bool* Solver::FindInParent(const internal::State& state) const {
+  if (!parent_) return nullptr;
+  auto pos_it = parent_->solved_states_.find(state.pos());
+  if (pos_it == parent_->solved_states_.end()) return nullptr;
+  auto it = pos_it->second.find(state);
+  if (it == pos_it->second.end()) return nullptr;
+  return &it->second;
+}
+
 // Helper for Solve to separate out query setup.
 bool Solver::Solve_(const std::vector<const Binding*>& start_attrs,
                    const CFGNode* start_node) {
@@ -546,8 +637,63 @@ bool Solver::Solve_(const std::vector<const Binding*>& start_attrs,
 // "Main method" of the solver.
 bool Solver::Solve(const std::vector<const Binding*>& start_attrs,
                    const CFGNode* start_node) {
-  query_metrics_.push_back(QueryMetrics(start_node->id(), start_attrs.size()));
-  return Solve_(start_attrs, start_node);
+  query_metrics_.push_back(QueryMetrics(
+      start_node->id(), start_attrs.size(), program_->query_tag()));
+  auto start = std::chrono::steady_clock::now();
+  bool result = Solve_(start_attrs, start_node);
+  query_metrics_.back().set_duration_ns(
+      std::chrono::duration_cast<std::chrono::nanoseconds>(
+          std::chrono::steady_clock::now() - start).count());
+  return result;
+}
+
+std::vector<bool> Solver::SolveBatch(const std::vector<SolverQuery>& queries,
+                                     std::size_t num_threads) {
+  // Threads only pay off if each of them gets a reasonable amount of work.
+  static const std::size_t kMinQueriesPerThread = 16;
+  num_threads = std::min(num_threads, queries.size() / kMinQueriesPerThread);
+  std::vector<bool> results(queries.size());
+  if (num_threads <= 1) {
+    for (std::size_t i = 0; i < queries.size(); i++) {
+      results[i] = Solve(queries[i].bindings, queries[i].node);
+    }
+    return results;
+  }
+  // std::vector<bool> packs bits, so the workers can't write to it directly.
+  std::vector<char> solved(queries.size());
+  std::vector<std::unique_ptr<Solver>> workers;
+  std::vector<std::thread> threads;
+  std::atomic<std::size_t> next_query(0);
+  for (std::size_t t = 0; t < num_threads; t++) {
+    workers.push_back(std::unique_ptr<Solver>(new Solver(program_, this)));
+    Solver* worker = workers.back().get();
+    threads.emplace_back([worker, &queries, &solved, &next_query]() {
+      for (std::size_t i = next_query++; i < queries.size();
+           i = next_query++) {
+        solved[i] = worker->Solve(queries[i].bindings, queries[i].node);
+      }
+    });
+  }
+  for (auto& thread : threads) {
+    thread.join();
+  }
+  for (auto& worker : workers) {
+    Merge(*worker);
+  }
+  for (std::size_t i = 0; i < queries.size(); i++) {
+    results[i] = solved[i];
+  }
+  return results;
+}
+
+void Solver::Merge(Solver& worker) {
+  for (auto& [pos, states] : worker.solved_states_) {
+    solved_states_[pos].insert(states.begin(), states.end());
+  }
+  state_cache_hits_ += worker.state_cache_hits_;
+  state_cache_misses_ += worker.state_cache_misses_;
+  std::move(worker.query_metrics_.begin(), worker.query_metrics_.end(),
+            std::back_inserter(query_metrics_));
 }
 
 }  // namespace devtools_python_typegraph
@@ -133,18 +133,27 @@ class PathCacheTrie {
                            std::deque<const CFGNode*> result_path);
   QueryResult GetResult(const CFGNode* start, const CFGNode* finish,
                         const CFGNodeSet& blocked);
+  // The number of memoized results.
+  std::size_t size() const;
+  // Drop all results for start nodes that |node| can reach.
+  void InvalidateFrom(const Program* program, const CFGNode* node);
 
  private:
+  static std::size_t CountResults(const TrieNode& node);
+
   std::unordered_map<const CFGNode*,
                      std::unordered_map<const CFGNode*, TrieNode>>
       root_;
 };
 
 // PathFinder is a helper class for finding paths within a CFG. It memoizes
-// queries to improve performance.
+// queries to improve performance. If it is given the Program, it uses the
+// program's reachability index to reject impossible queries up front and to
+// restrict searches to the nodes that can be on a path at all.
 class PathFinder {
  public:
-  PathFinder() {}
+  PathFinder() : program_(nullptr) {}
+  explicit PathFinder(const Program* program) : program_(program) {}
 
   // Don't allow copy or move semantics on PathFinder.
   PathFinder(const PathFinder&) = delete;
@@ -167,7 +176,20 @@ class PathFinder {
   QueryResult FindNodeBackwards(const CFGNode* start, const CFGNode* finish,
                                 const CFGNodeSet& blocked);
 
+  // Forget the memoized paths that could go through a new edge into |node|.
+  void InvalidateFrom(const Program* program, const CFGNode* node) {
+    path_trie_.InvalidateFrom(program, node);
+  }
+
+  std::size_t cache_size() const { return path_trie_.size(); }
+
  private:
+  // Whether |node| can be on a backward path that ends at |finish|.
+  bool CanReach(const CFGNode* finish, const CFGNode* node) const {
+    return !program_ || program_->is_reachable(finish, node);
+  }
+
+  const Program* program_;
   PathCacheTrie path_trie_;
 };
 
@@ -195,9 +217,39 @@ class Solver {
   bool Solve(const std::vector<const Binding*>& start_attrs,
              const CFGNode* start_node);
 
+  // Solve a batch of independent queries. With |num_threads| > 1, the queries
+  // are spread over worker threads, each of which uses its own Solver that
+  // also looks up states in this solver's cache. This solver is not modified
+  // until all workers are done, at which point their caches and metrics are
+  // merged into it. The program must not be modified during the call. Does
+  // not use Python, so it can run without holding the GIL (unless C++
+  // logging is enabled).
+  std::vector<bool> SolveBatch(const std::vector<SolverQuery>& queries,
+                               std::size_t num_threads);
+
   SolverMetrics CalculateMetrics () const;
 
+  // Just the cache part of CalculateMetrics, without copying query metrics.
+  CacheMetrics CalculateCacheMetrics() const;
+  std::size_t query_count() const { return query_metrics_.size(); }
+  std::size_t path_cache_size() const { return path_finder_.cache_size(); }
+
+  // Forget the results that a change at |node| could affect. A solver search
+  // starting at a position only ever looks at nodes that can reach that
+  // position, so only states positioned at nodes reachable from |node| are
+  // dropped. If |cfg_changed|, memoized paths are pruned the same way.
+  void InvalidateFrom(const CFGNode* node, bool cfg_changed);
+
  private:
+  // A worker solver for SolveBatch, falling back to |parent|'s cache.
+  Solver(const Program* program, const Solver* parent);
+
+  // Look up a state in the cache of the parent solver, if any.
+  const bool* FindInParent(const internal::State& state) const;
+
+  // Add the states and metrics of a worker solver to this one.
+  void Merge(Solver& worker);
+
   // Do a quick (one DFS run) sanity check of whether a solution might exist.
   bool CanHaveSolution(const std::vector<const Binding*>& start_attrs,
                        const CFGNode* start_node);
@@ -216,7 +268,10 @@ class Solver {
   bool Solve_(const std::vector<const Binding*>& start_attrs,
              const CFGNode* start_node);
 
-  internal::StateMap solved_states_;
+  // Solved states, grouped by position so that invalidation can drop all the
+  // states at a node at once.
+  std::unordered_map<const CFGNode*, internal::StateMap, CFGNodePtrHash>
+      solved_states_;
   std::size_t state_cache_hits_;
   std::size_t state_cache_misses_;
 
@@ -224,6 +279,8 @@ class Solver {
 
   const Program* program_;
   internal::PathFinder path_finder_;
+  // Read-only cache of the solver that started a batch, or nullptr.
+  const Solver* parent_;
 };
 
 }  // namespace devtools_python_typegraph
@@ -387,6 +387,32 @@ TEST(SolverTest, TestPathFinder) {
             f.FindHighestReachableWeight(n5, n2_n3_set_2, weights3)->id());
 }
 
+TEST(SolverTest, TestPathFinderWithReachability) {
+  // Same graph as TestPathFinder, plus an unconnected node n6.
+  Program p;
+  CFGNode* n1 = p.NewCFGNode("n1");
+  CFGNode* n2 = n1->ConnectNew("n2");
+  CFGNode* n3 = n1->ConnectNew("n3");
+  CFGNode* n4 = p.NewCFGNode("n4");
+  n2->ConnectTo(n4);
+  n3->ConnectTo(n4);
+  CFGNode* n5 = n4->ConnectNew("n5");
+  n5->ConnectTo(n5);
+  CFGNode* n6 = p.NewCFGNode("n6");
+  internal::PathFinder f(&p);
+  EXPECT_THAT(f.FindShortestPathToNode(n1, n1, {}), ElementsAre(n1));
+  EXPECT_THAT(f.FindShortestPathToNode(n4, n1, {n2}), ElementsAre(n4, n3, n1));
+  EXPECT_THAT(f.FindShortestPathToNode(n5, n2, {}), ElementsAre(n5, n4, n2));
+  EXPECT_TRUE(f.FindShortestPathToNode(n4, n1, {n2, n3}).empty());
+  // Rejected by the reachability index without searching.
+  EXPECT_TRUE(f.FindShortestPathToNode(n1, n4, {}).empty());
+  EXPECT_TRUE(f.FindShortestPathToNode(n5, n6, {}).empty());
+  EXPECT_FALSE(f.FindNodeBackwards(n2, n3, {}).path_exists);
+  auto q = f.FindNodeBackwards(n5, n1, {});
+  EXPECT_TRUE(q.path_exists);
+  EXPECT_THAT(*q.path, IsEmpty());
+}
+
 TEST(SolverTest, TestFindNodeBackwards) {
   // +-->n2--.       +--->n6--.
   // |   c3  v       |    c3  v
@@ -542,14 +568,13 @@ TEST(SolverTest, TestMetricsCache) {
   EXPECT_TRUE(qm[2].from_cache());
   EXPECT_EQ(qm[2].end_node(), n2->id());
 
-  // Adding a new binding will invalidate the solver and destroy the cache.
+  // Adding a new binding at n2 drops the cache entry for n2, but the entries
+  // for n0 and n1 can't observe the change and are kept.
   auto y = p.NewVariable();
   auto yb = AddBinding(y, &b, n2, {});
 
-  // Seed the cache.
   solver = p.GetSolver();
   EXPECT_TRUE(solver->Solve({xa}, n1));
-  // Since xa is bound at n0, the previous query adds 2 entries to the cache.
   EXPECT_EQ(solver->CalculateMetrics().cache_metrics().total_size(), 2);
 
   EXPECT_TRUE(solver->Solve({xa, yb}, n2));
@@ -572,6 +597,75 @@ TEST(SolverTest, TestMetricsCache) {
   EXPECT_EQ(xy_qm.end_node(), n2->id());
 }
 
+TEST(SolverTest, TestIncrementalInvalidation) {
+  // n0 -> n1 -> n2
+  //        ^
+  // n3 ----+
+  Program p;
+  auto n0 = p.NewCFGNode("n0");
+  auto n1 = n0->ConnectNew("n1");
+  auto n2 = n1->ConnectNew("n2");
+  std::string a("a"), b("b");
+  auto x = p.NewVariable();
+  auto xa = AddBinding(x, &a, n0, {});
+  auto xb = AddBinding(x, &b, n1, {});
+
+  auto solver = p.GetSolver();
+  EXPECT_TRUE(solver->Solve({xa}, n0));
+  EXPECT_FALSE(solver->Solve({xa}, n2));
+  EXPECT_EQ(solver->CalculateMetrics().cache_metrics().total_size(), 2);
+
+  // Extending the CFG at the frontier keeps all cached states.
+  n2->ConnectNew("n4");
+  EXPECT_EQ(p.GetSolver(), solver);
+  EXPECT_EQ(solver->CalculateMetrics().cache_metrics().total_size(), 2);
+
+  // A new path into n1 drops the state at n2, but not the one at n0.
+  auto n3 = p.NewCFGNode("n3");
+  AddBinding(x, &a, n3, {});
+  n3->ConnectTo(n1);
+  EXPECT_EQ(solver->CalculateMetrics().cache_metrics().total_size(), 1);
+  EXPECT_TRUE(solver->Solve({xa}, n0));
+  EXPECT_FALSE(solver->Solve({xa}, n2));
+  EXPECT_TRUE(solver->Solve({xb}, n2));
+
+  // A new assignment at n2 has to be visible at n2.
+  xa->AddOrigin(n2, std::vector<Binding*>{});
+  EXPECT_TRUE(solver->Solve({xa}, n2));
+}
+
+TEST(SolverTest, TestSolveBatch) {
+  // A chain of nodes, each assigning x, with a conditional branch on the side.
+  Program p;
+  Variable* x = p.NewVariable();
+  Variable* cond = p.NewVariable();
+  std::vector<CFGNode*> nodes;
+  std::vector<Binding*> bindings;
+  CFGNode* node = p.NewCFGNode("n0");
+  Binding* c = AddBinding(cond, &p, node, {});
+  for (int i = 0; i < 50; i++) {
+    CFGNode* next = node->ConnectNew("n", i % 7 == 0 ? c : nullptr);
+    bindings.push_back(AddBinding(x, &p, next, {}));
+    nodes.push_back(next);
+    node = next;
+  }
+  std::vector<SolverQuery> queries;
+  for (CFGNode* n : nodes) {
+    for (Binding* b : bindings) {
+      queries.push_back({n, {b}});
+      queries.push_back({n, {b, c}});
+    }
+  }
+  std::vector<bool> expected;
+  for (const auto& q : queries) {
+    expected.push_back(Solver(&p).Solve(q.bindings, q.node));
+  }
+  EXPECT_EQ(p.SolveBatch(queries, 4), expected);
+  // The merged caches answer the queries again without solving.
+  std::vector<bool> again = p.SolveBatch(queries, 1);
+  EXPECT_EQ(again, expected);
+}
+
 TEST(SolverTest, TestMetricsShortcircuit) {
   Program p;
   auto root = p.NewCFGNode("root");
@@ -1,6 +1,8 @@
 #include "typegraph.h"
 
+#include <algorithm>
 #include <cstddef>
+#include <iterator>
 #include <memory>
 #include <set>
 #include <stack>
@@ -22,8 +24,8 @@ CFGNode* Program::NewCFGNode(std::string name) {
 }
 
 CFGNode* Program::NewCFGNode(std::string name, Binding* condition) {
-  // Count the number of nodes so far and use that as ID
-  InvalidateSolver();
+  // Count the number of nodes so far and use that as ID. A new node isn't
+  // connected to anything yet, so it can't change any cached solver result.
   std::size_t node_nr = CountCFGNodes();
   int n = backward_reachability_->add_node();
   CHECK(n == node_nr) <<
@@ -49,7 +51,9 @@ Program::Program()
       next_variable_id_(0),
       next_binding_id_(0),
       backward_reachability_(std::make_unique<ReachabilityAnalyzer>()),
-      default_data_(nullptr) {}
+      default_data_(nullptr),
+      collected_variable_count_(0),
+      collected_binding_count_(0) {}
 
 Program::~Program() {}
 
@@ -65,10 +69,105 @@ void Program::InvalidateSolver() {
   solver_.reset();
 }
 
-bool Program::is_reachable(const CFGNode* src, const CFGNode* dst) {
+void Program::InvalidateSolverFrom(const CFGNode* node, bool cfg_changed) {
+  if (solver_) {
+    solver_->InvalidateFrom(node, cfg_changed);
+  }
+}
+
+std::vector<bool> Program::SolveBatch(const std::vector<SolverQuery>& queries,
+                                      std::size_t num_threads) {
+  return GetSolver()->SolveBatch(queries, num_threads);
+}
+
+bool Program::is_reachable(const CFGNode* src, const CFGNode* dst) const {
   return backward_reachability_->is_reachable(dst->id(), src->id());
 }
 
+std::size_t Program::Compact(
+    const std::vector<const Variable*>& live_variables) {
+  std::unordered_set<const Variable*> live;
+  std::vector<const Variable*> stack(live_variables);
+  for (const auto& node : cfg_nodes_) {
+    if (node->condition()) {
+      stack.push_back(node->condition()->variable());
+    }
+  }
+  while (!stack.empty()) {
+    const Variable* variable = stack.back();
+    stack.pop_back();
+    if (!live.insert(variable).second) continue;
+    for (const auto& binding : variable->bindings()) {
+      for (const auto& origin : binding->origins()) {
+        for (const SourceSet& source_set : origin->source_sets) {
+          for (const Binding* source : source_set) {
+            if (!map_util::ContainsKey(live, source->variable())) {
+              stack.push_back(source->variable());
+            }
+          }
+        }
+      }
+    }
+  }
+  if (live.size() == variables_.size()) {
+    return 0;
+  }
+  // Detach the dead variables first and only delete them once the program is
+  // consistent again: deleting a binding releases its data, which can run
+  // arbitrary Python code.
+  std::vector<std::unique_ptr<Variable>> dead;
+  auto live_end = std::stable_partition(
+      variables_.begin(), variables_.end(),
+      [&live](const std::unique_ptr<Variable>& v) {
+        return map_util::ContainsKey(live, v.get());
+      });
+  std::move(live_end, variables_.end(), std::back_inserter(dead));
+  variables_.erase(live_end, variables_.end());
+  for (const auto& node : cfg_nodes_) {
+    auto& bindings = node->bindings_;
+    bindings.erase(std::remove_if(bindings.begin(), bindings.end(),
+                                  [&live](const Binding* b) {
+                                    return !map_util::ContainsKey(
+                                        live, b->variable());
+                                  }),
+                   bindings.end());
+  }
+  InvalidateSolver();
+  collected_variable_count_ += dead.size();
+  for (const auto& variable : dead) {
+    collected_binding_count_ += variable->size();
+  }
+  return dead.size();
+}
+
+ProgramCounters Program::CalculateCounters() const {
+  ProgramCounters counters;
+  counters.cfg_node_count = cfg_nodes_.size();
+  counters.variable_count = variables_.size();
+  for (const auto& var : variables_) {
+    counters.binding_count += var->size();
+    for (const auto& binding : var->bindings()) {
+      counters.origin_count += binding->origins().size();
+    }
+  }
+  counters.solver_count = solver_metrics_.size();
+  for (const auto& metrics : solver_metrics_) {
+    counters.query_count += metrics.query_metrics().size();
+    counters.state_cache_hits += metrics.cache_metrics().hits();
+    counters.state_cache_misses += metrics.cache_metrics().misses();
+  }
+  if (solver_) {
+    counters.solver_count += 1;
+    counters.query_count += solver_->query_count();
+    CacheMetrics cache = solver_->CalculateCacheMetrics();
+    counters.state_cache_hits += cache.hits();
+    counters.state_cache_misses += cache.misses();
+    counters.state_cache_size = cache.total_size();
+    counters.path_cache_size = solver_->path_cache_size();
+  }
+  return counters;
+}
+
 Metrics Program::CalculateMetrics() {
   auto binding_count = next_binding_id();
 
@@ -100,7 +199,8 @@ Metrics Program::CalculateMetrics() {
   }
 
   return Metrics(binding_count, std::move(cfg_node_metrics),
-                 std::move(variable_metrics), std::move(solver_metrics));
+                 std::move(variable_metrics), std::move(solver_metrics),
+                 collected_variable_count_, collected_binding_count_);
 }
 
 CFGNode::CFGNode(Program* program, std::string name, std::size_t id,
@@ -125,6 +225,16 @@ CFGNode* CFGNode::ConnectNew(std::string name, Binding* condition) {
   return node;
 }
 
+void CFGNode::set_condition(Binding* condition) {
+  if (condition == condition_) {
+    return;
+  }
+  // Cached paths record which of their nodes have conditions, so they are
+  // invalidated along with the solved states.
+  program_->InvalidateSolverFrom(this, /*cfg_changed=*/true);
+  condition_ = condition;
+}
+
 void CFGNode::ConnectTo(CFGNode* node) {
   if (this == node) {
     return;  // no need to connect a node to itself
@@ -137,7 +247,7 @@ void CFGNode::ConnectTo(CFGNode* node) {
       return;  // already connected
     }
   }
-  program_->InvalidateSolver();
+  program_->InvalidateSolverFrom(node, /*cfg_changed=*/true);
   node->incoming_.push_back(this);
   this->outgoing_.push_back(node);
   this->backward_reachability_->add_connection(node->id(), this->id());
@@ -165,11 +275,15 @@ bool CFGNode::CanHaveCombination(const std::vector<const Binding*>& bindings) {
 }
 
 void Origin::AddSourceSet(const std::vector<Binding*>& source_set) {
-  source_sets.emplace(source_set.begin(), source_set.end());
+  AddSourceSet(SourceSet(source_set.begin(), source_set.end()));
 }
 
 void Origin::AddSourceSet(const SourceSet& source_set) {
-  source_sets.emplace(source_set.begin(), source_set.end());
+  auto it = std::lower_bound(source_sets.begin(), source_sets.end(),
+                             source_set);
+  if (it == source_sets.end() || *it != source_set) {
+    source_sets.insert(it, source_set);
+  }
 }
 
 // Create a Binding, and also registers it with its CFG node.
@@ -207,13 +321,13 @@ Origin* Binding::FindOrAddOrigin(CFGNode* node) {
 }
 
 Origin* Binding::AddOrigin(CFGNode* node) {
-  program_->InvalidateSolver();
+  program_->InvalidateSolverFrom(node, /*cfg_changed=*/false);
   return FindOrAddOrigin(node);
 }
 
 Origin* Binding::AddOrigin(CFGNode* node,
                            const std::vector<Binding*>& source_set) {
-  program_->InvalidateSolver();
+  program_->InvalidateSolverFrom(node, /*cfg_changed=*/false);
   Origin* origin = FindOrAddOrigin(node);
   origin->AddSourceSet(source_set);
   return origin;
@@ -268,7 +382,8 @@ Binding* Variable::FindOrAddBindingHelper(const BindingData& data) {
   auto it = data_to_binding_.find(data.get());
   if (it == data_to_binding_.end()) {
     LOG(DEBUG) << "Adding choice to Variable " << id_;
-    program_->InvalidateSolver();
+    // No solver invalidation: a binding without origins can't be part of any
+    // solution until AddOrigin is called on it.
     auto binding =
         std::unique_ptr<Binding>(new Binding(program_, this, data,
                                              program_->MakeBindingId()));
@@ -9,8 +9,11 @@
 #ifndef PYTYPE_TYPEGRAPH_TYPEGRAPH_H_
 #define PYTYPE_TYPEGRAPH_TYPEGRAPH_H_
 
+#include <algorithm>
 #include <cstddef>
+#include <cstdint>
 #include <functional>
+#include <initializer_list>
 #include <memory>
 #include <set>
 #include <string>
@@ -60,6 +63,12 @@ inline BindingData MakeBindingData(RawDataType* raw_data,
 // use that as the cutoff.
 static const std::size_t MAX_VAR_SIZE = 64;
 
+// A single HasCombination query, for Program::SolveBatch.
+struct SolverQuery {
+  const CFGNode* node;
+  std::vector<const Binding*> bindings;
+};
+
 // Program instances tie together the CFG and the data flow graph (variables
 // + bindings). We use this for memory allocation (deleting a program will
 // delete everything it allocated) as well as for issuing IDs:
@@ -102,18 +111,44 @@ class Program {
   CFGNode* entrypoint() { return this->entrypoint_; }
   void set_entrypoint(CFGNode* node) { this->entrypoint_ = node; }
 
+  // An opaque tag that is recorded in the QueryMetrics of every solver query,
+  // so that clients can attribute queries to whatever they were doing at the
+  // time. -1 means untagged.
+  std::int64_t query_tag() const { return query_tag_; }
+  void set_query_tag(std::int64_t tag) { query_tag_ = tag; }
+
   // For testing purposes. Client code should use GetSolver.
   Solver* solver() { return this->solver_.get(); }
 
   Solver* GetSolver();
+  // Throw away the solver and everything it has cached.
   void InvalidateSolver();
-
-  bool is_reachable(const CFGNode* src, const CFGNode* dst);
+  // Forget the solver results that could be affected by a change at |node|,
+  // i.e. those for positions that |node| can reach. |cfg_changed| means an
+  // edge into |node| was added, which also invalidates cached paths.
+  void InvalidateSolverFrom(const CFGNode* node, bool cfg_changed);
+
+  bool is_reachable(const CFGNode* src, const CFGNode* dst) const;
+
+  // Answer many HasCombination queries at once, using up to |num_threads|
+  // threads. See Solver::SolveBatch.
+  std::vector<bool> SolveBatch(const std::vector<SolverQuery>& queries,
+                               std::size_t num_threads);
+
+  // Delete all Variables (and their Bindings) that can't be reached from the
+  // given live Variables. Reachability follows the source sets of bindings,
+  // and the conditions of CFG nodes are live too. Collected bindings are also
+  // removed from the CFG nodes they were registered at. CFG nodes themselves
+  // are never collected, since their IDs index the reachability matrix.
+  // Returns the number of collected Variables.
+  std::size_t Compact(const std::vector<const Variable*>& live_variables);
 
   Metrics CalculateMetrics();
+  ProgramCounters CalculateCounters() const;
 
  private:
   CFGNode* entrypoint_;
+  std::int64_t query_tag_ = -1;
   std::size_t next_variable_id_;
   std::size_t next_binding_id_;
   std::unique_ptr<ReachabilityAnalyzer> backward_reachability_;
@@ -123,6 +158,9 @@ class Program {
   std::unique_ptr<Solver> solver_;
   std::vector<SolverMetrics> solver_metrics_;
   BindingData default_data_;
+  // Totals over all calls to Compact(), for metrics.
+  std::size_t collected_variable_count_;
+  std::size_t collected_binding_count_;
 };
 
 // A node in the CFG. Assignments within one CFG node are treated as unordered:
@@ -167,7 +205,9 @@ class CFGNode {
 
   // Node condition. The binding representing condition for node's branch.
   Binding* condition() const { return condition_; }
-  void set_condition(Binding* condition) { this->condition_ = condition; }
+  // Changing the condition invalidates solver results at this node and the
+  // nodes reachable from it.
+  void set_condition(Binding* condition);
 
   // Incoming nodes, i.e. program paths that converge at this point.
   const std::vector<CFGNode*>& incoming() const { return incoming_; }
@@ -217,14 +257,53 @@ typedef std::set<const CFGNode*, pointer_less<CFGNode>> CFGNodeSet;
 // A SourceSet is a combination of Bindings that was used to form a Binding.
 // E.g., for a statement like "z = a.x + y", a, a.x and y would be the
 // SourceSet to create z.
-typedef std::set<Binding*, pointer_less<Binding>> SourceSet;
+// Source sets are small and rarely change after construction, so rather than
+// a node-based std::set, they are a flat vector kept sorted by binding ID.
+// This saves a heap allocation per element and makes iteration cache-friendly.
+class SourceSet {
+ public:
+  using value_type = Binding*;
+  using const_iterator = std::vector<Binding*>::const_iterator;
+  using iterator = const_iterator;
+
+  SourceSet() {}
+  template <typename InputIt>
+  SourceSet(InputIt first, InputIt last) {
+    insert(first, last);
+  }
+  SourceSet(std::initializer_list<Binding*> bindings)
+      : SourceSet(bindings.begin(), bindings.end()) {}
+
+  // Adds a binding. Returns true if it wasn't in the set yet.
+  bool insert(Binding* binding);
+  template <typename InputIt>
+  void insert(InputIt first, InputIt last);
+
+  std::size_t count(const Binding* binding) const;
+
+  const_iterator begin() const { return bindings_.begin(); }
+  const_iterator end() const { return bindings_.end(); }
+  std::size_t size() const { return bindings_.size(); }
+  bool empty() const { return bindings_.empty(); }
+
+  bool operator==(const SourceSet& other) const {
+    return bindings_ == other.bindings_;
+  }
+  bool operator!=(const SourceSet& other) const { return !(*this == other); }
+  // Orders source sets lexicographically by binding ID, like std::set would.
+  bool operator<(const SourceSet& other) const;
+
+ private:
+  std::vector<Binding*> bindings_;
+};
 
 // An "origin" is an explanation of how a binding was constructed. It consists
 // of a CFG node and a set of sourcesets.
 struct Origin {
   CFGNode* where = nullptr;
 
-  std::set<SourceSet> source_sets;
+  // Sorted, without duplicates.
+  std::vector<SourceSet> source_sets;
 
   explicit Origin(CFGNode* where) { this->where = where; }
 
@@ -311,6 +390,41 @@ class Binding {
   friend Variable;    // to allow Variables to construct Bindings
 };
 
+inline bool SourceSet::insert(Binding* binding) {
+  // Bindings are usually created, and hence added, in ID order.
+  if (bindings_.empty() || *bindings_.back() < *binding) {
+    bindings_.push_back(binding);
+    return true;
+  }
+  auto it = std::lower_bound(bindings_.begin(), bindings_.end(), binding,
+                             pointer_less<Binding>());
+  if (*it == binding) {
+    return false;
+  }
+  bindings_.insert(it, binding);
+  return true;
+}
+
+template <typename InputIt>
+void SourceSet::insert(InputIt first, InputIt last) {
+  bindings_.insert(bindings_.end(), first, last);
+  std::sort(bindings_.begin(), bindings_.end(), pointer_less<Binding>());
+  bindings_.erase(std::unique(bindings_.begin(), bindings_.end()),
+                  bindings_.end());
+}
+
+inline std::size_t SourceSet::count(const Binding* binding) const {
+  return std::binary_search(bindings_.begin(), bindings_.end(), binding,
+                            pointer_less<Binding>());
+}
+
+inline bool SourceSet::operator<(const SourceSet& other) const {
+  return std::lexicographical_compare(bindings_.begin(), bindings_.end(),
+                                      other.bindings_.begin(),
+                                      other.bindings_.end(),
+                                      pointer_less<Binding>());
+}
+
 // Since a variable (or attribute, local, global, etc.) can have multiple
 // possible bindings during the course of a program, we store it as a union:
 // This stores all the bindings that have potentially been assigned to this
@@ -0,0 +1,558 @@
+"""Serialize typegraphs into a compact, columnar binary format.
+
+This is an alternative to the JSON format in typegraph_serializer for programs
+that are too big to encode in one go. The writer encodes the program in
+fixed-size chunks, so the encoded output never has to be held in memory all at
+once (the writer still sorts the program's nodes, variables and bindings, and
+collects the solver metrics, up front). The reader can load a subset of the
+program without decoding the rest of the file.
+
+Usage:
+  from pytype.typegraph import typegraph_binary
+  with open("program.bin", "wb") as f:
+    typegraph_binary.write_program(ctx.program, f)
+  with open("program.bin", "rb") as f:
+    reader = typegraph_binary.Reader(f)
+    p = reader.load(node_range=(100, 200))
+
+The decoded objects are the dataclasses from typegraph_serializer.
+
+File layout (all integers are little-endian):
+  header: MAGIC, version (u32)
+  chunks: kind (4 bytes), item count (u32), payload size (u64), payload
+  index:  one entry per chunk: kind, offset, item count, min node, max node
+  footer: entrypoint (i64), index offset (u64), chunk count (u32), MAGIC
+
+A chunk payload is a list of columns, each an array of int64 values (strings
+are stored as an offsets column plus a utf-8 column). Lists of lists are
+stored in CSR form, as an offsets column and a values column. The node range
+of a chunk is the range of CFG node ids that its items refer to: the node ids
+themselves for CFG nodes, origin locations for bindings and start nodes for
+queries. Chunks whose range is disjoint from a requested node range are never
+read.
+"""
+
+import array
+import dataclasses
+import io
+import struct
+import sys
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Sequence
+
+from pytype.typegraph import cfg
+from pytype.typegraph import typegraph_serializer as ser
+
+MAGIC = b"PYTG"
+VERSION = 1
+
+CHUNK_SIZE = 4096
+
+_HEADER = struct.Struct("<4sI")
+_CHUNK_HEADER = struct.Struct("<4sIQ")
+_INDEX_ENTRY = struct.Struct("<4sQIqq")
+_FOOTER = struct.Struct("<qQI4s")
+_COLUMN_COUNT = struct.Struct("<I")
+_COLUMN_SIZE = struct.Struct("<Q")
+
+_NODES = b"NODE"
+_VARIABLES = b"VARS"
+_BINDINGS = b"BIND"
+_QUERIES = b"QURY"
+
+# Query flags.
+_SHORTCIRCUITED = 1
+_FROM_CACHE = 2
+
+_NO_NODES = (sys.maxsize, -sys.maxsize - 1)
+
+
+class FormatError(Exception):
+  """Raised when reading a file that isn't a serialized typegraph."""
+
+
+def _int_array(values: Iterable[int] = ()) -> array.array:
+  return array.array("q", values)
+
+
+def _to_bytes(column: array.array | bytes) -> bytes:
+  if isinstance(column, bytes):
+    return column
+  if sys.byteorder != "little":
+    column = array.array(column.typecode, column)
+    column.byteswap()
+  return column.tobytes()
+
+
+def _from_bytes(raw: memoryview) -> array.array:
+  column = _int_array()
+  column.frombytes(raw)
+  if sys.byteorder != "little":
+    column.byteswap()
+  return column
+
+
+class _Csr:
+  """Builds a list of lists of ints as an offsets column and a values column."""
+
+  def __init__(self):
+    self.offsets = _int_array([0])
+    self.values = _int_array()
+
+  def append(self, values: Iterable[int]):
+    self.values.extend(values)
+    self.offsets.append(len(self.values))
+
+
+def _csr_rows(offsets: array.array, values: array.array) -> list[list[int]]:
+  return [
+      values[offsets[i] : offsets[i + 1]].tolist()
+      for i in range(len(offsets) - 1)
+  ]
+
+
+def _encode_strings(strings: Sequence[str]) -> tuple[array.array, bytes]:
+  encoded = [s.encode("utf-8") for s in strings]
+  offsets = _int_array([0])
+  for s in encoded:
+    offsets.append(offsets[-1] + len(s))
+  return offsets, b"".join(encoded)
+
+
+def _decode_strings(offsets: array.array, raw: memoryview) -> list[str]:
+  return [
+      str(raw[offsets[i] : offsets[i + 1]], "utf-8")
+      for i in range(len(offsets) - 1)
+  ]
+
+
+@dataclasses.dataclass
+class _IndexEntry:
+  kind: bytes
+  offset: int
+  count: int
+  min_node: int
+  max_node: int
+
+  def overlaps(self, node_range: tuple[int, int] | None) -> bool:
+    if node_range is None:
+      return True
+    lo, hi = node_range
+    return self.min_node < hi and self.max_node >= lo
+
+
+class Writer:
+  """Writes a program to a binary file, one chunk at a time."""
+
+  def __init__(self, f: BinaryIO, chunk_size: int = CHUNK_SIZE):
+    self._f = f
+    self._chunk_size = chunk_size
+    self._index: list[_IndexEntry] = []
+    self._offset = 0
+    self._write(_HEADER.pack(MAGIC, VERSION))
+
+  def _write(self, data: bytes):
+    self._f.write(data)
+    self._offset += len(data)
+
+  def _write_chunk(
+      self,
+      kind: bytes,
+      count: int,
+      columns: Sequence[array.array | bytes],
+      node_range: tuple[int, int],
+  ):
+    raw_columns = [_to_bytes(c) for c in columns]
+    size = _COLUMN_COUNT.size + sum(
+        _COLUMN_SIZE.size + len(c) for c in raw_columns
+    )
+    self._index.append(_IndexEntry(kind, self._offset, count, *node_range))
+    self._write(_CHUNK_HEADER.pack(kind, count, size))
+    self._write(_COLUMN_COUNT.pack(len(raw_columns)))
+    for c in raw_columns:
+      self._write(_COLUMN_SIZE.pack(len(c)))
+      self._write(c)
+
+  def _chunks(self, items: Iterable[Any]) -> Iterator[list[Any]]:
+    chunk = []
+    for item in items:
+      chunk.append(item)
+      if len(chunk) == self._chunk_size:
+        yield chunk
+        chunk = []
+    if chunk:
+      yield chunk
+
+  def write_cfg_nodes(self, nodes: Iterable[cfg.CFGNode]):
+    for chunk in self._chunks(nodes):
+      ids = _int_array(n.id for n in chunk)
+      incoming, outgoing, bindings = _Csr(), _Csr(), _Csr()
+      for n in chunk:
+        incoming.append(i.id for i in n.incoming)
+        outgoing.append(o.id for o in n.outgoing)
+        bindings.append(b.id for b in n.bindings)
+      conditions = _int_array(
+          n.condition.id if n.condition else -1 for n in chunk
+      )
+      names = _encode_strings([n.name for n in chunk])
+      self._write_chunk(
+          _NODES,
+          len(chunk),
+          [
+              ids,
+              *names,
+              incoming.offsets,
+              incoming.values,
+              outgoing.offsets,
+              outgoing.values,
+              bindings.offsets,
+              bindings.values,
+              conditions,
+          ],
+          (min(ids), max(ids)),
+      )
+
+  def write_variables(self, variables: Iterable[cfg.Variable]):
+    for chunk in self._chunks(variables):
+      ids = _int_array(v.id for v in chunk)
+      bindings = _Csr()
+      for v in chunk:
+        bindings.append(b.id for b in v.bindings)
+      self._write_chunk(
+          _VARIABLES,
+          len(chunk),
+          [ids, bindings.offsets, bindings.values],
+          _NO_NODES,
+      )
+
+  def write_bindings(
+      self,
+      bindings: Iterable[cfg.Binding],
+      encode_data: Callable[[cfg.Binding], str],
+  ):
+    for chunk in self._chunks(bindings):
+      ids = _int_array(b.id for b in chunk)
+      variables = _int_array(b.variable.id for b in chunk)
+      origin_offsets = _int_array([0])
+      where = _int_array()
+      set_offsets = _int_array([0])
+      members = _Csr()
+      for b in chunk:
+        for o in b.origins:
+          where.append(o.where.id)
+          for s in o.source_sets:
+            members.append(sorted(m.id for m in s))
+          set_offsets.append(len(members.offsets) - 1)
+        origin_offsets.append(len(where))
+      data = _encode_strings([encode_data(b) for b in chunk])
+      self._write_chunk(
+          _BINDINGS,
+          len(chunk),
+          [
+              ids,
+              variables,
+              *data,
+              origin_offsets,
+              where,
+              set_offsets,
+              members.offsets,
+              members.values,
+          ],
+          (min(where), max(where)) if where else _NO_NODES,
+      )
+
+  def write_queries(self, solvers: Sequence[cfg.SolverMetrics]):
+    queries = (
+        (solver_idx, query)
+        for solver_idx, solver in enumerate(solvers)
+        for query in solver.query_metrics
+    )
+    for chunk in self._chunks(queries):
+      solver_idx = _int_array(i for i, _ in chunk)
+      start_nodes = _int_array(q.start_node for _, q in chunk)
+      end_nodes = _int_array(q.end_node for _, q in chunk)
+      binding_counts = _int_array(q.initial_binding_count for _, q in chunk)
+      flags = _int_array(
+          (_SHORTCIRCUITED if q.shortcircuited else 0)
+          | (_FROM_CACHE if q.from_cache else 0)
+          for _, q in chunk
+      )
+      step_offsets = _int_array([0])
+      step_nodes = _int_array()
+      step_depths = _int_array()
+      step_bindings = _Csr()
+      for _, q in chunk:
+        for step in q.steps:
+          step_nodes.append(step.node)
+          step_depths.append(step.depth)
+          step_bindings.append(step.bindings)
+        step_offsets.append(len(step_nodes))
+      self._write_chunk(
+          _QUERIES,
+          len(chunk),
+          [
+              solver_idx,
+              start_nodes,
+              end_nodes,
+              binding_counts,
+              flags,
+              step_offsets,
+              step_nodes,
+              step_depths,
+              step_bindings.offsets,
+              step_bindings.values,
+          ],
+          (min(start_nodes), max(start_nodes)),
+      )
+
+  def finish(self, entrypoint: cfg.CFGNode | None):
+    """Writes the index. Must be called after all chunks are written."""
+    index_offset = self._offset
+    for e in self._index:
+      self._write(
+          _INDEX_ENTRY.pack(e.kind, e.offset, e.count, e.min_node, e.max_node)
+      )
+    self._write(
+        _FOOTER.pack(
+            entrypoint.id if entrypoint else -1,
+            index_offset,
+            len(self._index),
+            MAGIC,
+        )
+    )
+
+
+def write_program(
+    program: cfg.Program,
+    f: BinaryIO,
+    chunk_size: int = CHUNK_SIZE,
+    encode_data: Callable[[cfg.Binding], str] = ser.encode_binding_data,
+):
+  """Writes a program to a binary file object.
+
+  Args:
+    program: a cfg.Program.
+    f: a file object opened for writing in binary mode.
+    chunk_size: the maximum number of items in a chunk.
+    encode_data: a function that turns a binding's data into a string. Printing
+      pytd types is the bulk of the encoding cost, so callers that don't need
+      the data can pass a cheaper function.
+  """
+  writer = Writer(f, chunk_size)
+  writer.write_cfg_nodes(sorted(program.cfg_nodes, key=lambda n: n.id))
+  variables = sorted(program.variables, key=lambda v: v.id)
+  writer.write_variables(variables)
+  # Binding ids grow as the analysis proceeds, as do node ids, so sorting by
+  # id keeps the node range of each chunk narrow.
+  bindings = sorted(
+      (b for v in variables for b in v.bindings), key=lambda b: b.id
+  )
+  del variables
+  writer.write_bindings(bindings, encode_data)
+  del bindings
+  writer.write_queries(program.calculate_metrics().solver_metrics)
+  writer.finish(program.entrypoint)
+
+
+class Reader:
+  """Reads a binary file written by write_program.
+
+  Only the index is read up front; chunks are read on demand.
+  """
+
+  def __init__(self, f: BinaryIO):
+    self._f = f
+    magic, version = _HEADER.unpack(self._read_at(0, _HEADER.size))
+    if magic != MAGIC:
+      raise FormatError("Not a serialized typegraph")
+    if version != VERSION:
+      raise FormatError(f"Unsupported version {version}")
+    file_size = f.seek(0, io.SEEK_END)
+    if file_size < _HEADER.size + _FOOTER.size:
+      raise FormatError("Truncated typegraph file")
+    self.entrypoint, index_offset, count, magic = _FOOTER.unpack(
+        self._read_at(file_size - _FOOTER.size, _FOOTER.size)
+    )
+    if magic != MAGIC:
+      raise FormatError("Truncated typegraph file")
+    raw_index = self._read_at(index_offset, count * _INDEX_ENTRY.size)
+    self.index = [_IndexEntry(*e) for e in _INDEX_ENTRY.iter_unpack(raw_index)]
+
+  def _read_at(self, offset: int, size: int) -> bytes:
+    self._f.seek(offset)
+    data = self._f.read(size)
+    if len(data) != size:
+      raise FormatError("Truncated typegraph file")
+    return data
+
+  def _read_chunk(self, entry: _IndexEntry) -> list[memoryview]:
+    kind, _, size = _CHUNK_HEADER.unpack(
+        self._read_at(entry.offset, _CHUNK_HEADER.size)
+    )
+    if kind != entry.kind:
+      raise FormatError("Corrupt typegraph index")
+    payload = memoryview(self._read_at(entry.offset + _CHUNK_HEADER.size, size))
+    (ncolumns,) = _COLUMN_COUNT.unpack_from(payload)
+    pos = _COLUMN_COUNT.size
+    columns = []
+    for _ in range(ncolumns):
+      (column_size,) = _COLUMN_SIZE.unpack_from(payload, pos)
+      pos += _COLUMN_SIZE.size
+      columns.append(payload[pos : pos + column_size])
+      pos += column_size
+    return columns
+
+  def _chunks(
+      self, kind: bytes, node_range: tuple[int, int] | None
+  ) -> Iterator[list[memoryview]]:
+    for entry in self.index:
+      if entry.kind == kind and (
+          kind == _VARIABLES or entry.overlaps(node_range)
+      ):
+        yield self._read_chunk(entry)
+
+  def cfg_nodes(
+      self, node_range: tuple[int, int] | None = None
+  ) -> Iterator[ser.SerializedCFGNode]:
+    """Yields the CFG nodes whose ids are in [lo, hi)."""
+    for columns in self._chunks(_NODES, node_range):
+      ids, name_offsets = _from_bytes(columns[0]), _from_bytes(columns[1])
+      names = _decode_strings(name_offsets, columns[2])
+      incoming, outgoing, bindings = (
+          _csr_rows(_from_bytes(columns[i]), _from_bytes(columns[i + 1]))
+          for i in (3, 5, 7)
+      )
+      conditions = _from_bytes(columns[9])
+      for i, node_id in enumerate(ids):
+        if node_range and not node_range[0] <= node_id < node_range[1]:
+          continue
+        yield ser.SerializedCFGNode(
+            id=ser.CFGNodeId(node_id),
+            name=names[i],
+            incoming=incoming[i],
+            outgoing=outgoing[i],
+            bindings=bindings[i],
+            condition=None if conditions[i] < 0 else conditions[i],
+        )
+
+  def variables(self) -> Iterator[ser.SerializedVariable]:
+    for columns in self._chunks(_VARIABLES, None):
+      ids = _from_bytes(columns[0])
+      bindings = _csr_rows(_from_bytes(columns[1]), _from_bytes(columns[2]))
+      for i, variable_id in enumerate(ids):
+        yield ser.SerializedVariable(
+            id=ser.VariableId(variable_id), bindings=bindings[i]
+        )
+
+  def bindings(
+      self, node_range: tuple[int, int] | None = None
+  ) -> Iterator[ser.SerializedBinding]:
+    """Yields the bindings with an origin at a node in [lo, hi)."""
+    for columns in self._chunks(_BINDINGS, node_range):
+      ids, variables = _from_bytes(columns[0]), _from_bytes(columns[1])
+      data = _decode_strings(_from_bytes(columns[2]), columns[3])
+      origin_offsets, where, set_offsets = (
+          _from_bytes(c) for c in columns[4:7]
+      )
+      source_sets = _csr_rows(_from_bytes(columns[7]), _from_bytes(columns[8]))
+      for i, binding_id in enumerate(ids):
+        start, end = origin_offsets[i], origin_offsets[i + 1]
+        if node_range and not any(
+            node_range[0] <= where[j] < node_range[1] for j in range(start, end)
+        ):
+          continue
+        origins = [
+            ser.SerializedOrigin(
+                where=ser.CFGNodeId(where[j]),
+                source_sets=source_sets[set_offsets[j] : set_offsets[j + 1]],
+            )
+            for j in range(start, end)
+        ]
+        yield ser.SerializedBinding(
+            id=ser.BindingId(binding_id),
+            variable=ser.VariableId(variables[i]),
+            data=data[i],
+            origins=origins,
+        )
+
+  def queries(
+      self, node_range: tuple[int, int] | None = None
+  ) -> Iterator[ser.SerializedQuery]:
+    """Yields the solver queries that started at a node in [lo, hi)."""
+    query_id = -1
+    for entry in self.index:
+      if entry.kind != _QUERIES:
+        continue
+      if not entry.overlaps(node_range):
+        # Queries are numbered by position, so count the skipped ones.
+        query_id += entry.count
+        continue
+      columns = self._read_chunk(entry)
+      (
+          solver_idx,
+          start_nodes,
+          end_nodes,
+          binding_counts,
+          flags,
+          step_offsets,
+          step_nodes,
+          step_depths,
+      ) = (_from_bytes(c) for c in columns[:8])
+      step_bindings = _csr_rows(
+          _from_bytes(columns[8]), _from_bytes(columns[9])
+      )
+      for i, start_node in enumerate(start_nodes):
+        query_id += 1
+        if node_range and not node_range[0] <= start_node < node_range[1]:
+          continue
+        steps = [
+            ser.SerializedQueryStep(
+                node=ser.CFGNodeId(step_nodes[j]),
+                depth=step_depths[j],
+                bindings=step_bindings[j],
+            )
+            for j in range(step_offsets[i], step_offsets[i + 1])
+        ]
+        yield ser.SerializedQuery(
+            id=query_id,
+            solver_idx=solver_idx[i],
+            start_node=ser.CFGNodeId(start_node),
+            end_node=ser.CFGNodeId(end_nodes[i]),
+            initial_binding_count=binding_counts[i],
+            shortcircuited=bool(flags[i] & _SHORTCIRCUITED),
+            from_cache=bool(flags[i] & _FROM_CACHE),
+            steps=steps,
+        )
+
+  def load(
+      self, node_range: tuple[int, int] | None = None
+  ) -> ser.SerializedProgram:
+    """Loads the program, or the part of it in a range of CFG node ids.
+
+    Args:
+      node_range: an optional half-open range [lo, hi) of CFG node ids. If
+        given, only the nodes in the range, the bindings with an origin in the
+        range, the variables of those bindings and the queries that started in
+        the range are loaded.
+
+    Returns:
+      A SerializedProgram.
+    """
+    cfg_nodes = list(self.cfg_nodes(node_range))
+    bindings = list(self.bindings(node_range))
+    variables = list(self.variables())
+    if node_range:
+      binding_ids = {b.id for b in bindings}
+      variables = [
+          dataclasses.replace(
+              v, bindings=[b for b in v.bindings if b in binding_ids]
+          )
+          for v in variables
+      ]
+      variables = [v for v in variables if v.bindings]
+    return ser.SerializedProgram(
+        cfg_nodes=cfg_nodes,
+        variables=variables,
+        bindings=bindings,
+        entrypoint=ser.CFGNodeId(self.entrypoint),
+        queries=list(self.queries(node_range)),
+    )
@@ -0,0 +1,90 @@
+"""Tests for typegraph_binary.py."""
+
+import io
+import json
+
+from pytype.tests import test_base
+from pytype.tests import test_utils
+from pytype.typegraph import typegraph_binary
+from pytype.typegraph import typegraph_serializer
+
+
+def _encode_data(binding):
+  return type(binding.data).__name__
+
+
+class _Encoder(typegraph_serializer.TypegraphEncoder):
+
+  def _encode_binding_data(self, binding):
+    return _encode_data(binding)
+
+
+class TypegraphBinaryTest(test_base.BaseTest):
+
+  def setUp(self):
+    super().setUp()
+    ctx = test_utils.make_context(self.options)
+    # Max depth is arbitrarily chosen from analyze.py.
+    src = "\n".join(
+        f"def f{i}(x):\n  y = x if x else {i}\n  return y\nf{i}({i})"
+        for i in range(10)
+    )
+    loc, defs = ctx.vm.run_program(src=src, filename="", maximum_depth=3)
+    ctx.vm.analyze(loc, defs, maximum_depth=3)
+    self.program = ctx.program
+    # Record some solver queries.
+    for node in self.program.cfg_nodes:
+      for b in node.bindings:
+        node.HasCombination([b])
+    # A small chunk size, so that the program is split across many chunks.
+    self.f = io.BytesIO()
+    typegraph_binary.write_program(
+        self.program, self.f, chunk_size=7, encode_data=_encode_data
+    )
+
+  def test_roundtrip(self):
+    expected = typegraph_serializer.decode_program(
+        json.dumps(self.program, cls=_Encoder)
+    )
+    # Source sets don't have a defined order.
+    for b in expected.bindings:
+      for o in b.origins:
+        o.source_sets = [sorted(s) for s in o.source_sets]
+    actual = typegraph_binary.Reader(self.f).load()
+    self.assertEqual(expected, actual)
+
+  def test_node_range(self):
+    reader = typegraph_binary.Reader(self.f)
+    full = reader.load()
+    node_range = (3, 10)
+    part = reader.load(node_range=node_range)
+    self.assertEqual(part.entrypoint, full.entrypoint)
+    self.assertEqual([n.id for n in part.cfg_nodes], list(range(3, 10)))
+    in_range = lambda b: any(3 <= o.where < 10 for o in b.origins)
+    self.assertEqual(part.bindings, [b for b in full.bindings if in_range(b)])
+    self.assertTrue(part.bindings)
+    self.assertLess(len(part.bindings), len(full.bindings))
+    binding_ids = {b.id for b in part.bindings}
+    for v in part.variables:
+      self.assertTrue(v.bindings)
+      self.assertLessEqual(set(v.bindings), binding_ids)
+    self.assertTrue(part.queries)
+    self.assertEqual(
+        part.queries, [q for q in full.queries if 3 <= q.start_node < 10]
+    )
+
+  def test_skips_chunks(self):
+    reader = typegraph_binary.Reader(self.f)
+    reads = []
+    read_chunk = reader._read_chunk
+    reader._read_chunk = lambda e: reads.append(e) or read_chunk(e)
+    list(reader.cfg_nodes(node_range=(0, 1)))
+    self.assertEqual(len(reads), 1)
+
+  def test_bad_file(self):
+    with self.assertRaises(typegraph_binary.FormatError):
+      typegraph_binary.Reader(io.BytesIO(b"\0" * 64))
+
+
+if __name__ == "__main__":
+  test_base.main()
@@ -93,6 +93,11 @@ class SerializedProgram:
   queries: list[SerializedQuery]
 
 
+def encode_binding_data(binding: cfg.Binding) -> str:
+  data = binding.data
+  return pytd_utils.Print(data.to_pytd_type()) if data else "None"
+
+
 class TypegraphEncoder(json.JSONEncoder):
   """Implements the JSONEncoder behavior for typegraph objects."""
 
@@ -142,8 +147,7 @@ class TypegraphEncoder(json.JSONEncoder):
     }
 
   def _encode_binding_data(self, binding: cfg.Binding) -> str:
-    data = binding.data
-    return pytd_utils.Print(data.to_pytd_type()) if data else "None"
+    return encode_binding_data(binding)
 
   def _encode_binding(self, binding: cfg.Binding) -> dict[str, Any]:
     return {
@@ -189,6 +193,7 @@ class TypegraphEncoder(json.JSONEncoder):
           })
         enc_queries.append({
             "_type": "Query",
+            "id": query_id,
             "solver_idx": solver_idx,
             "start_node": query.start_node,
             "end_node": query.end_node,
@@ -9,6 +9,8 @@
 namespace devtools_python_typegraph {
 namespace {
 
+using ::testing::ElementsAre;
+using ::testing::IsEmpty;
 using ::testing::UnorderedElementsAre;
 
 class TypeGraphTest : public ::testing::Test {
@@ -167,6 +169,30 @@ TEST_F(TypeGraphTest, TestVariableProperties) {
                                                 AsDataType(&C)));
 }
 
+TEST_F(TypeGraphTest, TestSourceSet) {
+  Program p;
+  Variable* x = p.NewVariable();
+  int one = 1, two = 2, three = 3;
+  Binding* b1 = AddBinding(x, &one);
+  Binding* b2 = AddBinding(x, &two);
+  Binding* b3 = AddBinding(x, &three);
+  SourceSet s({b3, b1, b3});
+  EXPECT_THAT(s, ElementsAre(b1, b3));
+  EXPECT_TRUE(s.insert(b2));
+  EXPECT_FALSE(s.insert(b2));
+  EXPECT_THAT(s, ElementsAre(b1, b2, b3));
+  EXPECT_EQ(s.count(b2), 1);
+  EXPECT_TRUE(SourceSet({b1, b2}) < SourceSet({b1, b3}));
+  EXPECT_TRUE(SourceSet({b1}) < SourceSet({b1, b2}));
+  EXPECT_FALSE(SourceSet({b2}) < SourceSet({b1, b3}));
+
+  Origin o(p.NewCFGNode("n"));
+  o.AddSourceSet(SourceSet({b2}));
+  o.AddSourceSet(std::vector<Binding*>{b3, b1});
+  o.AddSourceSet(SourceSet({b1, b3}));
+  EXPECT_THAT(o.source_sets, ElementsAre(SourceSet({b1, b3}), SourceSet({b2})));
+}
+
 TEST_F(TypeGraphTest, testConditionOnStartNode2) {
   // Test that a condition on the initial node blocks the node.
   // At the time of writing this can not happen in pytype. The test guards
@@ -194,21 +220,16 @@ TEST_F(TypeGraphTest, testInvalidateSolver) {
   EXPECT_EQ(p.solver(), nullptr);
   n1->HasCombination({});
   EXPECT_NE(p.solver(), nullptr);
-  // Adding a new CFGNode invalidates the current solver.
-  CFGNode* n2 = p.NewCFGNode("n2");
-  EXPECT_EQ(p.solver(), nullptr);
-  n2->HasCombination({});
-  EXPECT_NE(p.solver(), nullptr);
-  // a new Variable by itself doesn't change the CFG, so the solver is valid.
+  // Growing the program only prunes the solver's caches.
+  CFGNode* n2 = n1->ConnectNew("n2");
   Variable* x = p.NewVariable();
-  EXPECT_NE(p.solver(), nullptr);
-  // Adding a binding invalidates the solver.
   std::string a("a");
-  Binding* ax = AddBinding(x, &a);
-  ax->AddOrigin(n1);
-  EXPECT_EQ(p.solver(), nullptr);
-  n2->HasCombination({ax});
+  Binding* ax = AddBinding(x, &a, n1, {});
   EXPECT_NE(p.solver(), nullptr);
+  EXPECT_TRUE(n2->HasCombination({ax}));
+  // An explicit invalidation throws the solver away.
+  p.InvalidateSolver();
+  EXPECT_EQ(p.solver(), nullptr);
 }
 
 TEST_F(TypeGraphTest, testMaxVarSize) {
@@ -265,5 +286,65 @@ TEST_F(TypeGraphTest, TestMetrics) {
   EXPECT_EQ(varm[0].binding_count(), 1);
   EXPECT_THAT(varm[0].node_ids(), UnorderedElementsAre(0, 1));
 }
+TEST_F(TypeGraphTest, TestCounters) {
+  Program p;
+  Variable* x = p.NewVariable();
+  CFGNode* n0 = p.NewCFGNode("n0");
+  CFGNode* n1 = n0->ConnectNew("n1");
+  int one = 1;
+  Binding* ax1 = AddBinding(x, &one, n1, {});
+  ax1->AddOrigin(n0);
+
+  auto counters = p.CalculateCounters();
+  EXPECT_EQ(counters.cfg_node_count, 2);
+  EXPECT_EQ(counters.variable_count, 1);
+  EXPECT_EQ(counters.binding_count, 1);
+  EXPECT_EQ(counters.origin_count, 2);
+  EXPECT_EQ(counters.solver_count, 0);
+
+  EXPECT_TRUE(ax1->IsVisible(n1));
+  EXPECT_TRUE(ax1->IsVisible(n1));
+  counters = p.CalculateCounters();
+  EXPECT_EQ(counters.solver_count, 1);
+  EXPECT_EQ(counters.query_count, 2);
+  EXPECT_GT(counters.state_cache_hits, 0);
+  EXPECT_GT(counters.state_cache_size, 0);
+
+  // Retired solvers still count towards the totals, but not the cache sizes.
+  p.InvalidateSolver();
+  counters = p.CalculateCounters();
+  EXPECT_EQ(counters.solver_count, 1);
+  EXPECT_EQ(counters.query_count, 2);
+  EXPECT_EQ(counters.state_cache_size, 0);
+  EXPECT_EQ(counters.path_cache_size, 0);
+}
+
+TEST_F(TypeGraphTest, TestCompact) {
+  Program p;
+  CFGNode* n0 = p.NewCFGNode("n0");
+  CFGNode* n1 = n0->ConnectNew("n1");
+  int one = 1, two = 2, three = 3;
+  Variable* x = p.NewVariable();
+  Binding* x1 = AddBinding(x, &one, n0, {});
+  Variable* y = p.NewVariable();
+  Binding* y2 = AddBinding(y, &two, n1, {x1});
+  Variable* z = p.NewVariable();
+  AddBinding(z, &three, n1, {});
+  EXPECT_TRUE(n1->HasCombination({y2}));
+
+  // x is kept alive by y's source set, z is unreachable.
+  EXPECT_EQ(p.Compact({y}), 1);
+  EXPECT_THAT(n1->bindings(), ElementsAre(y2));
+  EXPECT_EQ(p.solver(), nullptr);
+  EXPECT_TRUE(n1->HasCombination({y2}));
+
+  EXPECT_EQ(p.Compact({}), 2);
+  EXPECT_THAT(n0->bindings(), IsEmpty());
+  auto metrics = p.CalculateMetrics();
+  EXPECT_EQ(metrics.collected_variable_count(), 3);
+  EXPECT_EQ(metrics.collected_binding_count(), 3);
+  EXPECT_THAT(metrics.variable_metrics(), IsEmpty());
+}
+
 }  // namespace
 }  // namespace devtools_python_typegraph
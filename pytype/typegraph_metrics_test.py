@@ -3,6 +3,7 @@
 import textwrap
 
 from pytype import context
+from pytype import metrics as pytype_metrics
 from pytype import typegraph
 from pytype.tests import test_base
 
@@ -35,5 +36,56 @@ class MetricsTest(test_base.BaseTest):
     self.assertNotEmpty(metrics.solver_metrics[0].query_metrics)
 
 
+class SnapshotCountersTest(test_base.BaseTest):
+  """Tests for the typegraph counters sampled at analyze.py's snapshots."""
+
+  def setUp(self):
+    super().setUp()
+    pytype_metrics._prepare_for_test()
+
+  def tearDown(self):
+    super().tearDown()
+    pytype_metrics._prepare_for_test(enabled=False)
+
+  def _counts(self, name):
+    counter = pytype_metrics.get_metric(
+        f"typegraph_{name}", pytype_metrics.MapCounter
+    )
+    return counter._counts  # pylint: disable=protected-access
+
+  def test_infer(self):
+    self.Infer("""
+      def f(x):
+        return x
+      y = f(1) if __random__ else f("")
+    """)
+    nodes = self._counts("cfg_node_count")
+    self.assertCountEqual(
+        nodes, ["analyze:infer_types:tracer", "analyze:infer_types:post"]
+    )
+    self.assertGreater(nodes["analyze:infer_types:tracer"], 0)
+    self.assertGreaterEqual(
+        nodes["analyze:infer_types:post"], nodes["analyze:infer_types:tracer"]
+    )
+    bindings = self._counts("binding_count")
+    self.assertGreater(bindings["analyze:infer_types:post"], 0)
+
+  def test_check(self):
+    self.Check("""
+      x = 1
+    """)
+    self.assertCountEqual(
+        self._counts("origin_count"),
+        ["analyze:check_types:tracer", "analyze:check_types:post"],
+    )
+
+  def test_disabled(self):
+    pytype_metrics._prepare_for_test(enabled=False)
+    self.Check("""
+      x = 1
+    """)
+    self.assertFalse(self._counts("cfg_node_count"))
+
+
 if __name__ == "__main__":
   test_base.main()
@@ -19,7 +19,7 @@ import functools
 import itertools
 import logging
 import re
-from typing import Any
+from typing import Any, Callable
 
 from pycnite import marshal as pyc_marshal
 from pytype import block_environment
@@ -30,6 +30,7 @@ from pytype import load_pytd
 from pytype import metrics
 from pytype import pattern_matching
 from pytype import preprocess
+from pytype import solver_profile
 from pytype import state as frame_state
 from pytype import vm_utils
 from pytype.abstract import abstract
@@ -73,6 +74,25 @@ class LocalOp:
     return self.op == self.Op.ANNOTATE
 
 
+@dataclasses.dataclass(frozen=True)
+class _Instruction:
+  """An opcode, decoded once for the dispatch loop.
+
+  Attributes:
+    op: The opcode.
+    handler: The bound byte_* method for op, or None if there is none.
+    importing: Whether op imports a module.
+    match_case: Whether op is on the line of a match case.
+    implicit_return: Whether op is a return that isn't in the source.
+  """
+
+  op: opcodes.Opcode
+  handler: Callable[..., frame_state.FrameState] | None
+  importing: bool
+  match_case: bool
+  implicit_return: bool
+
+
 _opcode_counter = metrics.MapCounter("vm_opcode")
 
 
@@ -149,6 +169,25 @@ class VirtualMachine:
     # Cache for _import_module.
     self._imported_modules_cache = {}
 
+    # The number of opcodes run so far, and its value at the start of each
+    # function call that is running. See --function-budget.
+    self._opcodes_executed = 0
+    self._call_starts: list[int] = []
+    self._over_budget_code: set[blocks.OrderedCode] = set()
+
+    # Decoded instructions of each code object, in block order. See _plan().
+    self._plans: dict[
+        blocks.OrderedCode,
+        list[tuple[blocks.Block, list[_Instruction]]],
+    ] = {}
+
+    # Attributes solver queries to opcodes, if --solver-profile is set.
+    self._solver_profiler = (
+        solver_profile.SolverProfiler(ctx.program)
+        if ctx.options.solver_profile
+        else None
+    )
+
   @property
   def current_local_ops(self):
     return self.local_ops[self.frame.f_code.name]
@@ -157,6 +196,10 @@ class VirtualMachine:
   def current_annotated_locals(self):
     return self.annotated_locals[self.frame.f_code.name]
 
+  @property
+  def solver_profiler(self) -> solver_profile.SolverProfiler | None:
+    return self._solver_profiler
+
   @property
   def current_opcode(self) -> opcodes.Opcode | None:
     return self.frame and self.frame.current_opcode
@@ -212,9 +255,43 @@ class VirtualMachine:
     assert self._maximum_depth is not None
     return self._maximum_depth - len(self.frames)
 
+  def is_analyzing(self):
+    """Whether the module has been run and its definitions are being analyzed."""
+    return self._analyzing
+
   def is_at_maximum_depth(self):
     return len(self.frames) > self._maximum_depth
 
+  def is_over_budget(self):
+    """Whether the outermost running function call has used up its budget."""
+    budget = self.ctx.options.function_budget
+    return bool(
+        budget
+        and self._call_starts
+        and self._opcodes_executed - self._call_starts[0] > budget
+    )
+
+  @contextlib.contextmanager
+  def budgeted_call(self):
+    """Counts the opcodes run by a function call, including nested calls.
+
+    Yields:
+      A callable that returns the number of opcodes run so far.
+    """
+    start = self._opcodes_executed
+    self._call_starts.append(start)
+    try:
+      yield lambda: self._opcodes_executed - start
+    finally:
+      self._call_starts.pop()
+
+  def is_first_over_budget(self, code):
+    """Whether code has gone over budget for the first time."""
+    if code in self._over_budget_code:
+      return False
+    self._over_budget_code.add(code)
+    return True
+
   def _is_match_case_op(self, op):
     """Should we handle case matching for this opcode."""
     # A case statement generates multiple opcodes on the same line. Since the
@@ -283,14 +360,53 @@ class VirtualMachine:
         self.ctx.root_node
     )
 
+  def _decode(self, op: opcodes.Opcode) -> _Instruction:
+    return _Instruction(
+        op=op,
+        handler=getattr(self, f"byte_{op.name}", None),
+        importing="IMPORT" in op.__class__.__name__,
+        match_case=op.line in self._branch_tracker.matches.match_cases,
+        implicit_return=(
+            op.name in ("RETURN_VALUE", "RETURN_CONST")
+            and op.line not in self._director.return_lines
+        ),
+    )
+
+  def _plan(
+      self, code: blocks.OrderedCode
+  ) -> list[tuple[blocks.Block, list[_Instruction]]]:
+    """Decodes the instructions of a code object, once per code object.
+
+    Functions are typically run many times, with different arguments, so we
+    look up the handler and compute the per-opcode flags only the first time.
+
+    Args:
+      code: The code to run.
+
+    Returns:
+      The blocks of the code, in order, with their decoded instructions.
+    """
+    plan = self._plans.get(code)
+    if plan is None:
+      # Decoded flags depend on line numbers, so fix those up first.
+      process_blocks.adjust_returns(code, self._director.block_returns)
+      plan = self._plans[code] = [
+          (block, [self._decode(op) for op in block]) for block in code.order
+      ]
+    return plan
+
   def run_instruction(
-      self, op: opcodes.Opcode, state: frame_state.FrameState
+      self,
+      op: opcodes.Opcode,
+      state: frame_state.FrameState,
+      insn: _Instruction | None = None,
   ) -> frame_state.FrameState:
     """Run a single bytecode instruction.
 
     Args:
       op: An opcode.
       state: The state just before running this instruction.
+      insn: The decoded op, if the caller has one.
 
     Returns:
       The state right after this instruction that should roll over to the
@@ -299,33 +415,39 @@ class VirtualMachine:
     Raises:
       VirtualMachineError: if a fatal error occurs.
     """
+    if insn is None:
+      insn = self._decode(op)
+    self._opcodes_executed += 1
     _opcode_counter.inc(op.name)
-    self.frame.current_opcode = op
-    self._importing = "IMPORT" in op.__class__.__name__
-    if log.isEnabledFor(logging.INFO):
-      vm_utils.log_opcode(op, state, self.frame, len(self.frames))
-    # Track type and enum case narrowing in match statements (we need to do this
-    # before we run the opcode).
-    if op.line in self._branch_tracker.matches.match_cases:
-      state = self._handle_match_case(state, op)
-    # dispatch
-    bytecode_fn = getattr(self, f"byte_{op.name}", None)
-    if bytecode_fn is None:
-      raise VirtualMachineError(f"Unknown opcode: {op.name}")
-    state = bytecode_fn(state, op)
-    if state.why in ("reraise", "Never"):
-      state = state.set_why("exception")
-    implicit_return = (
-        op.name in ("RETURN_VALUE", "RETURN_CONST")
-        and op.line not in self._director.return_lines
-    )
-    if len(self.frames) <= 2:
-      # We do exhaustiveness checking only when doing a top-level analysis of
-      # the match code.
-      for err in self._branch_tracker.check_ending(op, implicit_return):
-        self.ctx.errorlog.incomplete_match(self.frames, err.line, err.cases)
-    self.frame.current_opcode = None
-    return state
+    profiler = self._solver_profiler
+    prev_query_tag = profiler.enter(op) if profiler else None
+    try:
+      self.frame.current_opcode = op
+      self._importing = insn.importing
+      if log.isEnabledFor(logging.INFO):
+        vm_utils.log_opcode(op, state, self.frame, len(self.frames))
+      # Track type and enum case narrowing in match statements (we need to do
+      # this before we run the opcode).
+      if insn.match_case:
+        state = self._handle_match_case(state, op)
+      # dispatch
+      if insn.handler is None:
+        raise VirtualMachineError(f"Unknown opcode: {op.name}")
+      state = insn.handler(state, op)
+      if state.why in ("reraise", "Never"):
+        state = state.set_why("exception")
+      if len(self.frames) <= 2:
+        # We do exhaustiveness checking only when doing a top-level analysis of
+        # the match code.
+        for err in self._branch_tracker.check_ending(op, insn.implicit_return):
+          self.ctx.errorlog.incomplete_match(self.frames, err.line, err.cases)
+      self.frame.current_opcode = None
+      return state
+    finally:
+      # Restore the query tag even if the opcode raised, so that later solver
+      # queries aren't attributed to this instruction.
+      if profiler:
+        profiler.exit(prev_query_tag)
 
   def _run_frame_blocks(self, frame, node, annotated_locals):
     """Runs a frame's code blocks."""
@@ -344,8 +466,7 @@ class VirtualMachine:
     can_return = False
     return_nodes = []
     finally_tracker = vm_utils.FinallyStateTracker()
-    process_blocks.adjust_returns(frame.f_code, self._director.block_returns)
-    for block in frame.f_code.order:
+    for block, instructions in self._plan(frame.f_code):
       state = frame.states.get(block[0])
       if not state:
         log.warning("Skipping block %d, nothing connects to it.", block.id)
@@ -353,8 +474,9 @@ class VirtualMachine:
       self.block_env.add_block(frame, block)
       self.frame.current_block = block
       op = None
-      for op in block:
-        state = self.run_instruction(op, state)
+      for insn in instructions:
+        op = insn.op
+        state = self.run_instruction(op, state, insn)
         # Check if we have to carry forward the return state from an except
         # block to the END_FINALLY opcode.
         new_why = finally_tracker.process(op, state, self.ctx)
@@ -40,9 +40,9 @@ class TraceVM(vm.VirtualMachine):
     self._classes = set()
     self._unknowns = []
 
-  def run_instruction(self, op, state):
+  def run_instruction(self, op, state, insn=None):
     self.instructions_executed.add(op.index)
-    return super().run_instruction(op, state)
+    return super().run_instruction(op, state, insn)
 
 
 class VmTestBase(test_base.BaseTest, test_utils.MakeCodeMixin):
@@ -135,5 +135,36 @@ class AnnotationsTest(VmTestBase):
     )
 
 
+class InstructionPlanTest(TraceVmTestBase):
+  """Tests for decoding instructions once per code object."""
+
+  def test_decode_once(self):
+    src = textwrap.dedent("""
+      import os
+      def f(x):
+        return x
+      f(1)
+      f("")
+      f(1.0)
+    """)
+    self.ctx.vm.run_program(src, "", maximum_depth=10)
+    plans = self.ctx.vm._plans  # pylint: disable=protected-access
+    (f_code,) = (code for code in plans if code.name == "f")
+    self.assertEqual(
+        [op.index for op in f_code.code_iter],
+        [insn.op.index for _, block in plans[f_code] for insn in block],
+    )
+    self.assertIs(
+        plans[f_code], self.ctx.vm._plan(f_code)  # pylint: disable=protected-access
+    )
+    decoded = [
+        insn for plan in plans.values() for _, block in plan for insn in block  # pylint: disable=g-complex-comprehension
+    ]
+    self.assertTrue(any(insn.importing for insn in decoded))
+    self.assertTrue(all(insn.handler for insn in decoded))
+    executed = {insn.op.index for insn in decoded}
+    self.assertLessEqual(self.ctx.vm.instructions_executed, executed)
+
+
 if __name__ == "__main__":
   test_base.main()
@@ -380,8 +380,8 @@ def log_opcode(op, state, frame, stack_size):
     # Do not log NOP-like compiler optimisation opcodes.
     return
   indent = " > " * (stack_size - 1)
-  stack_rep = repper(state.data_stack)
-  block_stack_rep = repper(state.block_stack)
+  stack_rep = repper(tuple(state.data_stack))
+  block_stack_rep = repper(tuple(state.block_stack))
   if frame.module_name:
     name = frame.f_code.name
     log.info(